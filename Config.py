@@ -25,6 +25,7 @@ try:
     T = user_config["T"]  # decision rule (goal decision-making) threshold
     MINDFULNESS = user_config["MINDFULNESS"]
     BAG_GRANULARITY = user_config["BAG_GRANULARITY"]
+    RANDOM_SEED = user_config["RANDOM_SEED"]  # seed of each reasoner's random number generator, for reproducible runs; null for a random seed
     FOCUSX = user_config["FOCUSX"]
     FOCUSY = user_config["FOCUSY"]
 
@@ -35,13 +36,36 @@ try:
 
     MEMORY_CONCEPT_CAPACITY = user_config["MEMORY_CONCEPT_CAPACITY"]  # how many concepts can this NARS have?
     EVENT_BUFFER_CAPACITY = user_config["EVENT_BUFFER_CAPACITY"]
+    TEMPORAL_CHAINING_4_EVENTS = user_config["TEMPORAL_CHAINING_4_EVENTS"]  # chain up to 4 events per new event, instead of pairs
     GLOBAL_BUFFER_CAPACITY = user_config["GLOBAL_BUFFER_CAPACITY"]
     CONCEPT_LINK_CAPACITY = user_config["CONCEPT_LINK_CAPACITY"]  # how many of each concept link can this NARS have?
 
+    """
+        Input
+    """
+    INPUT_QUEUE_CAPACITY = user_config["INPUT_QUEUE_CAPACITY"]  # inputs waiting to be processed
+    INPUT_QUEUE_OVERFLOW_POLICY = user_config["INPUT_QUEUE_OVERFLOW_POLICY"]  # "drop_oldest" or "reject_newest"
+    INPUT_QUEUE_SOURCE_PRIORITIES = user_config["INPUT_QUEUE_SOURCE_PRIORITIES"]  # input source -> priority; higher is processed first
+    INPUT_FILE_CHUNK_SIZE = user_config["INPUT_FILE_CHUNK_SIZE"]  # bytes of a NAL file parsed at once by a worker
+    INPUT_FILE_PARSE_WORKERS = user_config["INPUT_FILE_PARSE_WORKERS"]  # processes parsing NAL files; 0 to parse in the reasoner, -1 for one per spare CPU core
+    INPUT_FILE_BATCH_SIZE = user_config["INPUT_FILE_BATCH_SIZE"]  # most sentences loaded from a NAL file per working cycle
+    INPUT_RECORD_FILENAME = user_config["INPUT_RECORD_FILENAME"]  # record the input stream to this file, by working cycle; empty to not record
+    INPUT_REPLAY_FILENAME = user_config["INPUT_REPLAY_FILENAME"]  # replay a recorded input stream from this file; empty to not replay
+    SERVER_ENABLED = user_config["SERVER_ENABLED"]  # accept Narsese from network clients (see NARSServer)
+    SERVER_HOST = user_config["SERVER_HOST"]
+    SERVER_PORT = user_config["SERVER_PORT"]
+    SERVER_UNIX_SOCKET_PATH = user_config["SERVER_UNIX_SOCKET_PATH"]  # listen on this Unix socket instead of TCP; empty for TCP
+    SERVER_LINES_PER_SECOND = user_config["SERVER_LINES_PER_SECOND"]  # rate limit per client connection
+    SERVER_BURST = user_config["SERVER_BURST"]  # lines a client may send at once before being rate limited
+    SERVER_MAX_WRITE_BUFFER = user_config["SERVER_MAX_WRITE_BUFFER"]  # bytes of unsent replies before a client is disconnected as too slow
+    SERVER_ALLOW_COMMANDS = user_config["SERVER_ALLOW_COMMANDS"]  # let network clients run shell commands (save, load, ...), not just Narsese
+
     """
         Sensors
     """
     VISION_DIMENSIONS = (28,28)
+    VISION_FRAME_STREAM_CAPACITY = user_config["VISION_FRAME_STREAM_CAPACITY"]  # frames waiting to be seen; the oldest is dropped when full
+    VISION_FRAMES_PER_CYCLE = user_config["VISION_FRAMES_PER_CYCLE"]  # frames taken from the stream each working cycle
 
     """
         GUI
@@ -52,6 +76,9 @@ try:
     ARRAY_SENTENCES_DRAW_INDIVIDUAL_ELEMENTS = user_config[
         "ARRAY_SENTENCES_DRAW_INDIVIDUAL_ELEMENTS"]  # whether or not to draw each individual element / pixel of an array sentence. Turning this to False results in GUI speedup when viewing array sentences
     USE_PROFILER = user_config["USE_PROFILER"]
+    PROFILER_PRINT_INTERVAL = user_config["PROFILER_PRINT_INTERVAL"]  # working cycles between profiler printouts
+    METRICS_LOG_INTERVAL = user_config["METRICS_LOG_INTERVAL"]  # working cycles between metrics JSON lines; 0 to not log metrics
+    METRICS_LOG_FILENAME = user_config["METRICS_LOG_FILENAME"]  # file the metrics JSON lines are appended to; "" to print them
 
 
     """
@@ -85,6 +112,17 @@ try:
     MAX_EVIDENTIAL_BASE_LENGTH = user_config[
         "MAX_EVIDENTIAL_BASE_LENGTH"]  # maximum IDs to store documenting evidential base
 
+    """
+        Persistence
+    """
+    WRITE_AHEAD_LOG_ENABLED = user_config["WRITE_AHEAD_LOG_ENABLED"]  # log memory changes and recover them on startup
+    WRITE_AHEAD_LOG_FILENAME = user_config["WRITE_AHEAD_LOG_FILENAME"]
+    WRITE_AHEAD_LOG_SNAPSHOT_FILENAME = user_config["WRITE_AHEAD_LOG_SNAPSHOT_FILENAME"]  # snapshot the log extends
+    WRITE_AHEAD_LOG_FSYNC_BATCH_SIZE = user_config["WRITE_AHEAD_LOG_FSYNC_BATCH_SIZE"]  # records written per fsync
+    WRITE_AHEAD_LOG_COMPACTION_SIZE = user_config["WRITE_AHEAD_LOG_COMPACTION_SIZE"]  # log size (bytes) that triggers compaction into a new snapshot
+    KNOWLEDGE_BASE_PATH = user_config["KNOWLEDGE_BASE_PATH"]  # directory of a read-only background knowledge base; empty for none
+    KNOWLEDGE_BASE_PROMOTION_HITS = user_config["KNOWLEDGE_BASE_PROMOTION_HITS"]  # lookups of a related knowledge base statement before it is promoted into memory
+
     """
         Default Input Task Values
     """
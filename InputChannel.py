@@ -1,4 +1,10 @@
-import timeit as time
+import collections
+import json
+import multiprocessing
+import os
+import threading
+import time
+import timeit
 
 import numpy as np
 
@@ -15,49 +21,190 @@ import NALInferenceRules.TruthValueFunctions
     Purpose: Parses an input string and converts it into a Narsese Task which is fed into NARS' task buffer
 """
 
-pended_input_data_queue = []
 VISION_KEYWORD = "vision:"
 NARSESE_KEYWORD = "narsese:"
 
+# input sources, for their priority in the input queue
+SOURCE_SHELL = "shell"
+SOURCE_GUI = "gui"
+SOURCE_FILE = "file"
+SOURCE_NETWORK = "network"
+
+# shell commands, which parse_input_line() executes instead of parsing
+COMMANDS = ("count", "cycle", "save", "load", "load_input", "frames", "queue", "metrics")
+
+input_queue = NARSDataStructures.Other.InputQueue(capacity=Config.INPUT_QUEUE_CAPACITY,
+                                                  overflow_policy=Config.INPUT_QUEUE_OVERFLOW_POLICY,
+                                                  source_priorities=Config.INPUT_QUEUE_SOURCE_PRIORITIES)
+
+
+class FrameStream:
+    """
+        Bounded, ordered stream of vision frames (e.g. from a camera or a replayed recording).
+
+        Frames are seen oldest first. When the stream is full, the oldest frame is dropped to make room,
+        so a source that is faster than NARS only costs dropped frames, not ever-growing delay.
+    """
+
+    def __init__(self, capacity):
+        """
+        :param capacity: maximum number of frames waiting to be seen
+        """
+        self.capacity = capacity
+        self.frames = collections.deque()  # (image array, time it was put)
+        self.lock = threading.Lock()  # frames can be put from another thread
+
+        self.number_of_frames_put = 0
+        self.number_of_frames_dropped = 0
+        self.number_of_frames_taken = 0
+        self.total_ingest_latency = 0.0  # seconds between putting and taking, summed over taken frames
+        self.max_ingest_latency = 0.0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def put(self, img_array):
+        """
+            Put a frame at the end of the stream, dropping the oldest frame if the stream is full.
+        """
+        with self.lock:
+            if len(self.frames) == self.capacity:
+                self.frames.popleft()
+                self.number_of_frames_dropped += 1
+            self.frames.append((img_array, timeit.default_timer()))
+            self.number_of_frames_put += 1
+
+    def take(self):
+        """
+            :return: the oldest frame in the stream; None if the stream is empty
+        """
+        with self.lock:
+            if len(self.frames) == 0: return None
+            img_array, put_time = self.frames.popleft()
+            latency = timeit.default_timer() - put_time
+            self.number_of_frames_taken += 1
+            self.total_ingest_latency += latency
+            self.max_ingest_latency = max(self.max_ingest_latency, latency)
+        return img_array
+
+    def get_statistics_string(self):
+        average_latency = self.total_ingest_latency / self.number_of_frames_taken if self.number_of_frames_taken > 0 else 0.0
+        return "Frame stream: " + str(len(self)) + "/" + str(self.capacity) + " waiting, " \
+               + str(self.number_of_frames_put) + " put, " \
+               + str(self.number_of_frames_taken) + " taken, " \
+               + str(self.number_of_frames_dropped) + " dropped, " \
+               + "ingest latency avg " + "{:.1f}".format(average_latency * 1000) + "ms / max " \
+               + "{:.1f}".format(self.max_ingest_latency * 1000) + "ms"
+
+
+frame_stream = FrameStream(capacity=Config.VISION_FRAME_STREAM_CAPACITY)
+file_loader = None  # NALFileLoader of the NAL file being loaded, if any
+input_recording_file = None  # file the input stream is being recorded to, if any
+input_replay = collections.deque()  # (working cycle, input string) waiting to be replayed, in order
+
+
+def replay_frames_from_file(filename, frames_per_second=None, stream=None):
+    """
+        Replay a recorded frame sequence into a frame stream, in order.
+        The file is memory-mapped, so frames are only read from disk when NARS sees them.
+
+        :param filename: .npy file holding an array of frames, shape (frames, y, x) or (frames, y, x, channels)
+        :param frames_per_second: rate to put frames at, like a camera; None to put them all at once
+        :param stream: FrameStream to put the frames into; the input channel's stream by default
+        :return: the thread replaying the frames
+    """
+    if stream is None: stream = frame_stream
+    frames = np.load(filename, mmap_mode="r")
+    assert frames.ndim in (3, 4), "ERROR: Frame file must hold an array of 2D or 3D frames"
+
+    def replay():
+        for frame in frames:
+            stream.put(frame)
+            if frames_per_second is not None: time.sleep(1.0 / frames_per_second)
+
+    thread = threading.Thread(target=replay, name="Frame replay", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_recording_input(filename):
+    """
+        Record the Narsese input stream to a file, one JSON line [working cycle, input string] per input,
+        so a run can be reproduced with replay_input_from_file (along with Config.RANDOM_SEED).
+    """
+    global input_recording_file
+    stop_recording_input()
+    input_recording_file = open(filename, "w")
+
+
+def stop_recording_input():
+    global input_recording_file
+    if input_recording_file is None: return
+    input_recording_file.close()
+    input_recording_file = None
+
+
+def replay_input_from_file(filename):
+    """
+        Replay an input stream recorded by start_recording_input.
+        Each input is queued on the same working cycle it was recorded on, relative to the first recorded input,
+        which is queued on the next working cycle.
+    """
+    with open(filename) as file:
+        recording = [json.loads(line) for line in file if line.strip() != ""]
+    if len(recording) == 0: return
+    cycle_offset = Global.Global.get_current_cycle_number() + 1 - recording[0][0]
+    for cycle, input_string in recording:
+        input_replay.append((cycle + cycle_offset, input_string))
+
 
 def get_user_input():
     userinputstr = ""
 
-    global pended_input_data_queue
     while userinputstr != "exit":
         userinputstr = input("")
-        pended_input_data_queue.append(userinputstr)
+        parse_and_queue_input_string(userinputstr, source=SOURCE_SHELL)
 
 
-def parse_and_queue_input_string(input_string: str):
+def parse_and_queue_input_string(input_string: str, source=SOURCE_SHELL, origin=None):
     """
         Parses any input string and queues the resultant Narsese sentences to the input buffer.
 
         If the input string is a command, executes the command instead.
     :param input_string:
-    :return:
+    :param source: where the input came from, for its priority in the input queue
+    :param origin: network client the input came from, so answers can be sent back to it
+    :return: False if the input queue was full and rejected the input
     """
     if is_sensory_array_input_string(input_string):
         #todo broken
         # don't split by lines, this is array input
         sentence = parse_input_line(input_string)
-        pended_input_data_queue.append(sentence)
+        return input_queue.put(sentence, source=source)
     else:
         # treat each line as a separate input
-        pended_input_data_queue.append((NARSESE_KEYWORD,input_string))
+        return input_queue.put((NARSESE_KEYWORD,input_string,origin), source=source)
+
 
 
 
+def is_command(input_string: str):
+    return input_string.replace(" ", "") in COMMANDS
 
-def parse_input_line(input_string: str):
+
+def parse_input_line(input_string: str, allow_commands=True):
     """
         Parses one line of an input string and returns the resultant Narsese sentence.
 
         If the input string is a command, executes the command instead.
     :param input_string:
+    :param allow_commands: if False, a command is rejected instead of executed
     :return:
     """
     input_string = input_string.replace(" ", "")  # remove all spaces
+    if not allow_commands and input_string in COMMANDS:
+        Global.Global.print_to_output("WARNING: INPUT REJECTED: Command not allowed from this source: " + input_string)
+        return None
     try:
         NARS = Global.Global.NARS
         if input_string == "count":
@@ -71,6 +218,12 @@ def parse_input_line(input_string: str):
             NARS.load_memory_from_disk()
         elif input_string == "load_input":
             load_input()
+        elif input_string == "frames":
+            Global.Global.print_to_output(frame_stream.get_statistics_string())
+        elif input_string == "queue":
+            Global.Global.print_to_output(input_queue.get_statistics_string())
+        elif input_string == "metrics":
+            Global.Global.print_to_output(json.dumps(NARS.instrumentation.snapshot()))
         else:
             while Global.Global.NARS is None:
                 Global.Global.print_to_output("Waiting for NARS to start up...")
@@ -95,48 +248,233 @@ def process_input_channel():
 
         return: whether statement was processed
     """
-    while len(pended_input_data_queue) > 0:
-        data = pended_input_data_queue.pop()
+    current_cycle_number = Global.Global.get_current_cycle_number()
+    while len(input_replay) > 0 and input_replay[0][0] <= current_cycle_number:
+        parse_and_queue_input_string(input_replay.popleft()[1], source=SOURCE_FILE)
+
+    while len(input_queue) > 0:
+        data = input_queue.take()
+        if data is None: break
         if data[0] == NARSESE_KEYWORD:
-            input_string = data[1]
+            _, input_string, origin = data
+            if input_recording_file is not None:
+                input_recording_file.write(json.dumps([current_cycle_number, input_string]) + "\n")
             # turn strings into sentences
             lines = input_string.splitlines(False)
             for line in lines:
-                sentence = parse_input_line(line)
+                # network clients (the only inputs with an origin) may only run commands if the server allows it
+                sentence = parse_input_line(line, allow_commands=origin is None or Config.SERVER_ALLOW_COMMANDS)
                 # turn sentences into tasks
-                process_sentence_into_task(sentence)
-        elif data[0] == VISION_KEYWORD:
-                img = data[1]
-                img_array = np.array(img)
+                if sentence is not None: process_sentence_into_task(sentence, origin=origin)
+
+    global file_loader
+    if file_loader is not None:
+        file_loader.load_batch()
+        if file_loader.is_done(): file_loader = None
 
-                # tuple holds spatial truth values
-                Global.Global.NARS.vision_buffer.set_image(img_array)
+    for _ in range(Config.VISION_FRAMES_PER_CYCLE):
+        img = frame_stream.take()
+        if img is None: break
+        img_array = np.array(img)
 
+        # tuple holds spatial truth values
+        Global.Global.NARS.vision_buffer.set_image(img_array)
 
-def process_sentence_into_task(sentence: NALGrammar.Sentences.Sentence):
+
+def process_sentence_into_task(sentence: NALGrammar.Sentences.Sentence, origin=None):
     """
         Put a sentence into a NARS task, then do something with the Task
         :param sentence:
+        :param origin: network client the sentence came from, if any
     """
     if not Config.SILENT_MODE: Global.Global.print_to_output("IN: " + sentence.get_formatted_string())
     # create new task
-    task = NARSDataStructures.Other.Task(sentence, is_input_task=True)
+    task = NARSDataStructures.Other.Task(sentence, is_input_task=True, origin=origin)
 
     Global.Global.NARS.global_buffer.PUT_NEW(task)
 
-def load_input(filename="input.nal"):
+def load_input(filename="input.nal", start_offset=0):
     """
-        Load NAL input from a file
+        Start streaming NAL input from a file into the global buffer.
+        The file is loaded a batch at a time over the next working cycles (see NALFileLoader).
+
+        :param filename: file of Narsese sentences, one per line
+        :param start_offset: byte offset to resume loading from, as reported by an earlier load
     """
+    global file_loader
+    if file_loader is not None:
+        Global.Global.print_to_output("LOAD INPUT FAIL: still loading " + file_loader.filename)
+        return
     try:
-        with open(filename, "r") as f:
-            Global.Global.print_to_output("LOADING INPUT FILE: " + filename)
-            for line in f.readlines():
-                parse_and_queue_input_string(line)
-            np.array()
-            Global.Global.print_to_output("LOAD INPUT SUCCESS")
-    except:
-        Global.Global.print_to_output("LOAD INPUT FAIL")
+        file_loader = NALFileLoader(filename, start_offset=start_offset)
+        Global.Global.print_to_output("LOADING INPUT FILE: " + filename + " from byte " + str(start_offset))
+    except OSError as error:
+        Global.Global.print_to_output("LOAD INPUT FAIL: " + repr(error))
+
+
+def parse_nal_chunk(chunk, chunk_offset):
+    """
+        Parse a chunk of whole lines from a NAL file. Runs in a worker process.
+
+        :param chunk: bytes of whole lines
+        :param chunk_offset: byte offset of the chunk in the file
+        :return: list of (byte offset after the line, sentence fields or None, error message or None)
+            for each non-empty line
+    """
+    parsed_lines = []
+    line_end_offset = chunk_offset
+    for line in chunk.splitlines(keepends=True):
+        line_end_offset += len(line)
+        sentence_string = line.decode("utf-8").strip().replace(" ", "")  # remove all spaces
+        if sentence_string == "": continue
+        try:
+            parsed_lines.append((line_end_offset, NALGrammar.Sentences.parse_sentence_fields(sentence_string), None))
+        except Exception as error:  # one malformed line shouldn't stop a whole corpus
+            parsed_lines.append((line_end_offset, None, sentence_string + ": " + repr(error)))
+    return parsed_lines
+
+
+class NALFileLoader:
+    """
+        Streams a (possibly huge) NAL file into the global buffer.
+
+        The file is read in chunks of whole lines, which a pool of worker processes parses ahead.
+        Each working cycle, the reasoner makes Tasks from one batch of parsed sentences;
+        sentences are only made then, so their stamps and occurrence times come from the reasoner.
+        Only a few chunks are in flight at once, so memory stays bounded however big the file is.
+
+        `offset` is the byte offset just after the last line put into the global buffer;
+        loading can be resumed from it with load_input(filename, start_offset=offset).
+    """
+    PROGRESS_REPORT_INTERVAL = 0.05  # report progress every 5% of the file
+
+    def __init__(self, filename, start_offset=0, number_of_workers=None, chunk_size=None, batch_size=None):
+        """
+        :param number_of_workers: parsing processes; 0 to parse in this process, -1 for one per spare CPU core.
+            Config.INPUT_FILE_PARSE_WORKERS by default
+        :param chunk_size: bytes per chunk given to a worker. Config.INPUT_FILE_CHUNK_SIZE by default
+        :param batch_size: most sentences put into the global buffer per working cycle. Config.INPUT_FILE_BATCH_SIZE by default
+        """
+        self.filename = filename
+        self.file_size = os.path.getsize(filename)
+        self.file = open(filename, "rb")
+        self.file.seek(start_offset)
+        self.read_offset = start_offset  # where the next chunk starts
+        self.offset = start_offset  # just after the last line put into the global buffer
+
+        self.number_of_workers = Config.INPUT_FILE_PARSE_WORKERS if number_of_workers is None else number_of_workers
+        if self.number_of_workers < 0: self.number_of_workers = (os.cpu_count() or 1) - 1  # leave a core for the reasoner
+        self.chunk_size = Config.INPUT_FILE_CHUNK_SIZE if chunk_size is None else chunk_size
+        self.batch_size = Config.INPUT_FILE_BATCH_SIZE if batch_size is None else batch_size
+        self.pool = multiprocessing.Pool(self.number_of_workers) if self.number_of_workers > 0 else None
+
+        self.chunks_in_flight = collections.deque()  # AsyncResults of parse_nal_chunk, in file order
+        self.parsed_lines = collections.deque()  # parsed lines of the current chunk, not yet put
+        self.number_of_sentences_loaded = 0
+        self.number_of_sentences_rejected = 0
+        self.next_progress_report = self.get_progress() + NALFileLoader.PROGRESS_REPORT_INTERVAL
+
+        self.fill_pipeline()
+
+    def get_progress(self):
+        """
+            :return: fraction of the file put into the global buffer
+        """
+        return self.offset / self.file_size if self.file_size > 0 else 1.0
+
+    def is_done(self):
+        return self.file.closed
+
+    def read_chunk(self):
+        """
+            :return: (next chunk of whole lines, its byte offset); None at the end of the file
+        """
+        chunk = self.file.read(self.chunk_size)
+        if len(chunk) == 0: return None
+        if not chunk.endswith(b"\n"): chunk += self.file.readline()  # finish the last line
+        chunk_offset = self.read_offset
+        self.read_offset += len(chunk)
+        return chunk, chunk_offset
+
+    def fill_pipeline(self):
+        """
+            Hand chunks to the workers until enough are being parsed ahead
+        """
+        if self.pool is None: return
+        while len(self.chunks_in_flight) < 2 * self.number_of_workers:
+            chunk = self.read_chunk()
+            if chunk is None: return
+            self.chunks_in_flight.append(self.pool.apply_async(parse_nal_chunk, chunk))
+
+    def get_next_parsed_chunk(self):
+        """
+            :return: parsed lines of the next chunk; None if it's not parsed yet or the file is finished
+        """
+        if self.pool is None:
+            chunk = self.read_chunk()
+            return parse_nal_chunk(*chunk) if chunk is not None else None
+
+        if len(self.chunks_in_flight) == 0 or not self.chunks_in_flight[0].ready(): return None
+        parsed_lines = self.chunks_in_flight.popleft().get()
+        self.fill_pipeline()
+        return parsed_lines
+
+    def load_batch(self):
+        """
+            Put the next batch of sentences into the global buffer.
+            Stops early if the workers haven't parsed them yet, or if the global buffer is full.
+
+            :return: number of sentences put into the global buffer
+        """
+        global_buffer = Global.Global.NARS.global_buffer
+        room = min(self.batch_size, global_buffer.capacity - len(global_buffer))
+        number_loaded = 0
+        while number_loaded < room:
+            if len(self.parsed_lines) == 0:
+                parsed_lines = self.get_next_parsed_chunk()
+                if parsed_lines is None:
+                    if self.pool is None or len(self.chunks_in_flight) == 0: self.finish()
+                    break
+                self.parsed_lines.extend(parsed_lines)
+                continue
+
+            line_end_offset, sentence_fields, error_message = self.parsed_lines.popleft()
+            if sentence_fields is not None:
+                process_sentence_into_task(NALGrammar.Sentences.new_sentence_from_fields(*sentence_fields))
+                number_loaded += 1
+            else:
+                self.number_of_sentences_rejected += 1
+                Global.Global.print_to_output("WARNING: INPUT REJECTED: " + error_message)
+            self.offset = line_end_offset
+
+        self.number_of_sentences_loaded += number_loaded
+        if self.get_progress() >= self.next_progress_report and not self.is_done():
+            self.report_progress()
+            self.next_progress_report = self.get_progress() + NALFileLoader.PROGRESS_REPORT_INTERVAL
+        return number_loaded
+
+    def report_progress(self):
+        Global.Global.print_to_output("LOADING INPUT FILE: " + self.filename + " "
+                                      + "{:.1f}".format(self.get_progress() * 100) + "% ("
+                                      + str(self.number_of_sentences_loaded) + " sentences, "
+                                      + str(self.number_of_sentences_rejected) + " rejected, resume offset "
+                                      + str(self.offset) + ")")
+
+    def finish(self):
+        self.close()
+        Global.Global.print_to_output("LOAD INPUT SUCCESS: " + str(self.number_of_sentences_loaded) + " sentences, "
+                                      + str(self.number_of_sentences_rejected) + " rejected")
+
+    def close(self):
+        """
+            Stop loading. The file can be resumed from `offset` later.
+        """
+        self.file.close()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        self.chunks_in_flight.clear()
+        self.parsed_lines.clear()
 
 
 def is_sensory_array_input_string(input_string):
@@ -248,4 +586,4 @@ def parse_visual_sensory_string(input_string):
     queue_visual_sensory_image_array(pixel_value_array)
 
 def queue_visual_sensory_image_array(img_array):
-    pended_input_data_queue.append((VISION_KEYWORD, img_array))
\ No newline at end of file
+    frame_stream.put(img_array)
\ No newline at end of file
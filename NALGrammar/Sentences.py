@@ -55,6 +55,9 @@ class Sentence:
     def is_event(self):
         return self.get_tense() != NALSyntax.Tense.Eternal
 
+    def is_array(self):
+        return isinstance(self.statement, NALGrammar.Terms.SpatialTerm)
+
     def get_tense(self):
         return self.stamp.get_tense()
 
@@ -144,7 +147,7 @@ class Sentence:
         dict[NARSGUI.NARSGUI.KEY_LIST_EVIDENTIAL_BASE] = [str(evidence) for evidence in evidential_base_iterator]
         dict[NARSGUI.NARSGUI.KEY_LIST_INTERACTED_SENTENCES] = [] #todo remove
 
-        is_array = isinstance(self.statement, NALGrammar.Terms.SpatialTerm)
+        is_array = self.is_array()
 
         dict[NARSGUI.NARSGUI.KEY_IS_ARRAY] = is_array
         dict[NARSGUI.NARSGUI.KEY_ARRAY_IMAGE] = self.statement if is_array and not isinstance(self,Question) else None
@@ -303,6 +306,18 @@ def new_sentence_from_string(sentence_string: str):
 
         :returns Sentence parsed from sentence_string
     """
+    return new_sentence_from_fields(*parse_sentence_fields(sentence_string))
+
+
+def parse_sentence_fields(sentence_string: str):
+    """
+        Parse the parts of a sentence string, without creating the Sentence.
+        This needs no running NARS (no stamp is made), so it can be done in another process.
+
+        :param sentence_string - String of NAL syntax <term copula term>punctuation %frequency;confidence%
+
+        :returns (statement, punctuation, frequency, confidence, tense); frequency and confidence are None if not given
+    """
     # Find statement start and statement end
     start_idx = sentence_string.find(NALSyntax.StatementSyntax.Start.value)
     assert (start_idx != -1), "Statement start character " + NALSyntax.StatementSyntax.Start.value + " not found."
@@ -349,7 +364,13 @@ def new_sentence_from_string(sentence_string: str):
                 tense = NALSyntax.Tense.get_tense_from_string(sentence_string[tense_idx: tense_idx + len(t.value)])
                 break
 
+    return statement, punctuation, freq, conf, tense
+
 
+def new_sentence_from_fields(statement, punctuation, freq, conf, tense):
+    """
+        :returns Sentence made from the fields returned by parse_sentence_fields()
+    """
     # make sentence
     if punctuation == NALSyntax.Punctuation.Judgment:
         sentence = Judgment(statement, TruthValue(freq, conf))
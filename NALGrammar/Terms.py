@@ -4,7 +4,10 @@
     Purpose: Enforces Narsese grammar that is used throughout the project
 """
 import enum
+import hashlib
+import operator
 import re
+import zlib
 
 import numpy as np
 
@@ -122,16 +125,110 @@ def simplify(term):
     return simplified_term
 
 
+def get_stable_hash(string):
+    """
+        Hash of a string that, unlike hash() (which is salted per process), is the same in every run,
+        so orders built on structural hashes are reproducible
+    """
+    return zlib.crc32(string.encode("utf-8"))
+
+
+kind_hashes = {None: 0}  # term kind -> its stable hash
+
+
+def get_kind_hash(kind):
+    """
+        :param kind: connector, copula, or variable type of a term; None for atomic terms
+        :return: stable hash of the kind
+    """
+    kind_hash = kind_hashes.get(kind)
+    if kind_hash is None:
+        kind_hash = get_stable_hash(type(kind).__name__ + "." + kind.name)
+        kind_hashes[kind] = kind_hash
+    return kind_hash
+
+
+def sort_subterms(subterms):
+    """
+        Put the subterms of an order-invariant term in a canonical order:
+        by structural hash, then by string for the rare different subterms with the same hash,
+        so strings are not built just to sort.
+
+        :return: tuple of the sorted subterms
+    """
+    subterms = sorted(subterms, key=operator.attrgetter("structural_hash"))
+    for i in range(1, len(subterms)):
+        if subterms[i].structural_hash == subterms[i - 1].structural_hash and subterms[i] != subterms[i - 1]:
+            subterms.sort(key=lambda subterm: (subterm.structural_hash, subterm.get_term_string()))
+            break
+    return tuple(subterms)
+
+
+def unify(term1, term2, substitution=None):
+    """
+        Find a substitution for the variables of two terms that makes them the same term.
+        Variables in either term may be substituted.
+        Subterms are unified in order, so commutative compounds only unify in their stored order.
+
+        :param substitution: dict of variable term -> term already made, which is extended
+        :returns The substitution (dict of variable term -> term); None if the terms do not unify
+    """
+    if substitution is None: substitution = {}
+    while isinstance(term1, VariableTerm) and term1 in substitution: term1 = substitution[term1]
+    while isinstance(term2, VariableTerm) and term2 in substitution: term2 = substitution[term2]
+
+    if term1 == term2: return substitution
+    if isinstance(term1, VariableTerm):
+        substitution[term1] = term2
+        return substitution
+    if isinstance(term2, VariableTerm):
+        substitution[term2] = term1
+        return substitution
+
+    if not isinstance(term1, (StatementTerm, CompoundTerm)) or isinstance(term1, SpatialTerm) \
+            or term1.kind != term2.kind or len(term1.subterms) != len(term2.subterms) \
+            or not (term1.has_variable or term2.has_variable):
+        return None
+
+    for subterm1, subterm2 in zip(term1.subterms, term2.subterms):
+        if unify(subterm1, subterm2, substitution) is None: return None
+    return substitution
+
+
 class Term:
     """
         Base class for all terms.
+
+        Structural metadata is computed once, when the term is constructed, from its subterms' metadata:
+            syntactic_complexity, depth (0 for atomic terms), has_variable, is_operation, contains_operation,
+            kind (the connector, copula, or variable type; None for atomic terms),
+            and structural_hash (a hash of the kind and the subterms' structural hashes)
+
+        Terms are compared and hashed by structure. The string of a compound term is only built
+        the first time it is needed (e.g. for output), so terms derived and discarded during inference never build one.
     """
     term_id = 0
+    kind = None
+    is_operation = False
+    contains_operation = False
+
     def __init__(self,
-                 term_string):
-        assert isinstance(term_string, str), term_string + " must be a str"
-        self.string = term_string
-        self.syntactic_complexity = 0#self._calculate_syntactic_complexity()
+                 term_string=None):
+        """
+        :param term_string: the term's string; None to build it from the term's structure when first needed
+        """
+        assert term_string is None or isinstance(term_string, str), str(term_string) + " must be a str"
+        self._string = term_string
+        subterms = self.get_immediate_subterms()
+        self.syntactic_complexity = self._calculate_syntactic_complexity()
+        self.depth = 1 + max(subterm.depth for subterm in subterms) if len(subterms) > 0 else 0
+        self.has_variable = isinstance(self, VariableTerm) or any(subterm.has_variable for subterm in subterms)
+        self.structural_hash = self._calculate_structural_hash(subterms)
+
+    @property
+    def string(self):
+        if self._string is None: self._string = self._create_term_string()
+        return self._string
 
     @classmethod
     def get_next_term_ID(cls):
@@ -139,16 +236,37 @@ class Term:
         return cls.term_id
 
     def get_term_string(self):
-        return self.string
+        if self._string is None: self._string = self._create_term_string()
+        return self._string
+
+    def get_immediate_subterms(self):
+        """
+            :return: sequence of this term's immediate subterms, flattened if they are in an array
+        """
+        return ()
+
+    def _calculate_structural_hash(self, subterms):
+        if len(subterms) == 0: return get_stable_hash(self._string)  # atomic and variable terms
+        return hash((get_kind_hash(self.kind), tuple(subterm.structural_hash for subterm in subterms)))
 
     def __eq__(self, other):
         """
-            Terms are equal if their strings are the same
+            Terms are equal if they have the same structure (equivalently, if their strings are the same).
+            A term never equals a non-term, e.g. its string; compare str(term) for that
+        """
+        if self is other: return True
+        if not isinstance(other, Term): return NotImplemented
+        if self.structural_hash != other.structural_hash or self.kind != other.kind: return False
+        return self._has_same_subterms(other)
+
+    def _has_same_subterms(self, other):
+        """
+            :param other: term of the same kind and structural hash
         """
-        return str(self) == str(other)
+        return self.get_term_string() == other.get_term_string()  # atomic and variable terms
 
     def __hash__(self):
-        return hash(str(self))
+        return self.structural_hash
 
     def __str__(self):
         return self.get_term_string()
@@ -160,8 +278,7 @@ class Term:
         return False
 
     def contains_variable(self):
-        return VariableTerm.VARIABLE_SYM in str(self) \
-               or VariableTerm.QUERY_SYM in str(self)
+        return self.has_variable
 
 
 class VariableTerm(Term):
@@ -186,6 +303,7 @@ class VariableTerm(Term):
         # todo parse variable terms from input strings
         self.variable_name = variable_name
         self.variable_type = variable_type
+        self.kind = variable_type
         self.variable_symbol = VariableTerm.QUERY_SYM if variable_type == VariableTerm.Type.Query else VariableTerm.VARIABLE_SYM
         self.dependency_list = dependency_list
         super().__init__(self._create_term_string())
@@ -222,7 +340,6 @@ class VariableTerm(Term):
         return cls(variable_name, type, dependency_list)
 
     def _calculate_syntactic_complexity(self):
-        if self.syntactic_complexity is not None: return self.syntactic_complexity
         if self.dependency_list is None:
             return 1
         else:
@@ -265,7 +382,8 @@ class CompoundTerm(Term):
                  intervals=None):
         """
         Input:
-            subterms: array of immediate subterms
+            subterms: sequence of immediate subterms, stored as a tuple;
+                        or a 2D NumPy array of them, for a SpatialTerm
 
             term_connector: subterm connector (can be first-order or higher-order).
                             sets are represented with the opening bracket as the connector, { or [
@@ -274,7 +392,10 @@ class CompoundTerm(Term):
         """
         assert term_connector is not None,"ERROR: A compound term needs a term connector."
 
-        self.subterms: [Term] = np.array(subterms)
+        if isinstance(subterms, np.ndarray):
+            self.subterms = subterms  # spatial array (see SpatialTerm)
+        else:
+            self.subterms: (Term) = tuple(subterms)
         self.connector = term_connector
         self.intervals = []
 
@@ -297,8 +418,8 @@ class CompoundTerm(Term):
 
             # decide if we need to maintain the ordering
             if NALSyntax.TermConnector.is_order_invariant(term_connector):
-                # order doesn't matter, alphabetize so the system can recognize the same term
-                subterms.sort(key=lambda t: str(t))
+                # order doesn't matter, sort so the system can recognize the same term
+                self.subterms = sort_subterms(self.subterms)
 
             # check if it's a set
             is_extensional_set = (term_connector == NALSyntax.TermConnector.ExtensionalSetStart)
@@ -310,14 +431,14 @@ class CompoundTerm(Term):
                 # todo handle multi-component sets better
                 singleton_set_subterms = []
 
-                for subterm in subterms:
+                for subterm in self.subterms:
                     # decompose the set into an intersection of singleton sets
                     singleton_set_subterm = CompoundTerm(subterms=[subterm],
                                                          term_connector=NALSyntax.TermConnector.get_set_end_connector_from_set_start_connector(term_connector))
 
                     singleton_set_subterms.append(singleton_set_subterm)
 
-                self.subterms = singleton_set_subterms
+                self.subterms = tuple(singleton_set_subterms)
 
                 # set new term connector as intersection
                 if is_extensional_set:
@@ -325,21 +446,28 @@ class CompoundTerm(Term):
                 elif is_intensional_set:
                     self.connector = NALSyntax.TermConnector.ExtensionalIntersection
 
+        self.kind = self.connector
+        self.first_order = NALSyntax.TermConnector.is_first_order(self.connector)
+
         # store if this is an operation (meaning all of its components are)
-        self.is_operation = True
-        for i, subterm in np.ndenumerate(self.subterms):
-            self.is_operation = self.is_operation and subterm.is_op()
+        subterms = self.get_immediate_subterms()
+        self.is_operation = all(subterm.is_operation for subterm in subterms)
+        self.contains_operation = any(subterm.is_operation for subterm in subterms)
+
+        Term.__init__(self)
 
-        Term.__init__(self, term_string=self._create_term_string())
+    def get_immediate_subterms(self):
+        return self.subterms.ravel() if isinstance(self.subterms, np.ndarray) else self.subterms
+
+    def _has_same_subterms(self, other):
+        if isinstance(other, SpatialTerm): return False  # SpatialTerm compares itself by its digest
+        return self.subterms == other.subterms
 
     def is_op(self):
         return self.is_operation
 
     def contains_op(self):
-        for subterm in self.subterms:
-            if subterm.is_op():
-                return True
-        return False
+        return self.contains_operation
 
     def contains_positive(self):
         for subterm in self.subterms:
@@ -349,7 +477,7 @@ class CompoundTerm(Term):
         return False
 
     def is_first_order(self):
-        return NALSyntax.TermConnector.is_first_order(self.connector)
+        return self.first_order
 
     def is_intensional_set(self):
         return self.connector == NALSyntax.TermConnector.IntensionalSetStart
@@ -364,41 +492,27 @@ class CompoundTerm(Term):
         return None #self.string_with_interval
 
     def _create_term_string_with_interval(self):
-        if self.is_set():
-            string = self.connector.value
-        else:
-            string = self.connector.value + NALSyntax.StatementSyntax.TermDivider.value
-
+        parts = []
         for i in range(len(self.subterms)):
-            subterm = self.subterms[i]
-            string += subterm.get_term_string() + NALSyntax.StatementSyntax.TermDivider.value
+            parts.append(self.subterms[i].get_term_string())
             if self.connector == NALSyntax.TermConnector.SequentialConjunction and i < len(self.intervals):
-                string = string + str(self.intervals[i]) + NALSyntax.StatementSyntax.TermDivider.value
-
-        string = string[:-1]  # remove the final term divider
-
-        if self.is_set():
-            return string + NALSyntax.TermConnector.get_set_end_connector_from_set_start_connector(self.connector).value
-        else:
-            return NALSyntax.StatementSyntax.Start.value + string + NALSyntax.StatementSyntax.End.value
+                parts.append(str(self.intervals[i]))
+        return self._wrap_subterm_strings(parts)
 
     def _create_term_string(self):
-        if self.is_set():
-            string = self.connector.value
-        else:
-            string = self.connector.value + NALSyntax.StatementSyntax.TermDivider.value
-
-        for i in range(len(self.subterms)):
-            subterm = self.subterms[i]
-            string = string + subterm.get_term_string() + NALSyntax.StatementSyntax.TermDivider.value
-
-        string = string[:-1]  # remove the final term divider
+        return self._wrap_subterm_strings([subterm.get_term_string() for subterm in self.subterms])
 
+    def _wrap_subterm_strings(self, parts):
+        """
+            Join the strings of the subterms (and intervals) inside the connector and parentheses, or set brackets.
+        """
+        joined_string = NALSyntax.StatementSyntax.TermDivider.value.join(parts)
         if self.is_set():
-            return string + NALSyntax.TermConnector.get_set_end_connector_from_set_start_connector(
-                self.connector).value
+            return self.connector.value + joined_string \
+                   + NALSyntax.TermConnector.get_set_end_connector_from_set_start_connector(self.connector).value
         else:
-            return NALSyntax.StatementSyntax.Start.value + string + NALSyntax.StatementSyntax.End.value
+            return NALSyntax.StatementSyntax.Start.value + self.connector.value \
+                   + NALSyntax.StatementSyntax.TermDivider.value + joined_string + NALSyntax.StatementSyntax.End.value
 
     def _calculate_syntactic_complexity(self):
         """
@@ -406,12 +520,11 @@ class CompoundTerm(Term):
             the compound term. The connector adds 1 complexity,
             and the subterms syntactic complexities are summed as well.
         """
-        if self.syntactic_complexity is not None: return self.syntactic_complexity
         count = 0
         if self.connector is not None:
             count = 1  # the term connector
-        for i, subterm in np.ndenumerate(self.subterms):
-            count = count + subterm._calculate_syntactic_complexity()
+        for subterm in self.get_immediate_subterms():
+            count = count + subterm.syntactic_complexity
         return count
 
     @classmethod
@@ -514,18 +627,22 @@ class StatementTerm(Term):
         Asserts.assert_term(predicate_term)
 
         self.connector = None
-        self.subterms = [subject_term, predicate_term]
+        self.subterms = (subject_term, predicate_term)
         self.interval = interval
 
         self.copula = None
         if copula is not None:
             self.copula = copula
             if NALSyntax.Copula.is_symmetric(copula):
-                self.subterms.sort(key=lambda t: str(t))  # sort alphabetically
+                self.subterms = sort_subterms(self.subterms)
 
+        self.kind = self.copula
+        self.first_order = NALSyntax.Copula.is_first_order(self.copula)
         self.is_operation = self.calculate_is_operation()
+        self.contains_operation = self.is_operation or \
+                                  (not self.first_order and (subject_term.contains_operation or predicate_term.contains_operation))
 
-        Term.__init__(self, term_string=self._create_term_string())
+        Term.__init__(self)
 
     @classmethod
     def from_string(cls, statement_string):
@@ -562,13 +679,18 @@ class StatementTerm(Term):
             the compound term. The connector adds 1 complexity,
             and the subterms syntactic complexities are summed as well.
         """
-        if self.syntactic_complexity is not None: return self.syntactic_complexity
         count = 1  # the copula
         for subterm in self.subterms:
-            count = count + subterm._calculate_syntactic_complexity()
+            count = count + subterm.syntactic_complexity
 
         return count
 
+    def get_immediate_subterms(self):
+        return self.subterms
+
+    def _has_same_subterms(self, other):
+        return self.subterms == other.subterms
+
     def get_subject_term(self):
         return self.subterms[0]
 
@@ -621,35 +743,26 @@ class StatementTerm(Term):
 
             returns: (Subject copula Predicate)
         """
-        string = NALSyntax.StatementSyntax.Start.value + \
-                 self.get_subject_term().get_term_string()
-
-        string += " " + self.get_copula_string() + " "
-
-        string += self.get_predicate_term().get_term_string() + \
-                  NALSyntax.StatementSyntax.End.value
-
-        return string
+        return "".join((NALSyntax.StatementSyntax.Start.value,
+                        self.get_subject_term().get_term_string(),
+                        " ", self.get_copula_string(), " ",
+                        self.get_predicate_term().get_term_string(),
+                        NALSyntax.StatementSyntax.End.value))
 
     def contains_op(self):
-        contains = self.is_op()
-        if not self.is_first_order():
-            contains = contains or \
-                       self.get_subject_term().contains_op() or \
-                       self.get_predicate_term().contains_op()
-        return contains
+        return self.contains_operation
 
     def is_op(self):
         return self.is_operation
 
     def calculate_is_operation(self):
-        return isinstance(self.get_subject_term(), CompoundTerm) \
-               and self.get_subject_term().connector == NALSyntax.TermConnector.Product \
-               and self.get_subject_term().subterms[
-                   0] == Global.Global.TERM_SELF  # product and first term is self means this is an operation
+        subject_term = self.get_subject_term()
+        return subject_term.kind == NALSyntax.TermConnector.Product \
+               and Global.Global.TERM_SELF is not None \
+               and subject_term.subterms[0] == Global.Global.TERM_SELF  # product and first term is self means this is an operation
 
     def is_first_order(self):
-        return NALSyntax.Copula.is_first_order(self.copula)
+        return self.first_order
 
     def is_symmetric(self):
         return NALSyntax.Copula.is_symmetric(self.copula)
@@ -673,7 +786,11 @@ class StatementTerm(Term):
 class SpatialTerm(CompoundTerm):
     """
         Higher-order Compound with a spatial component.
+
+        Identified by a fixed-size content digest of its shape and its elements' structural hashes,
+        so array terms are hashed and compared in O(1) instead of by their (kilobytes long) strings.
     """
+    DIGEST_SIZE = 16  # bytes
 
     def __init__(self,
                  spatial_subterms,
@@ -692,14 +809,28 @@ class SpatialTerm(CompoundTerm):
                               term_connector=connector)
         # self.subterms = None
 
+    def _calculate_structural_hash(self, subterms):
+        """
+            Digest the shape and the elements' cached structural hashes (an element that is itself
+            a SpatialTerm contributes its own digest, through its structural hash).
+        """
+        digest = hashlib.blake2b(digest_size=SpatialTerm.DIGEST_SIZE)
+        digest.update(np.array(self.subterms.shape + (get_kind_hash(self.kind),), dtype=np.int64).tobytes())
+        digest.update(np.fromiter((subterm.structural_hash for subterm in subterms),
+                                  dtype=np.int64, count=len(subterms)).tobytes())
+        self.content_digest = digest.digest()
+        return int.from_bytes(self.content_digest[:8], "little", signed=True)
+
+    def _has_same_subterms(self, other):
+        return isinstance(other, SpatialTerm) and self.content_digest == other.content_digest
+
     def _create_term_string(self):
         """
 
         :return:
         """
-        string = ''
-        for indices, element_term in np.ndenumerate(self.subterms):
-            string += str(indices[0]) + str(element_term) + str(indices[1]) + '_'
+        string = "".join([str(y) + element_term.get_term_string() + str(x) + "_"
+                          for (y, x), element_term in np.ndenumerate(self.subterms)])
 
         return NALSyntax.StatementSyntax.Start.value \
                 + self.connector.value \
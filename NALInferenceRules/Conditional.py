@@ -167,22 +167,23 @@ def SimplifyConjunctiveGoal(j1, j2):
         Returns:
             :- S! <f3, c3> (S ==> D)
     """
-    remaining_subterms = j1.statement.subterms.copy()
-    found_idx = np.where(remaining_subterms == j2.statement)
+    remaining_subterms = list(j1.statement.subterms)
 
-    assert found_idx != -1, "Error: Invalid inputs to Simplify conjuctive goal (deduction): " \
+    assert j2.statement in remaining_subterms, "Error: Invalid inputs to Simplify conjuctive goal (deduction): " \
                     + j1.get_formatted_string() \
                     + " and " \
                     + j2.get_formatted_string()
 
-    remaining_subterms = np.delete(remaining_subterms, found_idx)
+    found_idx = remaining_subterms.index(j2.statement)
+    remaining_subterms.pop(found_idx)
 
     if len(remaining_subterms) == 1:
         result_statement = remaining_subterms[0]
     else:
         new_intervals = []
         if len(j1.statement.intervals) > 0:
-            new_intervals = j1.statement.intervals.copy().pop(found_idx)
+            new_intervals = list(j1.statement.intervals)
+            new_intervals.pop(min(found_idx, len(new_intervals) - 1))
         result_statement = NALGrammar.Terms.CompoundTerm(subterms=remaining_subterms,
                                                          term_connector=j1.statement.connector,
                                                          intervals=new_intervals)
@@ -206,14 +207,14 @@ def SimplifyNegatedConjunctiveGoal(j1, j2):
         Returns:
             :- B! <f3, c3> (B ==> D)
     """
-    remaining_subterms = j1.statement.subterms[0].subterms.copy()
-    found_idx = np.where(remaining_subterms == j2.statement)
+    remaining_subterms = list(j1.statement.subterms[0].subterms)
 
-    assert found_idx != -1, "Error: Invalid inputs to Simplify negated conjuctive goal (induction): " \
+    assert j2.statement in remaining_subterms, "Error: Invalid inputs to Simplify negated conjuctive goal (induction): " \
                     + j1.get_formatted_string() \
                     + " and " \
                     + j2.get_formatted_string()
 
+    found_idx = remaining_subterms.index(j2.statement)
     remaining_subterms.pop(found_idx)
 
     if len(remaining_subterms) == 1:
@@ -223,7 +224,8 @@ def SimplifyNegatedConjunctiveGoal(j1, j2):
     else:
         new_intervals = []
         if len(j1.statement.intervals) > 0:
-            new_intervals = j1.statement.intervals.copy().pop(found_idx)
+            new_intervals = list(j1.statement.intervals)
+            new_intervals.pop(min(found_idx, len(new_intervals) - 1))
         result_statement = NALGrammar.Terms.CompoundTerm(subterms=remaining_subterms,
                                                          term_connector=j1.statement.connector,
                                                          intervals=new_intervals)
@@ -275,7 +277,7 @@ def ConditionalConjunctionalDeduction(j1, j2):
     else:
         # 0 new subterms
         if len(subject_term.subterms) > 1:
-            new_subterms = subject_term.subterms.copy()
+            new_subterms = list(subject_term.subterms)
             new_subterms.pop()
             new_compound_subject_term = NALGrammar.Terms.CompoundTerm(new_subterms, subject_term.connector)
         else:
@@ -36,7 +36,7 @@ def Revision(j1, j2):
     Asserts.assert_sentence(j1)
     Asserts.assert_sentence(j2)
     assert (
-            j1.statement.get_term_string() == j2.statement.get_term_string()), "Cannot revise sentences for 2 different statements"
+            j1.statement == j2.statement), "Cannot revise sentences for 2 different statements"
 
     if isinstance(j1.statement, NALGrammar.Terms.CompoundTerm) \
             and j1.statement.connector == NALSyntax.TermConnector.SequentialConjunction:
@@ -2,7 +2,6 @@ import cProfile
 import pstats
 from io import StringIO
 
-import dill as pickle
 import random
 import sys
 import timeit
@@ -14,9 +13,11 @@ import InputChannel
 import NALInferenceRules
 import NARSGUI
 import NARSInferenceEngine
+import NARSInstrumentation
 import NALGrammar
 import NALSyntax
 import NARSMemory
+import NARSPersistence
 
 import NARSDataStructures.Buffers
 import NARSDataStructures.Other
@@ -39,23 +40,30 @@ class NARS:
     """
        NARS Class
     """
+    OPERATION_GROUP = "operation"  # scheduler group of queued operations
 
-    def __init__(self):
+    def __init__(self, seed=None):
+        """
+        :param seed: seed of the random number generator that all of this reasoner's stochastic data structures draw from,
+            so runs can be reproduced. Config.RANDOM_SEED by default; if that is None, the seed is random
+        """
         if Config.USE_PROFILER:
             self.pr = cProfile.Profile()
             self.pr.enable()
         self.current_cycle_number = 0
         self.prev_take_time = -1
 
-        self.memory = NARSMemory.Memory()
+        self.rng = random.Random(Config.RANDOM_SEED if seed is None else seed)
+        self.memory = NARSMemory.Memory(rng=self.rng)
         self.global_buffer = NARSDataStructures.Buffers.Buffer(item_type=NARSDataStructures.Other.Task,
                                                                capacity=Config.GLOBAL_BUFFER_CAPACITY)
-        self.vision_buffer = NARSDataStructures.Buffers.SpatialBuffer(dimensions=Config.VISION_DIMENSIONS)
+        self.vision_buffer = NARSDataStructures.Buffers.SpatialBuffer(dimensions=Config.VISION_DIMENSIONS, rng=self.rng)
+        self.instrumentation = NARSInstrumentation.Instrumentation(self)
+        self.scheduler = NARSDataStructures.Other.Scheduler()  # queued operations and anticipation deadlines, by due cycle
         self.temporal_module = NARSDataStructures.Buffers.TemporalModule(self,item_type=NARSDataStructures.Other.Task,
                                                                          capacity=Config.EVENT_BUFFER_CAPACITY)
 
 
-        self.operation_queue = [] # operations the system has queued to executed
         self.last_executed = ''
         self.current_operation_goal_sequence = None
 
@@ -75,6 +83,13 @@ class NARS:
         Global.Global.ARRAY_NEGATIVE_SENTENCE = NALGrammar.Sentences.Judgment(statement=Global.Global.ARRAY_NEGATIVE_ELEMENT,
                                                      value=NALGrammar.Values.TruthValue(frequency=1.0))
 
+        # persistence
+        self.write_ahead_log = None
+        self.server = None  # NARSServer for network clients, if one is running
+        self.question_subscriptions = NARSDataStructures.Other.QuestionSubscriptions()
+        if Config.WRITE_AHEAD_LOG_ENABLED: self.start_write_ahead_log()
+        if Config.KNOWLEDGE_BASE_PATH != "": self.memory.attach_knowledge_base(Config.KNOWLEDGE_BASE_PATH)
+
 
     def startup_and_run(self):
         self.run()
@@ -120,8 +135,12 @@ class NARS:
         if len(self.global_buffer) > Config.GLOBAL_BUFFER_CAPACITY / 4.0: print("WARNING: GLOBAL BUFFER AT 1/4 CAPACITY "
                                                                                 + str(len(self.global_buffer) / Config.GLOBAL_BUFFER_CAPACITY) + "%")
 
+        instrumentation = self.instrumentation
+        instrumentation.start_cycle()
+
         # process input channel and temporal module
         InputChannel.process_input_channel()
+        instrumentation.end_phase(NARSInstrumentation.Instrumentation.PHASE_INPUT_CHANNEL)
 
         # global buffer
         while len(self.global_buffer) > 0:
@@ -129,6 +148,7 @@ class NARS:
             task_item = self.global_buffer.take()
             task: NARSDataStructures.Task = task_item.object
             self.process_task(task)
+            instrumentation.number_of_tasks_processed += 1
             task_sentence: Sentence = task.sentence
             if isinstance(task_sentence, NALGrammar.Sentences.Judgment) and len(self.vision_buffer.events_bag) > 0:
                 # make associations with a vision event and narsese event
@@ -142,6 +162,8 @@ class NARS:
                                                        NALInferenceRules.ExtendedBooleanOperators.band_average(vision_event.value.confidence, task_sentence.value.confidence)),
                                       occurrence_time=None)
                     self.process_judgment_sentence_initial(learned_implication)
+                    instrumentation.number_of_derivations += 1
+        instrumentation.end_phase(NARSInstrumentation.Instrumentation.PHASE_GLOBAL_BUFFER)
 
         # Consider, special for vision tests
 
@@ -152,28 +174,38 @@ class NARS:
             if isinstance(term, NALGrammar.Terms.StatementTerm) and (not term.is_first_order()):
                 j1: Judgment = concept.belief_table.peek()
                 j2: Judgment = self.memory.peek_concept(term.get_subject_term()).belief_table.peek()
-                result = ConditionalJudgmentDeduction(j1, j2)
-                result.stamp.occurrence_time = Global.Global.get_current_cycle_number()
-                self.process_judgment_sentence_initial(result)
+                if j1 is not None and j2 is not None:  # the subject may never have been believed, e.g. a chained conjunction
+                    result = ConditionalJudgmentDeduction(j1, j2)
+                    result.stamp.occurrence_time = Global.Global.get_current_cycle_number()
+                    self.process_judgment_sentence_initial(result)
+                    instrumentation.number_of_derivations += 1
 
 
         # probabilistically consider a concept
         #self.Consider()
+        instrumentation.end_phase(NARSInstrumentation.Instrumentation.PHASE_CONSIDER)
 
         # now execute operations
         self.execute_operation_queue()
+        instrumentation.end_phase(NARSInstrumentation.Instrumentation.PHASE_OPERATIONS)
 
         # debug statements
         if Config.DEBUG:
-            Global.Global.debug_print("operation queue: " + str(len(self.operation_queue)))
-            Global.Global.debug_print("anticipations queue: " + str(len(self.temporal_module.anticipations_queue)))
+            Global.Global.debug_print("operation queue: " + str(self.scheduler.count(NARS.OPERATION_GROUP)))
+            Global.Global.debug_print("anticipations queue: " + str(self.scheduler.count(NARSDataStructures.Buffers.TemporalModule.ANTICIPATION_GROUP)))
             Global.Global.debug_print("global buffer: " + str(len(self.global_buffer)))
 
 
-        if Config.USE_PROFILER:
+        # fold the write-ahead log into a new snapshot once it grows too large
+        if self.write_ahead_log is not None and len(self.write_ahead_log) > Config.WRITE_AHEAD_LOG_COMPACTION_SIZE:
+            self.compact_write_ahead_log()
+
+        if Config.USE_PROFILER and self.current_cycle_number % Config.PROFILER_PRINT_INTERVAL == 0:
             pstats.Stats(self.pr).sort_stats('tottime').print_stats(10) #tottime is time spent in the function alone, cumtime is including subfunctions
             self.pr.enable()
 
+        instrumentation.end_cycle()
+
 
     def do_working_cycles(self, cycles: int):
         """
@@ -214,7 +246,7 @@ class NARS:
             and not ((isinstance(concept.term, NALGrammar.Terms.StatementTerm) or
                      (isinstance(concept.term,NALGrammar.Terms.CompoundTerm) and not concept.term.is_first_order()))):
             if len(concept.term_links) > 0:
-                concept = concept.term_links.peek().object
+                concept = concept.term_links.peek()
             else:
                 break
 
@@ -248,42 +280,82 @@ class NARS:
 
     def save_memory_to_disk(self, filename="memory1.nars"):
         """
-            Save the NARS Memory instance to disk
+            Save the NARS Memory instance to disk, as a stream of flat concept records
         """
-        old_limit = sys.getrecursionlimit()
-        sys.setrecursionlimit(old_limit*2)
-        with open(filename, "wb") as f:
-            Global.Global.print_to_output("SAVING SYSTEM MEMORY TO FILE: " + filename)
-            try:
-                pickle.dump(self.memory, f, pickle.HIGHEST_PROTOCOL)
-                Global.Global.print_to_output("SAVE MEMORY SUCCESS")
-            except:
-                Global.Global.print_to_output("SAVE MEMORY FAILURE")
-        sys.setrecursionlimit(old_limit)
+        Global.Global.print_to_output("SAVING SYSTEM MEMORY TO FILE: " + filename)
+        try:
+            start_time = timeit.default_timer()
+            count = NARSPersistence.save_memory_snapshot(self.memory, filename,
+                                                         current_cycle_number=self.current_cycle_number)
+            Global.Global.print_to_output("SAVE MEMORY SUCCESS: " + str(count) + " concepts in "
+                                          + "{:.2f}".format(timeit.default_timer() - start_time) + "s")
+        except Exception as error:
+            Global.Global.print_to_output("SAVE MEMORY FAILURE: " + repr(error))
 
     def load_memory_from_disk(self, filename="memory1.nars"):
         """
-            Load a NARS Memory instance from disk.
+            Load a NARS Memory snapshot from disk.
             This will override the NARS' current memory
         """
+        Global.Global.print_to_output("LOADING SYSTEM MEMORY FILE: " + filename)
+        old_memory = self.memory
         try:
-            with open(filename, "rb") as f:
-                Global.Global.print_to_output("LOADING SYSTEM MEMORY FILE: " + filename)
-                # load memory from file
-                self.memory = pickle.load(f)
-                # Print memory contents to internal data GUI
-                if Config.GUI_USE_INTERFACE:
-                    Global.Global.clear_output_gui(data_structure=self.memory.concepts_bag)
-                    for item in self.memory.concepts_bag:
-                        if item not in self.memory.concepts_bag:
-                            Global.Global.print_to_output(msg=str(item), data_structure=self.memory.concepts_bag)
-
-                if Config.GUI_USE_INTERFACE:
-                    NARSGUI.NARSGUI.gui_total_cycles_stringvar.set("Cycle #" + str(self.current_cycle_number))
-
-                Global.Global.print_to_output("LOAD MEMORY SUCCESS")
-        except:
-            Global.Global.print_to_output("LOAD MEMORY FAIL")
+            start_time = timeit.default_timer()
+            # sentences created while loading take their stamp IDs from the active memory
+            self.memory = NARSMemory.Memory(rng=self.rng)
+            _, header, skipped = NARSPersistence.load_memory_snapshot(filename, memory=self.memory)
+            self.memory.knowledge_base = old_memory.knowledge_base  # after loading, so stored beliefs are not promoted twice
+            self.current_cycle_number = max(self.current_cycle_number, header["current_cycle_number"])
+
+            # Print memory contents to internal data GUI
+            if Config.GUI_USE_INTERFACE:
+                Global.Global.clear_output_gui(data_structure=self.memory.concepts_bag)
+                for item in self.memory.concepts_bag:
+                    Global.Global.print_to_output(msg=str(item), data_structure=self.memory.concepts_bag)
+                NARSGUI.NARSGUI.gui_total_cycles_stringvar.set("Cycle #" + str(self.current_cycle_number))
+
+            if self.write_ahead_log is not None:
+                # the log extended the old memory, so restart it from the loaded one
+                self.memory.write_ahead_log = self.write_ahead_log
+                self.compact_write_ahead_log()
+
+            Global.Global.print_to_output("LOAD MEMORY SUCCESS: " + str(len(self.memory)) + " concepts in "
+                                          + "{:.2f}".format(timeit.default_timer() - start_time) + "s"
+                                          + (" (" + str(skipped) + " skipped)" if skipped > 0 else ""))
+        except Exception as error:
+            self.memory = old_memory
+            Global.Global.print_to_output("LOAD MEMORY FAIL: " + repr(error))
+
+    def start_write_ahead_log(self):
+        """
+            Rebuild memory from the last snapshot and the write-ahead log on top of it,
+            then record every further memory change in the log.
+        """
+        self.memory = NARSMemory.Memory(rng=self.rng)
+        generation, cycle_number = NARSPersistence.recover_memory(self.memory,
+                                                                  snapshot_filename=Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME,
+                                                                  log_filename=Config.WRITE_AHEAD_LOG_FILENAME)
+        self.current_cycle_number = max(self.current_cycle_number, cycle_number)
+        self.memory.peek_concept(Global.Global.TERM_SELF)
+
+        self.write_ahead_log = NARSPersistence.WriteAheadLog(Config.WRITE_AHEAD_LOG_FILENAME,
+                                                             fsync_batch_size=Config.WRITE_AHEAD_LOG_FSYNC_BATCH_SIZE)
+        if self.write_ahead_log.generation != generation:
+            # stale log, its changes are already part of the snapshot
+            self.write_ahead_log.truncate(generation)
+        self.memory.write_ahead_log = self.write_ahead_log
+
+        Global.Global.print_to_output("RECOVERED MEMORY: " + str(len(self.memory)) + " concepts")
+
+    def compact_write_ahead_log(self):
+        """
+            Save memory to a new snapshot and empty the write-ahead log
+        """
+        NARSPersistence.compact_write_ahead_log(self.memory,
+                                                self.write_ahead_log,
+                                                snapshot_filename=Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME,
+                                                current_cycle_number=self.current_cycle_number)
+        Global.Global.debug_print("Compacted write-ahead log into " + Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME)
 
     def handle_gui_pipes(self):
         if Global.Global.NARS_object_pipe is None: return
@@ -304,7 +376,7 @@ class NARS:
                 elif data_structure_id == str(self.memory.concepts_bag):
                     data_structure = self.memory.concepts_bag
                     if data_structure is not None:
-                        item: NARSDataStructures.ItemContainers.Item = data_structure.peek(key)
+                        item: NARSDataStructures.ItemContainers.Item = self.memory.peek_existing_concept_item(NALGrammar.Terms.from_string(key))
                         if item is None:
                             Global.Global.NARS_object_pipe.send(None)
                         else:
@@ -355,7 +427,7 @@ class NARS:
 
 
             if command == "userinput":
-                InputChannel.parse_and_queue_input_string(data)
+                InputChannel.parse_and_queue_input_string(data, source=InputChannel.SOURCE_GUI)
             elif command == "visualimage":
                 # user loaded image for visual input
                 img = data
@@ -363,7 +435,7 @@ class NARS:
             elif command == "visualimagelabel":
                 # user loaded image for visual input
                 label = data
-                InputChannel.parse_and_queue_input_string("(" + label + "--> SEEN). :|:")
+                InputChannel.parse_and_queue_input_string("(" + label + "--> SEEN). :|:", source=InputChannel.SOURCE_GUI)
             elif command == "duration":
                 Config.TAU_WORKING_CYCLE_DURATION = data
             elif command == "paused":
@@ -378,7 +450,9 @@ class NARS:
 
         j = task.sentence
         task_statement_term = j.statement
-        if task_statement_term.contains_variable(): return  # todo handle variables
+        if task_statement_term.contains_variable():
+            if isinstance(j, NALGrammar.Sentences.Question): self.process_variable_question_task(task)
+            return  # todo handle variables in judgments and goals
 
         # statement_concept_item = self.memory.peek_concept_item(task_statement_term)
         # statement_concept = statement_concept_item.object
@@ -423,12 +497,19 @@ class NARS:
         self.process_judgment_sentence(current_belief)
 
 
-    def process_judgment_sentence_initial(self, j: Judgment):
+    def process_judgment_sentence_initial(self, j: Judgment, statement_concept_item=None):
+        """
+            Put a new Judgment into its statement concept's belief table
+
+            :param j: Judgment
+            :param statement_concept_item: memory Item of the statement's concept, if the caller already has it
+        """
         if isinstance(j.statement, NALGrammar.Terms.CompoundTerm) \
                 and j.statement.connector == NALSyntax.TermConnector.Negation:
             j = NALInferenceRules.Immediate.Negation(j)
+            statement_concept_item = None
 
-        statement_concept_item = self.memory.peek_concept_item(j.statement)
+        if statement_concept_item is None: statement_concept_item = self.memory.peek_concept_item(j.statement)
         if statement_concept_item is None: return
 
         #self.memory.concepts_bag.strengthen_item_quality(task_statement_concept_item.key)
@@ -447,6 +528,13 @@ class NARS:
         else:
             self.memory.concepts_bag.change_priority(key=statement_concept_item.key,new_priority=best_belief.get_expectation())
 
+        if self.write_ahead_log is not None:
+            self.write_ahead_log.log_sentence(j)
+            self.write_ahead_log.log_priority_change(j.statement, statement_concept_item.budget.get_priority())
+
+        if self.question_subscriptions.is_watched(j.statement):
+            self.question_subscriptions.notify(j.statement, best_belief)
+
         if Config.DEBUG:
             string = "Integrated new BELIEF: " + j.get_formatted_string() + "from "
             for premise in j.stamp.parent_premises:
@@ -454,6 +542,24 @@ class NARS:
             Global.Global.debug_print(string)
 
 
+    def subscribe_to_question(self, statement, callback):
+        """
+            Ask a standing question: the callback is given the best answer known now (if any),
+            then every better answer as beliefs about the statement improve.
+
+            :param statement: statement term of the question
+            :param callback: called with each better answer Judgment, e.g. a queue's put method
+            :return: subscription, for unsubscribe_from_question()
+        """
+        subscription = self.question_subscriptions.subscribe(statement, callback)
+        statement_concept_item = self.memory.peek_existing_concept_item(statement)
+        if statement_concept_item is not None and len(statement_concept_item.object.belief_table) > 0:
+            self.question_subscriptions.notify(statement, statement_concept_item.object.belief_table.peek_max())
+        return subscription
+
+    def unsubscribe_from_question(self, statement, subscription):
+        self.question_subscriptions.unsubscribe(statement, subscription)
+
     def process_judgment_sentence(self, j1: NALGrammar.Sentences.Judgment, revise=True):
         """
             Continued processing for Judgment
@@ -469,6 +575,7 @@ class NARS:
 
         # do regular semantic inference
         results = self.process_sentence_semantic_inference(j1)
+        self.instrumentation.number_of_derivations += len(results)
         for result in results:
             self.global_buffer.PUT_NEW(NARSDataStructures.Other.Task(result))
 
@@ -499,7 +606,9 @@ class NARS:
             # Answer the question
             #
             if task.is_from_input and task.needs_to_be_answered_in_output:
-                Global.Global.print_to_output("OUT: " + best_answer.get_formatted_string())
+                answer_string = "OUT: " + best_answer.get_formatted_string()
+                Global.Global.print_to_output(answer_string)
+                if self.server is not None: self.server.send(answer_string, origin=task.origin)
                 task.needs_to_be_answered_in_output = False
 
             # do inference between answer and a related belief
@@ -511,6 +620,26 @@ class NARS:
         self.process_sentence_semantic_inference(j1)
 
 
+    def process_variable_question_task(self, task):
+        """
+            Process a Narsese question task whose statement contains variables, e.g. (?x --> bird)?
+
+            Answer it with the best belief among the concepts whose terms unify with the statement.
+        """
+        Asserts.assert_task(task)
+
+        best_answer = None
+        for concept in self.memory.get_unifiable_concepts(task.sentence.statement):
+            belief = concept.belief_table.peek_max()
+            if belief is None: continue
+            best_answer = belief if best_answer is None else NALInferenceRules.Local.Choice(best_answer, belief)
+
+        if best_answer is not None and task.is_from_input and task.needs_to_be_answered_in_output:
+            answer_string = "OUT: " + best_answer.get_formatted_string()
+            Global.Global.print_to_output(answer_string)
+            if self.server is not None: self.server.send(answer_string, origin=task.origin)
+            task.needs_to_be_answered_in_output = False
+
     def process_goal_task(self, task: NARSDataStructures.Other.Task):
         """
             Processes a Narsese Goal Task
@@ -526,12 +655,16 @@ class NARS:
 
             Insert it into the desire table or revise with the most confident desire
         """
-        task_statement_concept = self.memory.peek_concept(j.statement)
-        self.memory.concepts_bag.change_quality(j.statement,
+        task_statement_concept_item = self.memory.peek_concept_item(j.statement)
+        self.memory.concepts_bag.change_quality(task_statement_concept_item.key,
                                                 new_quality=0.999)
+        if self.write_ahead_log is not None:
+            self.write_ahead_log.log_quality_change(j.statement, task_statement_concept_item.budget.get_quality())
+        task_statement_concept = task_statement_concept_item.object
 
         # store the most confident desire
         task_statement_concept.desire_table.put(j)
+        if self.write_ahead_log is not None: self.write_ahead_log.log_sentence(j)
 
         current_desire = task_statement_concept.desire_table.peek()
 
@@ -600,6 +733,7 @@ class NARS:
                     if belief is not None and belief.is_positive():
                         # the first component of the goal is positive, do inference and derive the remaining goal component
                         results = NARSInferenceEngine.do_semantic_inference_two_premise(j, belief)
+                        self.instrumentation.number_of_derivations += len(results)
                         for result in results:
                             self.global_buffer.PUT_NEW(NARSDataStructures.Other.Task(result))
                         return # done deriving goals
@@ -618,6 +752,7 @@ class NARS:
                     if belief is not None and belief.is_positive():
                         # the first component of the goal is negative, do inference and derive the remaining goal component
                         results = NARSInferenceEngine.do_semantic_inference_two_premise(j, belief)
+                        self.instrumentation.number_of_derivations += len(results)
                         for result in results:
                             self.global_buffer.PUT_NEW(NARSDataStructures.Other.Task(result))
 
@@ -676,7 +811,7 @@ class NARS:
 
             if isinstance(statement_term, NALGrammar.Terms.CompoundTerm):
                 if len(statement_concept.prediction_links) > 0:
-                    related_concept = statement_concept.prediction_links.peek().object
+                    related_concept = statement_concept.prediction_links.peek()
             elif isinstance(statement_term, NALGrammar.Terms.StatementTerm) \
                     and not statement_term.is_first_order():
                 pass
@@ -686,9 +821,9 @@ class NARS:
                     and statement_term.is_first_order() \
                     and j1.is_event():
                 if len(statement_concept.explanation_links) > 0:
-                    related_concept = statement_concept.explanation_links.peek().object
+                    related_concept = statement_concept.explanation_links.peek()
                 elif len(statement_concept.superterm_links) > 0:
-                    related_concept = statement_concept.superterm_links.peek().object
+                    related_concept = statement_concept.superterm_links.peek()
             else:
                 related_concept = self.memory.get_semantically_related_concept(statement_concept)
 
@@ -740,7 +875,7 @@ class NARS:
             better_goal = NALInferenceRules.Local.Choice(operation_goal, self.current_operation_goal_sequence)
             if better_goal is self.current_operation_goal_sequence: return # don't execute since the current sequence is more desirable
             # else, the given operation is more desirable
-            self.operation_queue.clear()
+            self.scheduler.cancel_group(NARS.OPERATION_GROUP)
 
         if Config.DEBUG: Global.Global.debug_print("Queueing operation: " + str(operation_goal))
 
@@ -749,12 +884,14 @@ class NARS:
         for parent in operation_goal.stamp.parent_premises:
             parent_strings.append(str(parent))
 
-        # insert operation into queue to be execute after the interval
+        # schedule operation to be executed after the interval
         # intervals of zero will result in immediate execution (assuming the queue is processed afterwards and in the same cycle as this function)
+        current_cycle = Global.Global.get_current_cycle_number()
         if isinstance(operation_statement,NALGrammar.Terms.StatementTerm):
             # atomic op
             self.current_operation_goal_sequence = operation_goal
-            self.operation_queue.append([0, operation_statement, desirability, parent_strings])
+            self.scheduler.schedule(current_cycle, NARS.OPERATION_GROUP, self.execute_queued_operation,
+                                    operation_statement, desirability, parent_strings)
         elif isinstance(operation_statement,NALGrammar.Terms.CompoundTerm):
             # higher-order operation like A &/ B or A &| B
             atomic_ops_left_to_execute = len(operation_statement.subterms)
@@ -764,7 +901,8 @@ class NARS:
             for i in range(len(operation_statement.subterms)):
                 # insert the atomic subterm operations and their working cycle delays
                 subterm = operation_statement.subterms[i]
-                self.operation_queue.append([working_cycles, subterm, desirability, parent_strings])
+                self.scheduler.schedule(current_cycle + working_cycles, NARS.OPERATION_GROUP, self.execute_queued_operation,
+                                        subterm, desirability, parent_strings)
                 if i < len(operation_statement.subterms)-1:
                     working_cycles += NALInferenceRules.HelperFunctions.convert_from_interval(operation_statement.intervals[i])
 
@@ -773,28 +911,16 @@ class NARS:
 
     def execute_operation_queue(self):
         """
-            Loop through all operations and decrement their remaining interval delay.
-            If delay is zero, execute the operation
+            Execute the queued operations, and resolve the anticipations, that are due this working cycle
         :return:
         """
         self.last_executed = None
-        i = 0
-        while i < len(self.operation_queue):
-            remaining_working_cycles, operation_statement, desirability, parents = self.operation_queue[i]
-
-            if remaining_working_cycles == 0:
-                # operation is ready to execute
-                self.execute_atomic_operation(operation_statement, desirability, parents)
-                # now remove it from the queue
-                self.operation_queue.pop(i)
-                self.last_executed = operation_statement
-                i -= 1
-            else:
-                # decrease remaining working cycles
-                self.operation_queue[i][0] -= 1
-            i += 1
+        self.scheduler.run_due(Global.Global.get_current_cycle_number())
+        if self.scheduler.count(NARS.OPERATION_GROUP) == 0: self.current_operation_goal_sequence = None
 
-        if len(self.operation_queue) == 0: self.current_operation_goal_sequence = None
+    def execute_queued_operation(self, operation_statement, desirability, parents):
+        self.execute_atomic_operation(operation_statement, desirability, parents)
+        self.last_executed = operation_statement
 
 
     def execute_atomic_operation(self, operation_statement_to_execute, desirability, parents):
@@ -809,6 +935,7 @@ class NARS:
         " and parents: " + str(parents)
 
         Global.Global.print_to_output(string)
+        if self.server is not None: self.server.broadcast(string)
 
 
         # input the operation statement
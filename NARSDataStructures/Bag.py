@@ -23,16 +23,22 @@ class Bag(NARSDataStructures.ItemContainers.ItemContainer):
 
         An array of buckets, where each bucket holds items of a certain priority
         (e.g. 100 buckets, bucket 1 - hold items with 0.01 priority,  bucket 50 - hold items with 0.50 priority)
+
+        Buckets are sparse: only non-empty levels are stored, and their level numbers are kept sorted,
+        so construction, clearing and skipping empty levels cost O(non-empty buckets) rather than O(granularity).
     """
 
-    def __init__(self, item_type, capacity, granularity=Config.BAG_GRANULARITY):
+    def __init__(self, item_type, capacity, granularity=Config.BAG_GRANULARITY, rng=None):
+        """
+        :param rng: random.Random to draw peeks from; the global random module by default
+        """
+        self.rng = random if rng is None else rng
         self.level = 0
-        self.priority_buckets = {}
+        self.priority_buckets = {}  # level -> non-empty bucket
         self.quality_buckets = {} # store by inverted quality for deletion
+        self.occupied_priority_levels = sortedcontainers.SortedList()  # keys of priority_buckets
+        self.occupied_quality_levels = sortedcontainers.SortedList()  # keys of quality_buckets
         self.granularity = granularity
-        for i in range(granularity):
-            self.priority_buckets[i] = None
-            self.quality_buckets[i] = None
         NARSDataStructures.ItemContainers.ItemContainer.__init__(self, item_type=item_type, capacity=capacity)
 
     def __len__(self):
@@ -43,9 +49,10 @@ class Bag(NARSDataStructures.ItemContainers.ItemContainer):
 
     def clear(self):
         self.level = 0
-        for i in range(self.granularity):
-            self.priority_buckets[i] = None
-            self.quality_buckets[i] = None
+        self.priority_buckets.clear()
+        self.quality_buckets.clear()
+        self.occupied_priority_levels.clear()
+        self.occupied_quality_levels.clear()
         NARSDataStructures.ItemContainers.ItemContainer._clear(self)
 
     def PUT_NEW(self, object):
@@ -78,7 +85,8 @@ class Bag(NARSDataStructures.ItemContainers.ItemContainer):
         if len(self) == 0: return None  # no items
 
         if key is None:
-            item = self._peek_probabilistically(buckets=self.priority_buckets)
+            item = self._peek_probabilistically(buckets=self.priority_buckets,
+                                                occupied_levels=self.occupied_priority_levels)
         else:
             item = NARSDataStructures.ItemContainers.ItemContainer.peek_using_key(self, key=key)
 
@@ -124,35 +132,40 @@ class Bag(NARSDataStructures.ItemContainers.ItemContainer):
     def add_item_to_bucket(self,item):
         # add to appropriate bucket
         bucket_num = self.calc_bucket_num_from_value(item.budget.get_priority())
-        if self.priority_buckets[bucket_num] is None:
+        if bucket_num not in self.priority_buckets:
             self.priority_buckets[bucket_num] = sortedcontainers.SortedList()
+            self.occupied_priority_levels.add(bucket_num)
         bucket = self.priority_buckets[bucket_num]
-        bucket.add((id(item),item)) # convert to ID so
+        bucket.add((item.id, item))  # ordered by item ID, so peeks are reproducible
         item.bucket_num = bucket_num
 
 
     def remove_item_from_its_bucket(self, item):
         # take from bucket
         bucket = self.priority_buckets[item.bucket_num]
-        bucket.remove((id(item),item))
+        bucket.remove((item.id, item))
         if len(bucket) == 0:
-            self.priority_buckets[item.bucket_num] = None
+            del self.priority_buckets[item.bucket_num]
+            self.occupied_priority_levels.remove(item.bucket_num)
         item.bucket_num = None
 
     def add_item_to_quality_bucket(self, item):
         # add to appropriate bucket
         bucket_num = self.calc_bucket_num_from_value(1-item.budget.get_quality()) # higher quality should have lower probability of being selected for deletion
-        if self.quality_buckets[bucket_num] is None: self.quality_buckets[bucket_num] = sortedcontainers.SortedList()
+        if bucket_num not in self.quality_buckets:
+            self.quality_buckets[bucket_num] = sortedcontainers.SortedList()
+            self.occupied_quality_levels.add(bucket_num)
         bucket = self.quality_buckets[bucket_num]
-        bucket.add((id(item),item))
+        bucket.add((item.id, item))
         item.quality_bucket_num = bucket_num
 
     def remove_item_from_its_quality_bucket(self, item):
         # take from bucket
         bucket = self.quality_buckets[item.quality_bucket_num]
-        bucket.remove((id(item),item))
+        bucket.remove((item.id, item))
         if len(bucket) == 0:
-            self.quality_buckets[item.quality_bucket_num] = None
+            del self.quality_buckets[item.quality_bucket_num]
+            self.occupied_quality_levels.remove(item.quality_bucket_num)
         item.quality_bucket_num = None
 
     def strengthen_item_priority(self, key, multiplier=Config.PRIORITY_STRENGTHEN_VALUE):
@@ -209,7 +222,8 @@ class Bag(NARSDataStructures.ItemContainers.ItemContainer):
             :returns the lowest quality item taken from the Bag
         """
         try:
-            item = self._peek_probabilistically(buckets=self.quality_buckets)
+            item = self._peek_probabilistically(buckets=self.quality_buckets,
+                                                occupied_levels=self.occupied_quality_levels)
             assert (item.key in self.item_lookup_dict), "Given key does not exist in this bag"
             item = NARSDataStructures.ItemContainers.ItemContainer._take_from_lookup_dict(self, item.key)
             self.remove_item_from_its_bucket(item=item)
@@ -219,38 +233,43 @@ class Bag(NARSDataStructures.ItemContainers.ItemContainer):
         return item
 
 
-    def _peek_probabilistically(self, buckets):
+    def _peek_probabilistically(self, buckets, occupied_levels):
         """
             Probabilistically selects a priority value / bucket, then peeks an item from that bucket.
 
+            Starting from a random level, walks the occupied levels upward (wrapping around),
+            entering each with probability proportional to its level.
+
+            :param buckets: level -> non-empty bucket
+            :param occupied_levels: sorted levels of the non-empty buckets
             :returns item
         """
         if len(self) == 0: return None
-        self.level = random.randint(0, self.granularity - 1)
+
+        # jump straight to the first occupied level at or above a random level
+        occupied_idx = occupied_levels.bisect_left(self.rng.randint(0, self.granularity - 1)) % len(occupied_levels)
 
         MAX_ATTEMPTS = 10
         num_attempts: int = 0
-        while True and num_attempts < MAX_ATTEMPTS:
-            level_bucket = buckets[self.level]
-            if level_bucket is None or len(level_bucket) == 0:
-                self.level = (self.level + 1) % self.granularity
-                continue
+        while num_attempts < MAX_ATTEMPTS:
+            self.level = occupied_levels[occupied_idx]
 
             # try to go into bucket
-            rnd = random.randint(0, self.granularity - 1)
+            rnd = self.rng.randint(0, self.granularity - 1)
 
             threshold = self.level
             if rnd <= threshold:
                 # use this bucket
                 break
             else:
-                self.level = (self.level + 1) % self.granularity
+                occupied_idx = (occupied_idx + 1) % len(occupied_levels)
 
             num_attempts += 1
 
         if num_attempts >= MAX_ATTEMPTS: return None
 
-        rnd_idx = random.randint(0,len(level_bucket)-1)
+        level_bucket = buckets[self.level]
+        rnd_idx = self.rng.randint(0,len(level_bucket)-1)
         _, item = level_bucket[rnd_idx]
 
         return item
@@ -3,6 +3,7 @@
     Created: December 24, 2020
     Purpose: Holds data structure implementations that are specific / custom to NARS
 """
+import collections
 import math
 import random
 import timeit as time
@@ -17,7 +18,7 @@ from NALGrammar.Values import TruthValue
 from NALInferenceRules.TruthValueFunctions import F_Revision
 from NARSDataStructures.Bag import Bag
 from NARSDataStructures.ItemContainers import ItemContainer, Item
-from NARSDataStructures.Other import Depq, Task, QuadTree
+from NARSDataStructures.Other import Depq, Task
 import NALInferenceRules
 import NALGrammar
 import numpy as np
@@ -85,150 +86,158 @@ class SpatialBuffer():
     """
     MAX_PIXEL_VALUE = 255
     PREDICATE_NAME = 'Bright'
+    QUADTREE_DEPTH = 4  # 4^4 = 256 leaf nodes
+    QUADTREE_LEAF_ROW_LENGTH = 32  # leaf n covers pixel (y,x) = (n // 32, n % 32)
 
-    def __init__(self, dimensions):
+    def __init__(self, dimensions, rng=None):
         """
         :param dimensions: dimensions of the 2d buffer as a tuple (y, x)
+        :param rng: random.Random that the events bag draws from; the global random module by default
         """
         assert len(dimensions) == 2, "ERROR: Spatial buffer only support 2D structures"
         self.dimensions: Tuple = dimensions
 
-        self.quadtree_leaves = np.empty(shape=(8, 8), dtype=QuadTree)
+        self.events_bag = Bag(item_type=NALGrammar.Sentences.Judgment, capacity=1000, granularity=100, rng=rng)
 
-        self.events_bag = Bag(item_type=NALGrammar.Sentences.Judgment, capacity=1000, granularity=100)
-
-        self.make_new_quadtree()
+        # the quadtree's shape never changes, so its terms are made once and reused for every frame.
+        # Nodes are numbered level by level from the leaves up: node k's children are 4k to 4k+3 of the level below
+        self.quadtree_subject_terms = self.create_quadtree_subject_terms()  # node number -> subject term
+        self.quadtree_statement_terms = {}  # (node number, channel) -> statement term
+        self.quadtree_concept_items = {}  # (node number, channel) -> Item of the statement's concept in memory
 
+        self.img = None
         self.last_taken_img_array = None
 
-    def make_new_quadtree(self):
-        # total image
-        # 1 node on level 0, the root
-        self.quadtree: QuadTree = QuadTree()
+    def create_quadtree_subject_terms(self):
+        """
+            A leaf is named by its pixel position; an interior node is the conjunction of its children.
 
-        self.quadtree.Create4ChildrenRecursive(4)  # 2^5=32, therefore this allows for images that are 32x32 pixels, creating 1024 leaf nodes
+            :return: list of every quadtree node's subject term, from the leaves up to the root
+        """
+        subject_terms = []
+        for leaf in range(4 ** SpatialBuffer.QUADTREE_DEPTH):
+            y, x = divmod(leaf, SpatialBuffer.QUADTREE_LEAF_ROW_LENGTH)
+            subject_terms.append(NALGrammar.Terms.AtomicTerm("quadleaf_" + str(x) + "_" + str(y)))
+
+        level_start = 0
+        level_size = len(subject_terms)
+        while level_size > 1:
+            for node in range(level_size // 4):
+                children = subject_terms[level_start + 4 * node:level_start + 4 * node + 4]
+                subject_terms.append(NALGrammar.Terms.CompoundTerm(subterms=children,
+                                                                   term_connector=NALSyntax.TermConnector.Conjunction))
+            level_start += level_size
+            level_size //= 4
+
+        return subject_terms
+
+    def get_quadtree_statement_term(self, node, channel):
+        """
+            :return: statement term (subject --> channel) for a quadtree node, created once
+        """
+        if (node, channel) not in self.quadtree_statement_terms:
+            self.quadtree_statement_terms[(node, channel)] = NALGrammar.Terms.StatementTerm(
+                subject_term=self.quadtree_subject_terms[node],
+                predicate_term=NALGrammar.Terms.AtomicTerm(str(channel)),
+                copula=NALSyntax.Copula.Inheritance)
+        return self.quadtree_statement_terms[(node, channel)]
+
+    def get_quadtree_concept_item(self, node, channel):
+        """
+            :return: memory Item of the concept for a quadtree node's statement.
+                It is cached, and only looked up again if memory forgot the concept.
+        """
+        memory = Global.Global.NARS.memory
+        concept_item = self.quadtree_concept_items.get((node, channel))
+        if concept_item is None or memory.concepts_bag.peek(concept_item.key) is not concept_item:
+            concept_item = memory.peek_concept_item(self.get_quadtree_statement_term(node, channel))
+            self.quadtree_concept_items[(node, channel)] = concept_item
+        return concept_item
 
     def blank_image(self):
-        self.set_image(np.empty(shape=self.dimensions))
+        self.set_image(np.zeros(shape=self.dimensions))
 
     def set_image(self, img):
-        self.events_bag.clear()
-        self.make_new_quadtree()
-        self.img = img
-        self.CalculateQuadTreeRecursive(self.quadtree)
-
-    def CalculateQuadTreeRecursive(self, quad_tree: QuadTree):
-        if len(quad_tree.children) == 0:
-            # leaf node, so add the event
-            y, x = quad_tree.id
-            pixel_values = []
-            if y >= self.img.shape[0] or x >= self.img.shape[1]:
-                pixel_values.append(float(0))
-            else:
-                pixel = self.img[y, x]
-                if len(pixel.shape) == 1:
-                    #  RGB image
-                    pixel_values.append(float(pixel[0]))
-                    pixel_values.append(float(pixel[1]))
-                    pixel_values.append(float(pixel[2]))
-                    #pixel_sum = float(pixel[0]) + float(pixel[1]) + float(pixel[2])
-                    #pixel_values.append(float(pixel_sum/3)) # TODO grayscale color images
-                else:
-                    # grayscale image
-                    pixel_values.append(float(pixel))
-
-            i = 0
-            for pixel_value in pixel_values:
-                f = pixel_value / SpatialBuffer.MAX_PIXEL_VALUE
-                c = NALInferenceRules.HelperFunctions.get_unit_evidence()
-                event = self.create_pixel_event(subject_name="quadleaf_" + str(x) + "_" + str(y),predicate_name=str(i), f=f, c=c)
-                quad_tree.values.append(event)
-                i = i + 1
-        else:
-            for child_node in quad_tree.children:
-                self.CalculateQuadTreeRecursive(child_node)
-
-            values = self.create_spatial_conjunction(quad_tree)
-            quad_tree.values = values
-
-        value: Judgment
-        for value in quad_tree.values:
-            self.events_bag.PUT_NEW(value)
-            self.events_bag.change_priority(Item.get_key_from_object(value), new_priority=value.get_eternal_expectation())
-            concept = Global.Global.NARS.memory.peek_concept(value.statement)
-            concept.belief_table.clear()
-            Global.Global.NARS.process_judgment_sentence_initial(value)
-
-
+        """
+            Encode an image into quadtree events.
 
-    def create_pixel_event(self, subject_name: str, predicate_name: str, f: float, c: float):
-        sentence = None
-        statement = NALGrammar.Terms.from_string("(" + subject_name + "-->" + predicate_name + ")")
+            The truth-values of every quadtree node are computed at once, level by level, as arrays.
+            Judgments are only created for the nodes that enter the events bag.
 
-       # if f > Config.POSITIVE_THRESHOLD:
-        sentence = NALGrammar.Sentences.Judgment(statement=statement,
-                                                 value=TruthValue(f, c),
-                                                 occurrence_time=None)
-        # else:
-        #     pass
-        #     # f = 1 - f
-        #     # if f > Config.POSITIVE_THRESHOLD:
-        #     #     sentence = NALGrammar.Sentences.Judgment(statement=NALGrammar.Terms.CompoundTerm(subterms=[statement],
-        #     #                                                                                      term_connector=NALSyntax.TermConnector.Negation),
-        #     #                                              value=TruthValue(f, c),
-        #     #                                              occurrence_time=None)
+            :param img: 2d grayscale or 3d RGB image array
+        """
+        self.events_bag.clear()
+        self.img = img
+        self.put_quadtree_events(self.calculate_quadtree_pyramid(img))
 
-        return sentence
+    def calculate_quadtree_pyramid(self, img):
+        """
+            A leaf's truth-value is its pixel brightness with unit evidence.
+            An interior node's truth-value is F_Intersection folded left to right over its 4 children.
 
-    def create_spatial_conjunction(self, quad_tree: QuadTree):
+            :param img: 2d grayscale or 3d RGB image array
+            :return: list of (frequencies, confidences) for each quadtree level, from the leaves (level 0) up to the root.
+                The arrays have shape (number of nodes on the level, number of channels),
+                and node k's children are nodes 4k to 4k+3 of the level below.
         """
-        :param subset: 2d Array of positive (non-negated) sentences / events
-        :return:
+        number_of_leaves = 4 ** SpatialBuffer.QUADTREE_DEPTH
+        leaf_rows = number_of_leaves // SpatialBuffer.QUADTREE_LEAF_ROW_LENGTH
+        number_of_channels = min(img.shape[2], 3) if img.ndim == 3 else 1  # RGB or grayscale
+
+        # leaves outside of the image are black
+        leaf_pixels = np.zeros(shape=(leaf_rows, SpatialBuffer.QUADTREE_LEAF_ROW_LENGTH, number_of_channels))
+        height, width = min(img.shape[0], leaf_rows), min(img.shape[1], SpatialBuffer.QUADTREE_LEAF_ROW_LENGTH)
+        pixels = img[:height, :width] if img.ndim == 2 else img[:height, :width, :number_of_channels]
+        leaf_pixels[:height, :width] = pixels.reshape(height, width, number_of_channels)
+
+        frequencies = leaf_pixels.reshape(number_of_leaves, number_of_channels) / SpatialBuffer.MAX_PIXEL_VALUE
+        confidences = np.full(shape=frequencies.shape,
+                              fill_value=NALInferenceRules.HelperFunctions.get_unit_evidence())
+        pyramid = [(frequencies, confidences)]
+
+        for _ in range(SpatialBuffer.QUADTREE_DEPTH):
+            children_frequencies = frequencies.reshape(-1, 4, number_of_channels)
+            children_confidences = confidences.reshape(-1, 4, number_of_channels)
+            frequencies, confidences = children_frequencies[:, 0], children_confidences[:, 0]
+            for child in range(1, 4):
+                # F_Intersection: band_average of frequencies, bor of confidences (clamped like EvidentialValue)
+                frequencies = np.sqrt(frequencies * children_frequencies[:, child])
+                confidences = 1 - (1 - confidences) * (1 - children_confidences[:, child])
+                confidences = np.where(confidences >= 1.0, 0.9999, confidences)
+            pyramid.append((frequencies, confidences))
+
+        return pyramid
+
+    def put_quadtree_events(self, pyramid):
         """
+            Put the quadtree node events with the highest expectation into the events bag,
+            and update their concepts' beliefs in place.
 
-        values = []
-        for i in range(3): #RGB
-            conjunction_truth_value = None
-            terms = []
-            for quad_child in quad_tree.children:
-                if i >= len(quad_child.values): break
-                sentence = quad_child.values[i]
-                truth_value = sentence.value
-                term: NALGrammar.Terms.StatementTerm = sentence.statement
-
-                #quadtree_level = int(str(term.get_subject_term()).split("_")[1])
-                predicate_term = term.get_predicate_term()
-
-                if conjunction_truth_value is None:
-                    conjunction_truth_value = truth_value
-                else:
-                    conjunction_truth_value = NALInferenceRules.TruthValueFunctions.F_Intersection(
-                        conjunction_truth_value.frequency,
-                        conjunction_truth_value.confidence,
-                        truth_value.frequency,
-                        truth_value.confidence)
-
-                terms.append(term.get_subject_term())
-
-            if conjunction_truth_value is None: break
-
-            compound = NALGrammar.Terms.CompoundTerm(subterms=terms,
-                                                     term_connector=NALSyntax.TermConnector.Conjunction)
-
-            statement_term = NALGrammar.Terms.StatementTerm(subject_term=compound,
-                                           predicate_term=predicate_term,
-                                            copula=NALSyntax.Copula.Inheritance)
-
-            spatial_conjunction = NALGrammar.Sentences.Judgment(statement=statement_term,
-                                                                value=TruthValue(conjunction_truth_value.frequency,
-                                                                                 conjunction_truth_value.confidence),
-                                                                occurrence_time=None)
-            values.append(spatial_conjunction)
-        # for quad_child in quad_tree.children:
-        #     for sentence in quad_child.values:
-        #         spatial_conjunction.stamp.evidential_base.merge_sentence_evidential_base_into_self(sentence)
-
-        return values
+            :param pyramid: quadtree truth-values from calculate_quadtree_pyramid()
+        """
+        frequencies = np.concatenate([level_frequencies for level_frequencies, _ in pyramid])  # (node, channel)
+        confidences = np.concatenate([level_confidences for _, level_confidences in pyramid])
+        number_of_channels = frequencies.shape[1]
+        expectations = (confidences * (frequencies - 0.5) + 0.5).ravel()
+
+        number_of_events = min(self.events_bag.capacity, len(expectations))
+        selected = np.argpartition(-expectations, number_of_events - 1)[:number_of_events]
+        selected = selected[np.argsort(-expectations[selected], kind="stable")]
+
+        for flat_index in selected:
+            node, channel = divmod(int(flat_index), number_of_channels)
+            concept_item = self.get_quadtree_concept_item(node, channel)
+            event = NALGrammar.Sentences.Judgment(statement=concept_item.object.term,
+                                                  value=TruthValue(float(frequencies[node, channel]),
+                                                                   float(confidences[node, channel])),
+                                                  occurrence_time=None)
+
+            self.events_bag.PUT_NEW(event)
+            self.events_bag.change_priority(Item.get_key_from_object(event), new_priority=event.get_eternal_expectation())
+            concept_item.object.belief_table.clear()
+            if Global.Global.NARS.write_ahead_log is not None:
+                Global.Global.NARS.write_ahead_log.log_belief_table_clear(concept_item.object.term)
+            Global.Global.NARS.process_judgment_sentence_initial(event, statement_concept_item=concept_item)
 
 
 class TemporalModule(ItemContainer):
@@ -237,17 +246,33 @@ class TemporalModule(ItemContainer):
             temporal composition
                 and
             anticipation (negative evidence for predictive implications)
+
+        The temporal chain is a ring buffer of the most recent events.
+        Each event's type is classified once, when it enters the chain,
+        and events are also indexed by type, so chaining only visits the events that can be premises.
+        Conjunction terms of event pairs still in the chain are cached, so they are not rebuilt for every new event.
     """
+    # event types, as bit flags
+    EVENT_STATEMENT = 1  # (S --> P)
+    EVENT_SPATIAL = 2  # spatial term
+    EVENT_CONJUNCTION_OF_EVENTS = 4  # (&&,(S --> P),...) or (&&,spatial term,...)
+    EVENT_CONJUNCTION_OF_CONJUNCTIONS = 8  # (&&,(&&,...),...)
+    EVENT_TYPES = (EVENT_STATEMENT, EVENT_SPATIAL, EVENT_CONJUNCTION_OF_EVENTS, EVENT_CONJUNCTION_OF_CONJUNCTIONS)
+
+    ANTICIPATION_GROUP = "anticipation"  # scheduler group of anticipation deadlines
 
     def __init__(self, NARS, item_type, capacity):
         ItemContainer.__init__(self, item_type=item_type, capacity=capacity)
 
         self.NARS = NARS
         # temporal chaining
-        self.temporal_chain = []
+        self.temporal_chain = collections.deque()  # event items, oldest first
+        self.event_types = collections.deque()  # type flags of each event in the temporal chain
+        self.events_by_type = {event_type: collections.deque() for event_type in TemporalModule.EVENT_TYPES}
+        self.conjunction_terms = {}  # event A key -> {later event B key -> simplified (A && B) term, or None}
+        self.consecutive_conjunction_terms = {}  # event A key -> simplified (A && B && C) term of the next 2 events, or None
 
-        # anticipation
-        self.anticipations_queue = []
+        # anticipation (deadlines are kept in the NARS scheduler)
         self.current_anticipation = None
 
     def __len__(self):
@@ -269,17 +294,121 @@ class TemporalModule(ItemContainer):
         self._put_into_lookup_dict(item)  # Item Container
 
         # add to buffer
+        event_type = TemporalModule.get_event_type(object.sentence.statement)
         self.temporal_chain.append(item)
+        self.event_types.append(event_type)
+        for type_flag, events in self.events_by_type.items():
+            if event_type & type_flag: events.append(item)
 
         # update temporal chain
         if len(self.temporal_chain) > self.capacity:
-            popped_item = self.temporal_chain.pop(0)
-            ItemContainer._take_from_lookup_dict(self, popped_item.key)
+            self._pop_oldest_event()
 
         self.process_temporal_chaining()
 
+    def _pop_oldest_event(self):
+        """
+            Remove the oldest event from the temporal chain, along with its indexes.
+            The oldest event is also the oldest event of each of its types.
+        """
+        popped_item = self.temporal_chain.popleft()
+        popped_event_type = self.event_types.popleft()
+        for type_flag, events in self.events_by_type.items():
+            if popped_event_type & type_flag: events.popleft()
+        self.conjunction_terms.pop(popped_item.key, None)  # later events are only cached with older events
+        self.consecutive_conjunction_terms.pop(popped_item.key, None)
+        ItemContainer._take_from_lookup_dict(self, popped_item.key)
+
+    @classmethod
+    def get_event_type(cls, statement):
+        """
+            :param statement: statement term of an event
+            :return: the event's type flags
+        """
+        if isinstance(statement, NALGrammar.Terms.SpatialTerm): return cls.EVENT_SPATIAL
+        if isinstance(statement, NALGrammar.Terms.StatementTerm): return cls.EVENT_STATEMENT
+        if isinstance(statement, NALGrammar.Terms.CompoundTerm) \
+                and NALSyntax.TermConnector.is_conjunction(statement.connector):
+            first_subterm = statement.subterms[0]
+            if isinstance(first_subterm, (NALGrammar.Terms.SpatialTerm, NALGrammar.Terms.StatementTerm)):
+                return cls.EVENT_CONJUNCTION_OF_EVENTS
+            if isinstance(first_subterm, NALGrammar.Terms.CompoundTerm) \
+                    and NALSyntax.TermConnector.is_conjunction(first_subterm.connector):
+                return cls.EVENT_CONJUNCTION_OF_CONJUNCTIONS
+        return 0
+
+    def get_conjunction(self, event_item_A, event_item_B):
+        """
+            Temporal Intersection (A && B) of 2 events in the temporal chain, with event A the older.
+            The conjunction term is built once per pair of events, while they remain in the chain,
+            with the same checks as NALInferenceRules.Temporal.TemporalIntersection.
+
+            :return: the conjunction event; None if no inference could be made
+        """
+        terms_with_A = self.conjunction_terms.setdefault(event_item_A.key, {})
+        event_A = event_item_A.object.sentence
+        event_B = event_item_B.object.sentence
+        if event_item_B.key in terms_with_A:
+            conjunction_term = terms_with_A[event_item_B.key]
+        else:
+            assert event_A.get_tense() != NALSyntax.Tense.Eternal and event_B.get_tense() != NALSyntax.Tense.Eternal, \
+                "ERROR: Temporal Intersection needs events"
+            if event_A.statement == event_B.statement:
+                conjunction_term = None  # S && S simplifies to S, so no inference to do
+            else:
+                conjunction_term = NALGrammar.Terms.simplify(
+                    NALGrammar.Terms.CompoundTerm([event_A.statement, event_B.statement],
+                                                  NALSyntax.TermConnector.Conjunction))
+            terms_with_A[event_item_B.key] = conjunction_term
+
+        if conjunction_term is None: return None
+        return NALInferenceRules.HelperFunctions.create_resultant_sentence_two_premise(event_A,
+                                                                                       event_B,
+                                                                                       conjunction_term,
+                                                                                       NALInferenceRules.TruthValueFunctions.F_Intersection)
+
+    def get_conjunction_with_next(self, event_item_A, conjunction_A_B, event_item_C):
+        """
+            Temporal Intersection ((A && B) && C) of 3 consecutive events in the temporal chain, oldest first.
+            The conjunction term is built once per event A, while it remains in the chain.
+
+            :param event_item_A: oldest of the 3 events
+            :param conjunction_A_B: conjunction event (A && B) of the 2 oldest events
+            :param event_item_C: newest of the 3 events
+            :return: the conjunction event; None if no inference could be made
+        """
+        event_C = event_item_C.object.sentence
+        if event_item_A.key in self.consecutive_conjunction_terms:
+            conjunction_term = self.consecutive_conjunction_terms[event_item_A.key]
+        else:
+            if conjunction_A_B.statement == event_C.statement:
+                conjunction_term = None  # S && S simplifies to S, so no inference to do
+            else:
+                conjunction_term = NALGrammar.Terms.simplify(
+                    NALGrammar.Terms.CompoundTerm([conjunction_A_B.statement, event_C.statement],
+                                                  NALSyntax.TermConnector.Conjunction))
+            self.consecutive_conjunction_terms[event_item_A.key] = conjunction_term
+
+        if conjunction_term is None: return None
+        return NALInferenceRules.HelperFunctions.create_resultant_sentence_two_premise(conjunction_A_B,
+                                                                                       event_C,
+                                                                                       conjunction_term,
+                                                                                       NALInferenceRules.TruthValueFunctions.F_Intersection)
+
+    def process_sentence(self, derived_sentence):
+        if derived_sentence is None: return  # inference result was not useful
+        if derived_sentence.value.confidence == 0.0: return  # zero confidence is useless
+        if self.NARS is not None:
+            self.NARS.instrumentation.number_of_derivations += 1
+            self.NARS.global_buffer.PUT_NEW(Task(derived_sentence))
+
     def process_temporal_chaining(self):
-        if len(self) > 0:
+        if len(self) == 0: return
+        if Config.TEMPORAL_CHAINING_4_EVENTS and self.get_most_recent_event_task().object.is_from_input:
+            # derived events are still premises, but only input events start chains of 4,
+            # since derived events chaining in turn would cascade without end
+            self.temporal_chaining_4()
+        else:
             self.temporal_chaining_2_conjunction()
             self.temporal_chaining_2_imp()
 
@@ -290,280 +419,85 @@ class TemporalModule(ItemContainer):
         """
             Perform temporal chaining
 
-            produce all possible forward implication statements using temporal induction and intersection
+            produce all possible forward implication statements using temporal induction
                 A =/> B
 
             for the latest statement in the chain
         """
-        NARS = self.NARS
-        temporal_chain = self.temporal_chain
-        num_of_events = len(temporal_chain)
-
-        event_task_B = self.get_most_recent_event_task().object
-        event_B = event_task_B.sentence
-
-        if not isinstance(event_B.statement,
-                          NALGrammar.Terms.StatementTerm): return  # todo remove this. temporarily prevent arrays in postconditions
-
-        def process_sentence(derived_sentence):
-            if derived_sentence is not None:
-                if NARS is not None:
-                    task = Task(derived_sentence)
-                    NARS.global_buffer.PUT_NEW(task)
-
-        # produce all possible forward implication statements using temporal induction and intersection
-        # A &/ B,
-        # A =/> B
-        for i in range(0, num_of_events - 1):  # and do induction with events occurring afterward
-            event_task_A = temporal_chain[i].object
-            event_A = event_task_A.sentence
-
-            if not (isinstance(event_A.statement, NALGrammar.Terms.CompoundTerm)
-                    and NALSyntax.TermConnector.is_conjunction(event_A.statement.connector)
-                    and isinstance(event_A.statement.subterms[0], NALGrammar.Terms.CompoundTerm)
-                    and NALSyntax.TermConnector.is_conjunction(event_A.statement.subterms[0].connector)): continue
+        event_item_B = self.get_most_recent_event_task()
+        if not self.event_types[-1] & TemporalModule.EVENT_STATEMENT: return  # todo remove this. temporarily prevent arrays in postconditions
+        event_B = event_item_B.object.sentence
 
-            derived_sentences = NARSInferenceEngine.do_temporal_inference_two_premise(event_A, event_B)
-
-            for derived_sentence in derived_sentences:
-                if not isinstance(derived_sentence.statement,
-                                  NALGrammar.Terms.StatementTerm): continue  # only implications
-                process_sentence(derived_sentence)
+        # A =/> B, where A is a conjunction of conjunctions
+        for event_item_A in self.events_by_type[TemporalModule.EVENT_CONJUNCTION_OF_CONJUNCTIONS]:
+            self.process_sentence(NALInferenceRules.Temporal.TemporalInduction(event_item_A.object.sentence, event_B))
 
     def temporal_chaining_2_conjunction(self):
         """
             Perform temporal chaining
 
-            produce all possible forward implication statements using temporal induction and intersection
+            produce all possible conjunctions using temporal intersection
                 A && B
 
             for the latest statement in the chain
         """
-        NARS = self.NARS
-        temporal_chain = self.temporal_chain
-        num_of_events = len(temporal_chain)
-
-        event_task_B = self.get_most_recent_event_task().object
-        event_B = event_task_B.sentence
+        event_item_B = self.get_most_recent_event_task()
+        if not self.event_types[-1] & TemporalModule.EVENT_CONJUNCTION_OF_EVENTS: return
 
-        if not (isinstance(event_B.statement, NALGrammar.Terms.CompoundTerm)
-                and NALSyntax.TermConnector.is_conjunction(event_B.statement.connector)
-                and (isinstance(event_B.statement.subterms[0], NALGrammar.Terms.SpatialTerm) or isinstance(
-                    event_B.statement.subterms[0], NALGrammar.Terms.StatementTerm))): return
-
-        def process_sentence(derived_sentence):
-            if derived_sentence is not None:
-                if NARS is not None:
-                    task = Task(derived_sentence)
-                    NARS.global_buffer.PUT_NEW(task)
-
-        # A &/ B
-        for i in range(0, num_of_events - 1):
-            event_task_A = temporal_chain[i].object
-            event_A = event_task_A.sentence
-
-            if not (isinstance(event_A.statement, NALGrammar.Terms.CompoundTerm)
-                    and NALSyntax.TermConnector.is_conjunction(event_A.statement.connector)
-                    and (isinstance(event_A.statement.subterms[0], NALGrammar.Terms.SpatialTerm) or isinstance(
-                        event_A.statement.subterms[0], NALGrammar.Terms.StatementTerm))): return
-
-            derived_sentences = NARSInferenceEngine.do_temporal_inference_two_premise(event_A, event_B)
-
-            for derived_sentence in derived_sentences:
-                if isinstance(derived_sentence.statement, NALGrammar.Terms.StatementTerm): continue  # only conjunctions
-                process_sentence(derived_sentence)
-
-    def temporal_chaining_3_conjunction(self):
-        """
-            Perform temporal chaining
-
-            produce all possible forward implication statements using temporal induction and intersection
-                A && B && C
-
-            for the latest statement in the chain
-        """
-        NARS = self.NARS
-        temporal_chain = self.temporal_chain
-        num_of_events = len(temporal_chain)
-
-        event_task_C = self.get_most_recent_event_task().object
-        event_C = event_task_C.sentence
-
-        if not isinstance(event_C.statement, NALGrammar.Terms.SpatialTerm): return
-
-        def process_sentence(derived_sentence):
-            if derived_sentence is not None:
-                if NARS is not None:
-                    task = Task(derived_sentence)
-                    NARS.global_buffer.PUT_NEW(task)
-
-        for i in range(0, num_of_events - 1):  # and do induction with events occurring afterward
-            event_task_A = temporal_chain[i].object
-            event_A = event_task_A.sentence
-
-            if not isinstance(event_A.statement,
-                              NALGrammar.Terms.SpatialTerm) or event_A.statement == event_C.statement: continue
-
-            for j in range(i + 1, num_of_events - 1):
-                event_task_B = temporal_chain[j].object
-                event_B = event_task_B.sentence
-
-                if not isinstance(event_B.statement, NALGrammar.Terms.SpatialTerm) \
-                        or event_B.statement == event_A.statement \
-                        or event_B.statement == event_C.statement: continue
-
-                result_statement = NALGrammar.Terms.CompoundTerm([event_A.statement,
-                                                                  event_B.statement,
-                                                                  event_C.statement],
-                                                                 NALSyntax.TermConnector.Conjunction)
-
-                truth_value = NALInferenceRules.TruthValueFunctions.F_Intersection(event_A.values.frequency,
-                                                                                   event_A.values.confidence,
-                                                                                   event_B.values.frequency,
-                                                                                   event_B.values.confidence)
-
-                truth_value = NALInferenceRules.TruthValueFunctions.F_Intersection(truth_value.frequency,
-                                                                                   truth_value.confidence,
-                                                                                   event_C.values.frequency,
-                                                                                   event_C.values.confidence)
-
-                truth_value = NALGrammar.Values.TruthValue(frequency=truth_value.frequency,
-                                                           confidence=truth_value.confidence)
-                result = NALGrammar.Sentences.Judgment(statement=result_statement,
-                                                       value=truth_value,
-                                                       occurrence_time=Global.Global.get_current_cycle_number())
-
-                process_sentence(result)
-
-    def temporal_chaining_3(self):
-        """
-            Perform temporal chaining
-
-            produce all possible forward implication statements using temporal induction and intersection
-                A &/ B,
-                A =/> B
-                and
-                (A &/ B) =/> C
-
-            for the latest statement in the chain
-        """
-
-        NARS = self.NARS
-        temporal_chain = self.temporal_chain
-        num_of_events = len(temporal_chain)
-
-        event_task_C = self.get_most_recent_event_task().object
-        event_C = event_task_C.sentence
-
-        def process_sentence(derived_sentence):
-            if derived_sentence is not None:
-                if NARS is not None:
-                    task = Task(derived_sentence)
-                    NARS.global_buffer.PUT_NEW(task)
-
-        # produce all possible forward implication statements using temporal induction and intersection
-        # A &/ C,
-        # A =/> C
-        # and
-        # (A &/ B) =/> C
-
-        for i in range(0, num_of_events - 1):  # and do induction with events occurring afterward
-            event_task_A = temporal_chain[i].object
-            event_A = event_task_A.sentence
-
-            if not isinstance(event_A.statement,
-                              NALGrammar.Terms.SpatialTerm): continue  # todo remove this eventually. only arrays in precondition
-
-            # produce statements (A =/> C) and (A &/ C)
-            if isinstance(event_C.statement,
-                          NALGrammar.Terms.SpatialTerm):
-                derived_sentences = NARSInferenceEngine.do_temporal_inference_two_premise(event_A, event_C)
-
-                for derived_sentence in derived_sentences:
-                    if isinstance(derived_sentence.statement,
-                                  NALGrammar.Terms.StatementTerm): continue  # ignore simple implications
-                    process_sentence(derived_sentence)  # todo A_C conjunction only
-
-            for j in range(i + 1, num_of_events - 1):
-                event_task_B = temporal_chain[j].object
-                event_B = event_task_B.sentence
-
-                conjunction_A_B = NALInferenceRules.Temporal.TemporalIntersection(event_A,
-                                                                                  event_B)  # (A &/ B)
-
-                if conjunction_A_B is not None:
-                    derived_sentence = NALInferenceRules.Temporal.TemporalInduction(conjunction_A_B,
-                                                                                    event_C)  # (A &/ B) =/> C
-                    process_sentence(derived_sentence)
+        # A && B, for each event A before the first event that is not a conjunction of events
+        for i in range(len(self.temporal_chain) - 1):
+            if not self.event_types[i] & TemporalModule.EVENT_CONJUNCTION_OF_EVENTS: return
+            self.process_sentence(self.get_conjunction(self.temporal_chain[i], event_item_B))
 
     def temporal_chaining_4(self):
         """
             Perform temporal chaining
 
-            produce all possible forward implication statements using temporal induction and intersection
+            produce forward implication statements using temporal induction and intersection
                 A &/ D,
                 A =/> D
-                and
+                for each earlier event A,
                 (A &/ B) =/> D
-                (A &/ C) =/> D
+                for each 2 consecutive earlier events A, B,
                 and
                 (A &/ B &/ C) =/> D
+                for each 3 consecutive earlier events A, B, C
 
-            for the latest event D in the chain
+            for the latest event D in the chain.
+            Only consecutive events are chained into preconditions, and their conjunction terms are cached,
+            so each new event costs O(window)
 
-            todo not supported
+            :return: the derived sentences
         """
-        NARS = self.NARS
         results = []
-        temporal_chain = self.temporal_chain
-        num_of_events = len(temporal_chain)
-
-        event_task_D = self.get_most_recent_event_task()
-        event_D = event_task_D.sentence
+        event_item_D = self.get_most_recent_event_task()
+        event_D = event_item_D.object.sentence
+        chain_length = len(self.temporal_chain) - 1  # excluding D
 
         def process_sentence(derived_sentence):
             if derived_sentence is not None:
                 results.append(derived_sentence)
-                if NARS is not None:
-                    task = Task(derived_sentence)
-                    NARS.global_buffer.PUT_NEW(task)
-
-        # produce all possible forward implication statements using temporal induction and intersection
-        # A &/ C,
-        # A =/> C
-        # and
-        # (A &/ B) =/> C
-        for i in range(0, num_of_events - 1):  # and do induction with events occurring afterward
-            event_task_A = temporal_chain[i].object
-            event_A = event_task_A.sentence
+                self.process_sentence(derived_sentence)
+
+        for i in range(chain_length):  # and do induction with events occurring afterward
+            event_item_A = self.temporal_chain[i]
 
             # produce statements (A =/> D) and (A &/ D)
-            derived_sentences = NARSInferenceEngine.do_temporal_inference_two_premise(event_A, event_D)
-
-            for derived_sentence in derived_sentences:
-                # if isinstance(derived_sentence.statement, NALGrammar.Terms.StatementTerm): continue
-                process_sentence(derived_sentence)
-
-            for j in range(i + 1, num_of_events - 1):
-                event_task_B = temporal_chain[j].object
-                event_B = event_task_B.sentence
-
-                conjunction_A_B = NALInferenceRules.Temporal.TemporalIntersection(event_A,
-                                                                                  event_B)  # (A &/ B)
-                if conjunction_A_B is not None:
-                    derived_sentence = NALInferenceRules.Temporal.TemporalInduction(conjunction_A_B,
-                                                                                    event_D)  # (A &/ B) =/> D
-                    process_sentence(derived_sentence)
-
-                for k in range(j + 1, num_of_events - 1):
-                    if conjunction_A_B is None: break
-                    event_task_C = temporal_chain[k].object
-                    event_C = event_task_C.sentence
-                    conjunction_A_B_C = NALInferenceRules.Temporal.TemporalIntersection(conjunction_A_B,
-                                                                                        event_C)  # (A &/ B &/ C)
-                    derived_sentence = NALInferenceRules.Temporal.TemporalInduction(conjunction_A_B_C,
-                                                                                    event_D)  # (A &/ B &/ C) =/> D
-                    process_sentence(derived_sentence)
+            process_sentence(self.get_conjunction(event_item_A, event_item_D))
+            process_sentence(NALInferenceRules.Temporal.TemporalInduction(event_item_A.object.sentence, event_D))
+
+            if i + 1 == chain_length: continue
+            conjunction_A_B = self.get_conjunction(event_item_A, self.temporal_chain[i + 1])  # (A &/ B)
+            if conjunction_A_B is None: continue
+            process_sentence(NALInferenceRules.Temporal.TemporalInduction(conjunction_A_B, event_D))  # (A &/ B) =/> D
+
+            if i + 2 == chain_length: continue
+            conjunction_A_B_C = self.get_conjunction_with_next(event_item_A,
+                                                               conjunction_A_B,
+                                                               self.temporal_chain[i + 2])  # (A &/ B &/ C)
+            if conjunction_A_B_C is None: continue
+            process_sentence(NALInferenceRules.Temporal.TemporalInduction(conjunction_A_B_C,
+                                                                          event_D))  # (A &/ B &/ C) =/> D
 
         return results
 
@@ -601,7 +535,7 @@ class TemporalModule(ItemContainer):
         #     current_anticipation_expectation = self.current_anticipation
         #     if expectation <= current_anticipation_expectation: return # don't execute since the current anticipation is more expected
         #     # else, the given operation is more expected
-        #     self.anticipations_queue.clear()
+        #     self.NARS.scheduler.cancel_group(TemporalModule.ANTICIPATION_GROUP)
 
         self.current_anticipation = expectation
 
@@ -609,43 +543,34 @@ class TemporalModule(ItemContainer):
             higher_order_anticipation_concept.term.interval)
 
         postcondition = higher_order_anticipation_concept.term.get_predicate_term()
-        self.anticipations_queue.append([working_cycles, higher_order_anticipation_concept, postcondition])
+        self.NARS.scheduler.schedule(Global.Global.get_current_cycle_number() + working_cycles,
+                                     TemporalModule.ANTICIPATION_GROUP,
+                                     self.resolve_anticipation,
+                                     higher_order_anticipation_concept,
+                                     postcondition)
         if Config.DEBUG: Global.Global.debug_print(
             str(postcondition) + " IS ANTICIPATED FROM " + str(best_belief) + " Total Anticipations:" + str(
-                len(self.anticipations_queue)))
+                self.NARS.scheduler.count(TemporalModule.ANTICIPATION_GROUP)))
 
-    def process_anticipations(self):
+    def resolve_anticipation(self, best_prediction_concept, anticipated_postcondition):
         """
+            Called by the scheduler when an anticipated event is due.
 
             anticipation (negative evidence for predictive implications)
         """
-        return  # todo
-        # process pending anticipations
-        i = 0
-
-        while i < len(self.anticipations_queue):
-            remaining_cycles, best_prediction_concept, anticipated_postcondition = self.anticipations_queue[
-                i]  # event we expect to occur
-            anticipated_postcondition_concept = self.NARS.memory.peek_concept(anticipated_postcondition)
-            if remaining_cycles == 0:
-                if anticipated_postcondition_concept.is_positive():
-                    # confirmed
-                    if Config.DEBUG: Global.Global.debug_print(
-                        str(anticipated_postcondition_concept) + " SATISFIED - CONFIRMED ANTICIPATION" + str(
-                            best_prediction_concept.term))
-                else:
-                    sentence = NALGrammar.Sentences.Judgment(statement=best_prediction_concept.term,
-                                                             value=NALGrammar.Values.TruthValue(frequency=0.0,
-                                                                                                confidence=Config.DEFAULT_DISAPPOINT_CONFIDENCE))
-                    if Config.DEBUG:
-                        Global.Global.debug_print(str(
-                            anticipated_postcondition_concept) + " DISAPPOINT - FAILED ANTICIPATION, NEGATIVE EVIDENCE FOR " + str(
-                            sentence))
-                    self.NARS.global_buffer.PUT_NEW(Task(sentence))
-                self.anticipations_queue.pop(i)
-                self.current_anticipation = None
-                i -= 1
-            else:
-                self.anticipations_queue[i][0] -= 1
-
-            i += 1
+        anticipated_postcondition_concept = self.NARS.memory.peek_concept(anticipated_postcondition)
+        if anticipated_postcondition_concept.is_positive():
+            # confirmed
+            if Config.DEBUG: Global.Global.debug_print(
+                str(anticipated_postcondition_concept) + " SATISFIED - CONFIRMED ANTICIPATION" + str(
+                    best_prediction_concept.term))
+        else:
+            sentence = NALGrammar.Sentences.Judgment(statement=best_prediction_concept.term,
+                                                     value=NALGrammar.Values.TruthValue(frequency=0.0,
+                                                                                        confidence=Config.DEFAULT_DISAPPOINT_CONFIDENCE))
+            if Config.DEBUG:
+                Global.Global.debug_print(str(
+                    anticipated_postcondition_concept) + " DISAPPOINT - FAILED ANTICIPATION, NEGATIVE EVIDENCE FOR " + str(
+                    sentence))
+            self.NARS.global_buffer.PUT_NEW(Task(sentence))
+        self.current_anticipation = None
@@ -166,7 +166,9 @@ class Item:
         """
         key = None
         if isinstance(object, NARSMemory.Concept):
-            key = str(object.term)
+            # interned term ID, so every concept key is an int
+            assert object.id is not None, "ERROR: Concept " + str(object.term) + " needs a term ID to be keyed"
+            key = object.id
         elif isinstance(object, NALGrammar.Sentences.Sentence):
             key = str(object.stamp.id)
         else:
@@ -202,10 +204,10 @@ class Item:
             dict[NARSGUI.NARSGUI.KEY_EXPECTATION] = self.object.get_expectation()
             dict[NARSGUI.NARSGUI.KEY_LIST_BELIEFS] = [str(belief[0]) for belief in self.object.belief_table]
             dict[NARSGUI.NARSGUI.KEY_LIST_DESIRES] = [str(desire[0]) for desire in self.object.desire_table]
-            dict[NARSGUI.NARSGUI.KEY_LIST_TERM_LINKS] = [str(termlink.object) for termlink in self.object.term_links]
-            dict[NARSGUI.NARSGUI.KEY_LIST_PREDICTION_LINKS] = [str(predictionlink.object) for predictionlink in
+            dict[NARSGUI.NARSGUI.KEY_LIST_TERM_LINKS] = [str(termlink) for termlink in self.object.term_links]
+            dict[NARSGUI.NARSGUI.KEY_LIST_PREDICTION_LINKS] = [str(predictionlink) for predictionlink in
                                                                self.object.prediction_links]
-            dict[NARSGUI.NARSGUI.KEY_LIST_EXPLANATION_LINKS] = [str(explanationlink.object) for explanationlink in
+            dict[NARSGUI.NARSGUI.KEY_LIST_EXPLANATION_LINKS] = [str(explanationlink) for explanationlink in
                                                                 self.object.explanation_links]
             dict[NARSGUI.NARSGUI.KEY_CAPACITY_BELIEFS] = str(self.object.belief_table.capacity)
             dict[NARSGUI.NARSGUI.KEY_CAPACITY_DESIRES] = str(self.object.desire_table.capacity)
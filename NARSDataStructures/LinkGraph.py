@@ -0,0 +1,343 @@
+"""
+    Created: October 19, 2026
+    Purpose: Memory-wide store of the links between concepts, in compressed adjacency arrays.
+
+        Each relation (e.g. prediction links) keeps every node's links in one array of target rows
+        and one parallel array of link priorities, with each node's links in a contiguous slice.
+        A node's slice has room to grow; when it is full, it is moved to the end of the arrays with
+        double the room, so appends are amortised O(1). The holes left behind are reclaimed by
+        periodically compacting the arrays.
+
+        A removed node's row is freed in two steps: its own links are cleared at once, but links to it from
+        other nodes are only skipped (the row is a tombstone) until enough rows are dead to purge them all in
+        one pass. Purged rows are then reused by new nodes.
+"""
+import random
+
+import numpy as np
+
+import Config
+
+
+class Adjacency:
+    """
+        Compressed adjacency arrays for one relation.
+        Row r's links are targets[starts[r]:starts[r] + lengths[r]], with room for capacities[r] links.
+    """
+    MIN_ROW_CAPACITY = 2
+
+    def __init__(self):
+        self.starts = np.zeros(8, dtype=np.int64)
+        self.lengths = np.zeros(8, dtype=np.int64)
+        self.capacities = np.zeros(8, dtype=np.int64)
+        self.targets = np.zeros(64, dtype=np.int64)  # target node row of each link
+        self.priorities = np.zeros(64, dtype=np.float64)  # priority of each link
+        self.end = 0  # the arrays are free from here on
+        self.number_of_links = 0
+
+    def get_slice(self, row):
+        """
+            :return: (start, length) of the row's links
+        """
+        if row is None or row >= len(self.starts): return 0, 0
+        return int(self.starts[row]), int(self.lengths[row])
+
+    def find(self, row, target_row):
+        """
+            :return: index of the link from row to target_row in the arrays; None if there is no such link
+        """
+        start, length = self.get_slice(row)
+        if length == 0 or target_row is None: return None
+        matches = self.targets[start:start + length] == target_row
+        i = int(matches.argmax())
+        if not matches[i]: return None
+        return start + i
+
+    def append(self, row, target_row, priority, row_capacity):
+        """
+            Add a link to the end of the row, moving the row if it has no room left.
+            If the row already has row_capacity links, the lowest priority link is replaced instead.
+        """
+        self._ensure_rows(row + 1)
+        start, length = int(self.starts[row]), int(self.lengths[row])
+        if length >= row_capacity:
+            i = start + int(np.argmin(self.priorities[start:start + length]))
+            self.targets[i] = target_row
+            self.priorities[i] = priority
+            return
+
+        if length == self.capacities[row]:
+            start = self._move_row(row, min(max(Adjacency.MIN_ROW_CAPACITY, 2 * length), row_capacity))
+
+        self.targets[start + length] = target_row
+        self.priorities[start + length] = priority
+        self.lengths[row] = length + 1
+        self.number_of_links += 1
+
+    def remove(self, row, i):
+        """
+            Remove the link at index i of the arrays from its row, moving the row's last link into its place
+        """
+        start, length = int(self.starts[row]), int(self.lengths[row])
+        last = start + length - 1
+        self.targets[i] = self.targets[last]
+        self.priorities[i] = self.priorities[last]
+        self.lengths[row] = length - 1
+        self.number_of_links -= 1
+
+    def clear_row(self, row):
+        if row is None or row >= len(self.lengths): return
+        self.number_of_links -= int(self.lengths[row])
+        self.lengths[row] = 0
+
+    def compact(self, removed_targets=None):
+        """
+            Copy every row's links into new arrays with no holes, leaving each row with no room to spare
+
+            :param removed_targets: boolean array indexed by node row; links to rows marked True are dropped
+        """
+        rows = np.flatnonzero(self.lengths)
+        lengths = self.lengths[rows]
+        offsets = np.zeros(len(rows), dtype=np.int64)
+        if len(rows) > 0: offsets[1:] = np.cumsum(lengths)[:-1]
+        # index in the old arrays of each link, in its new order
+        old_indices = np.repeat(self.starts[rows] - offsets, lengths) + np.arange(self.number_of_links)
+
+        if removed_targets is not None:
+            keep = ~removed_targets[self.targets[old_indices]]
+            lengths = np.bincount(np.repeat(np.arange(len(rows)), lengths)[keep], minlength=len(rows))
+            old_indices = old_indices[keep]
+            self.number_of_links = len(old_indices)
+            self.lengths[rows] = lengths
+
+        new_starts = np.zeros(len(rows), dtype=np.int64)
+        if len(rows) > 0: new_starts[1:] = np.cumsum(lengths)[:-1]
+
+        size = max(64, 2 * self.number_of_links)
+        targets = np.zeros(size, dtype=np.int64)
+        priorities = np.zeros(size, dtype=np.float64)
+        targets[:self.number_of_links] = self.targets[old_indices]
+        priorities[:self.number_of_links] = self.priorities[old_indices]
+
+        self.targets, self.priorities = targets, priorities
+        self.starts[:] = 0
+        self.capacities[:] = 0
+        self.starts[rows] = new_starts
+        self.capacities[rows] = lengths
+        self.end = self.number_of_links
+
+    def _move_row(self, row, new_capacity):
+        """
+            Move a row to the end of the arrays, with room for new_capacity links
+
+            :return: new start of the row
+        """
+        if self.end + new_capacity > len(self.targets):
+            if self.end > 2 * self.number_of_links:
+                self.compact()  # more than half of the arrays are holes
+            if self.end + new_capacity > len(self.targets):
+                size = max(2 * len(self.targets), self.end + new_capacity)
+                self.targets = np.resize(self.targets, size)
+                self.priorities = np.resize(self.priorities, size)
+
+        start, length = int(self.starts[row]), int(self.lengths[row])
+        new_start = self.end
+        self.targets[new_start:new_start + length] = self.targets[start:start + length]
+        self.priorities[new_start:new_start + length] = self.priorities[start:start + length]
+        self.starts[row] = new_start
+        self.capacities[row] = new_capacity
+        self.end += new_capacity
+        return new_start
+
+    def _ensure_rows(self, number_of_rows):
+        if number_of_rows <= len(self.starts): return
+        size = max(2 * len(self.starts), number_of_rows)
+        for name in ("starts", "lengths", "capacities"):
+            array = np.zeros(size, dtype=np.int64)
+            array[:len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, array)
+
+
+class LinkGraph:
+    """
+        The links between nodes (concepts) of a Memory, for each relation.
+
+        Nodes get a dense row the first time they are linked, stored in their link_row attribute,
+        and the graph keeps each node by its row to return linked nodes.
+    """
+    MIN_DEAD_ROWS_TO_PURGE = 64
+
+    def __init__(self, relations, row_capacity=Config.CONCEPT_LINK_CAPACITY, rng=None):
+        """
+        :param relations: names of the relations, e.g. ("prediction_links", "explanation_links")
+        :param row_capacity: most links a node can have in each relation; its lowest priority link is replaced after that
+        :param rng: random.Random used to peek links; the global random module by default
+        """
+        self.rng = random if rng is None else rng
+        self.row_capacity = row_capacity
+        self.nodes = []  # row -> node; None for rows that are dead or free
+        self.alive = np.zeros(8, dtype=bool)  # row -> if it holds a node
+        self.dead_rows = []  # rows of removed nodes, which other nodes may still link to
+        self.free_rows = []  # rows nothing links to, to reuse for new nodes
+        self.adjacencies = {relation: Adjacency() for relation in relations}
+
+    def __len__(self):
+        return sum(adjacency.number_of_links for adjacency in self.adjacencies.values())
+
+    def get_row(self, node):
+        """
+            :return: the node's row, assigning it a free row (or the next row) if it has none
+        """
+        if node.link_row is None:
+            if len(self.free_rows) > 0:
+                row = self.free_rows.pop()
+                self.nodes[row] = node
+            else:
+                row = len(self.nodes)
+                self.nodes.append(node)
+                if row >= len(self.alive):
+                    self.alive = np.concatenate((self.alive, np.zeros(len(self.alive), dtype=bool)))
+            self.alive[row] = True
+            node.link_row = row
+        return node.link_row
+
+    def add_link(self, relation, node, target_node, priority):
+        """
+            Link node to target_node, or set the link's priority if they are already linked
+        """
+        adjacency = self.adjacencies[relation]
+        i = adjacency.find(node.link_row, target_node.link_row)
+        if i is not None:
+            adjacency.priorities[i] = priority
+            return
+        adjacency.append(self.get_row(node), self.get_row(target_node), priority, self.row_capacity)
+
+    def remove_link(self, relation, node, target_node):
+        """
+            :return: True if the link existed and was removed
+        """
+        adjacency = self.adjacencies[relation]
+        i = adjacency.find(node.link_row, target_node.link_row)
+        if i is None: return False
+        adjacency.remove(node.link_row, i)
+        return True
+
+    def remove_node(self, node):
+        """
+            Remove a node and all of its links, e.g. when it is evicted.
+            Links to the node from other nodes are ignored from now on and dropped at the next purge.
+        """
+        row = node.link_row
+        if row is None: return
+        for adjacency in self.adjacencies.values():
+            adjacency.clear_row(row)
+        self.nodes[row] = None
+        self.alive[row] = False
+        self.dead_rows.append(row)
+        node.link_row = None
+        if len(self.dead_rows) >= max(LinkGraph.MIN_DEAD_ROWS_TO_PURGE, len(self.nodes) // 4):
+            self.purge_dead_rows()
+
+    def purge_dead_rows(self):
+        """
+            Drop every link to a dead row, compacting the arrays, and free the dead rows for reuse
+        """
+        if len(self.dead_rows) == 0: return
+        removed_targets = ~self.alive
+        for adjacency in self.adjacencies.values():
+            adjacency.compact(removed_targets=removed_targets)
+        self.free_rows += self.dead_rows
+        self.dead_rows = []
+
+    def compact(self):
+        for adjacency in self.adjacencies.values():
+            adjacency.compact()
+
+    def get_view(self, relation, node):
+        return LinkView(self, relation, node)
+
+
+class LinkView:
+    """
+        One node's links in one relation of a LinkGraph.
+        Iterating or peeking it gives the linked nodes themselves.
+    """
+    __slots__ = ("graph", "relation", "adjacency", "node")
+
+    def __init__(self, graph, relation, node):
+        self.graph = graph
+        self.relation = relation
+        self.adjacency = graph.adjacencies[relation]
+        self.node = node
+
+    def _get_links(self):
+        """
+            :return: (target rows, priorities) of the links, skipping links to dead rows
+        """
+        start, length = self.adjacency.get_slice(self.node.link_row)
+        targets = self.adjacency.targets[start:start + length]
+        priorities = self.adjacency.priorities[start:start + length]
+        if len(self.graph.dead_rows) > 0:
+            alive = self.graph.alive[targets]
+            if not alive.all(): return targets[alive], priorities[alive]
+        return targets, priorities
+
+    def __len__(self):
+        if len(self.graph.dead_rows) == 0: return self.adjacency.get_slice(self.node.link_row)[1]
+        return len(self._get_links()[0])
+
+    def __iter__(self):
+        nodes = self.graph.nodes
+        return iter([nodes[row] for row in self._get_links()[0].tolist()])
+
+    def __contains__(self, node):
+        return self.adjacency.find(self.node.link_row, node.link_row) is not None
+
+    @property
+    def capacity(self):
+        return self.graph.row_capacity
+
+    def get_priorities(self):
+        """
+            :return: array of the link priorities, in the order the links are iterated
+        """
+        return self._get_links()[1]
+
+    def get_priority(self, node):
+        i = self.adjacency.find(self.node.link_row, node.link_row)
+        if i is None: return None
+        return float(self.adjacency.priorities[i])
+
+    def peek(self, node=None):
+        """
+            Peek a linked node.
+            If node is None, peeks probabilistically, in proportion to the link priorities
+
+            :return: the linked node; None if there are no links, or the given node is not linked
+        """
+        if node is not None: return node if node in self else None
+        targets, priorities = self._get_links()
+        length = len(targets)
+        if length == 0: return None
+        cumulative_priorities = np.cumsum(priorities)
+        if cumulative_priorities[-1] <= 0:
+            i = self.graph.rng.randrange(length)
+        else:
+            i = min(int(np.searchsorted(cumulative_priorities, self.graph.rng.random() * cumulative_priorities[-1],
+                                        side="right")), length - 1)
+        return self.graph.nodes[int(targets[i])]
+
+    def add(self, node, priority):
+        self.graph.add_link(self.relation, self.node, node, priority)
+
+    def remove(self, node):
+        """
+            :return: the unlinked node
+        """
+        assert self.graph.remove_link(self.relation, self.node, node), "ERROR: " + str(node) + " is not linked"
+        return node
+
+    def change_priority(self, node, new_priority):
+        i = self.adjacency.find(self.node.link_row, node.link_row)
+        assert i is not None, "ERROR: " + str(node) + " is not linked"
+        self.adjacency.priorities[i] = new_priority
@@ -1,4 +1,8 @@
+import collections
+import heapq
+import itertools
 import random
+import threading
 import timeit as time
 from typing import List
 
@@ -87,7 +91,11 @@ class Table(Depq):
         It purges lowest-confidence items when it overflows.
     """
 
-    def __init__(self, item_type, capacity=Config.TABLE_DEFAULT_CAPACITY):
+    def __init__(self, item_type, capacity=Config.TABLE_DEFAULT_CAPACITY, rng=None):
+        """
+        :param rng: random.Random to draw random peeks from; the global random module by default
+        """
+        self.rng = random if rng is None else rng
         self.item_type = item_type
         self.capacity = capacity
         Depq.__init__(self)
@@ -147,7 +155,7 @@ class Table(Depq):
             Returns None if depq is empty
         """
         if len(self) == 0: return None
-        return random.choice(self)
+        return self.rng.choice(self)
 
     def peek_highest_confidence_interactable(self, j):
         """
@@ -164,16 +172,481 @@ class Table(Depq):
         return None
 
 
+class InputQueue:
+    """
+        Thread-safe, bounded FIFO queue of pending input.
+
+        Each input source (e.g. the shell, the GUI, a file) has a priority.
+        Input from higher-priority sources is taken first; input from the same priority is taken oldest first.
+        When the queue is full, the overflow policy decides what is lost:
+            OVERFLOW_DROP_OLDEST - drop the oldest input of the lowest non-empty priority to make room
+            OVERFLOW_REJECT_NEWEST - refuse the new input; put() returns False so the producer can back off
+    """
+    OVERFLOW_DROP_OLDEST = "drop_oldest"
+    OVERFLOW_REJECT_NEWEST = "reject_newest"
+
+    def __init__(self, capacity, overflow_policy=OVERFLOW_DROP_OLDEST, source_priorities=None):
+        """
+        :param capacity: maximum number of inputs waiting in the queue
+        :param overflow_policy: OVERFLOW_DROP_OLDEST or OVERFLOW_REJECT_NEWEST
+        :param source_priorities: dict of source name -> priority (higher is taken first); unlisted sources get 0
+        """
+        assert overflow_policy in (InputQueue.OVERFLOW_DROP_OLDEST, InputQueue.OVERFLOW_REJECT_NEWEST), \
+            "ERROR: Unknown input queue overflow policy " + str(overflow_policy)
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.source_priorities = source_priorities if source_priorities is not None else {}
+        self.queues = {}  # priority -> deque of (data, time it was put); only non-empty priorities
+        self.count = 0
+        self.lock = threading.Lock()
+
+        # metrics
+        self.number_put = 0
+        self.number_taken = 0
+        self.number_dropped = 0  # dropped or rejected on overflow
+        self.max_depth = 0
+        self.total_latency = 0.0  # seconds between putting and taking, summed over taken inputs
+        self.max_latency = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def put(self, data, source=None):
+        """
+            Put input at the end of its source's queue.
+
+            :param data: input to queue
+            :param source: name of the input source, for its priority
+            :return: True if the input was queued; False if it was rejected because the queue is full
+        """
+        priority = self.source_priorities.get(source, 0)
+        with self.lock:
+            if self.count == self.capacity:
+                self.number_dropped += 1
+                if self.overflow_policy == InputQueue.OVERFLOW_REJECT_NEWEST: return False
+                lowest_priority = min(self.queues)
+                if lowest_priority > priority: return False  # everything queued is more important
+                self._take_from_queue(lowest_priority)
+
+            if priority not in self.queues: self.queues[priority] = collections.deque()
+            self.queues[priority].append((data, time.default_timer()))
+            self.count += 1
+            self.number_put += 1
+            self.max_depth = max(self.max_depth, self.count)
+        return True
+
+    def take(self):
+        """
+            Take the oldest input of the highest-priority source with input waiting
+
+            :return: the input; None if the queue is empty
+        """
+        with self.lock:
+            if self.count == 0: return None
+            data, put_time = self._take_from_queue(max(self.queues))
+            latency = time.default_timer() - put_time
+            self.number_taken += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+        return data
+
+    def _take_from_queue(self, priority):
+        queue = self.queues[priority]
+        entry = queue.popleft()
+        if len(queue) == 0: del self.queues[priority]
+        self.count -= 1
+        return entry
+
+    def get_statistics_string(self):
+        average_latency = self.total_latency / self.number_taken if self.number_taken > 0 else 0.0
+        return "Input queue: " + str(len(self)) + "/" + str(self.capacity) + " waiting (max " + str(self.max_depth) + "), " \
+               + str(self.number_put) + " put, " \
+               + str(self.number_taken) + " taken, " \
+               + str(self.number_dropped) + " dropped, " \
+               + "latency avg " + "{:.1f}".format(average_latency * 1000) + "ms / max " \
+               + "{:.1f}".format(self.max_latency * 1000) + "ms"
+
+
+class Scheduler:
+    """
+        Min-heap of callbacks keyed by the working cycle they are due,
+        so each cycle only touches the entries that are due.
+
+        Entries belong to a group (e.g. "operation"), which can be counted or cancelled as a whole.
+        Cancelled entries are left in the heap and skipped when they come due.
+    """
+
+    def __init__(self):
+        self.heap = []  # entries: [due cycle, sequence number, group, callback, args]; callback None if cancelled
+        self.next_sequence_number = itertools.count()  # keeps entries due the same cycle in scheduling order
+        self.entries_by_group = {}  # group -> set of ids of its pending entries
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.entries_by_group.values())
+
+    def count(self, group):
+        return len(self.entries_by_group.get(group, ()))
+
+    def schedule(self, due_cycle, group, callback, *args):
+        """
+            :param due_cycle: working cycle in which to call the callback
+            :param group: group of the entry
+            :param callback: called with args when the entry is due
+            :return: the scheduled entry, for cancel()
+        """
+        entry = [due_cycle, next(self.next_sequence_number), group, callback, args]
+        heapq.heappush(self.heap, entry)
+        self.entries_by_group.setdefault(group, set()).add(id(entry))
+        return entry
+
+    def cancel(self, entry):
+        if entry[3] is None: return  # already run or cancelled
+        entry[3] = None
+        self._remove_from_group(entry)
+
+    def cancel_group(self, group):
+        """
+            Cancel every pending entry in the group.
+        """
+        if group not in self.entries_by_group: return
+        del self.entries_by_group[group]
+        for entry in self.heap:
+            if entry[2] == group: entry[3] = None
+
+    def run_due(self, current_cycle):
+        """
+            Call the callback of every entry due at or before the current cycle, earliest first.
+            Entries scheduled by these callbacks are run too, if they are already due.
+
+            :return: the number of callbacks called
+        """
+        number_run = 0
+        heap = self.heap
+        while len(heap) > 0 and heap[0][0] <= current_cycle:
+            entry = heapq.heappop(heap)
+            _, _, _, callback, args = entry
+            if callback is None: continue  # cancelled
+            entry[3] = None
+            self._remove_from_group(entry)
+            callback(*args)
+            number_run += 1
+        return number_run
+
+    def _remove_from_group(self, entry):
+        group = entry[2]
+        entries = self.entries_by_group[group]
+        entries.discard(id(entry))
+        if len(entries) == 0: del self.entries_by_group[group]
+
+
+class QuestionSubscriptions:
+    """
+        Standing questions, keyed by statement term.
+
+        Each subscription has a callback, which is called with every better answer to its question
+        (judged by the Choice rule against the last answer it was given).
+        To receive answers through a queue instead, subscribe with the queue's put method.
+    """
+
+    def __init__(self):
+        self.subscriptions = {}  # statement term -> list of subscriptions ([callback, last answer given])
+
+    def __len__(self):
+        return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+    def is_watched(self, statement):
+        return statement in self.subscriptions
+
+    def subscribe(self, statement, callback):
+        """
+            :param statement: statement term of the question
+            :param callback: called with each better answer Judgment
+            :return: subscription, to pass to unsubscribe()
+        """
+        subscription = [callback, None]
+        self.subscriptions.setdefault(statement, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, statement, subscription):
+        self.subscriptions[statement].remove(subscription)
+        if len(self.subscriptions[statement]) == 0: del self.subscriptions[statement]
+
+    def notify(self, statement, best_answer):
+        """
+            Give the statement's subscribers its current best answer, if it is better than the last one they got.
+        """
+        for subscription in self.subscriptions.get(statement, ()):
+            callback, last_answer = subscription
+            if last_answer is best_answer: continue
+            if last_answer is not None and NALInferenceRules.Local.Choice(last_answer, best_answer) is last_answer: continue
+            subscription[1] = best_answer
+            callback(best_answer)
+
+
+class SubtermIndex:
+    """
+        Inverted index from a subterm ID to the IDs of the statement concepts containing it,
+        by the subterm's position (subject or predicate) and the statement's copula.
+
+        Statements are added and removed in O(1). Each bucket holds a list of statement IDs,
+        to pick from at random, and a dict of their indices, so one can be swapped out of the middle.
+    """
+    SUBJECT = 0
+    PREDICATE = 1
+
+    def __init__(self):
+        self.buckets = {}  # subterm ID -> {(position, copula): ([statement ID], {statement ID: index in the list})}
+
+    def __len__(self):
+        return sum(len(statement_ids) for buckets in self.buckets.values() for statement_ids, _ in buckets.values())
+
+    def add(self, statement_id, subject_id, predicate_id, copula):
+        """
+            Index a statement under its subject and predicate
+
+            :param statement_id: ID of the statement concept
+            :param subject_id: ID of the statement's subject term
+            :param predicate_id: ID of the statement's predicate term
+            :param copula: the statement's copula
+        """
+        self._add(subject_id, (SubtermIndex.SUBJECT, copula), statement_id)
+        self._add(predicate_id, (SubtermIndex.PREDICATE, copula), statement_id)
+
+    def remove(self, statement_id, subject_id, predicate_id, copula):
+        """
+            Remove a statement indexed by add(), e.g. when its concept is evicted
+        """
+        self._remove(subject_id, (SubtermIndex.SUBJECT, copula), statement_id)
+        self._remove(predicate_id, (SubtermIndex.PREDICATE, copula), statement_id)
+
+    def clear(self):
+        self.buckets.clear()
+
+    def contains_subterm(self, subterm_id):
+        """
+            :return: If any indexed statement contains the subterm
+        """
+        return subterm_id in self.buckets
+
+    def get_statement_ids(self, subterm_id, position=None, copulas=None):
+        """
+            :param position: SUBJECT or PREDICATE; either by default
+            :param copulas: collection of copulas the statements may have; any by default
+            :return: list of the IDs of the statements containing the subterm
+        """
+        statement_ids = []
+        for bucket_ids, _ in self._get_buckets(subterm_id, position, copulas):
+            statement_ids.extend(bucket_ids)
+        return statement_ids
+
+    def get_random_statement_id(self, subterm_id, rng, position=None, copulas=None, exclude_id=None):
+        """
+            Pick a statement containing the subterm uniformly at random,
+            without gathering the candidates out of their buckets.
+
+            :param rng: random.Random to draw from
+            :param exclude_id: statement ID never to return, e.g. that of the statement looking for related statements
+            :return: statement ID; None if there is no candidate
+        """
+        buckets = self._get_buckets(subterm_id, position, copulas)
+        number_of_candidates = 0
+        for bucket_ids, indices in buckets:
+            number_of_candidates += len(bucket_ids) - (exclude_id in indices)
+        if number_of_candidates == 0: return None
+
+        i = rng.randrange(number_of_candidates)
+        for bucket_ids, indices in buckets:
+            excluded_index = indices.get(exclude_id)
+            if excluded_index is not None and i >= excluded_index: i += 1  # skip over the excluded statement
+            if i < len(bucket_ids): return bucket_ids[i]
+            i -= len(bucket_ids)
+        return None
+
+    def _get_buckets(self, subterm_id, position, copulas):
+        buckets = self.buckets.get(subterm_id)
+        if buckets is None: return []
+        return [bucket for (bucket_position, copula), bucket in buckets.items()
+                if (position is None or bucket_position == position) and (copulas is None or copula in copulas)]
+
+    def _add(self, subterm_id, bucket_key, statement_id):
+        bucket_ids, indices = self.buckets.setdefault(subterm_id, {}).setdefault(bucket_key, ([], {}))
+        if statement_id in indices: return
+        indices[statement_id] = len(bucket_ids)
+        bucket_ids.append(statement_id)
+
+    def _remove(self, subterm_id, bucket_key, statement_id):
+        buckets = self.buckets.get(subterm_id)
+        if buckets is None or bucket_key not in buckets: return
+        bucket_ids, indices = buckets[bucket_key]
+        if statement_id not in indices: return
+        # swap the last statement into the removed one's place
+        i = indices.pop(statement_id)
+        last_statement_id = bucket_ids.pop()
+        if last_statement_id != statement_id:
+            bucket_ids[i] = last_statement_id
+            indices[last_statement_id] = i
+        if len(bucket_ids) == 0:
+            del buckets[bucket_key]
+            if len(buckets) == 0: del self.buckets[subterm_id]
+
+
+class DiscriminationTree:
+    """
+        Term trie, for finding the stored terms that may unify with a term containing variables.
+
+        A term is stored along the path of its keys in preorder: (kind, number of subterms) for a compound or statement,
+        the term itself for an atomic or spatial term, and VARIABLE for any variable.
+        A variable in the query skips a whole stored subterm, and a stored variable skips a whole query subterm,
+        so only terms matching the query everywhere but at variables are reached.
+        The candidates are then checked with NALGrammar.Terms.unify().
+
+        Skipping a subterm visits every stored subterm at that position, so a variable early in the keys
+        (e.g. the subject of (?x --> bird)) would visit most of the tree.
+        So terms are stored in two tries: one visiting subterms left to right, and one right to left,
+        and a query walks the trie where its first variable comes last.
+    """
+    VARIABLE = "*"
+    TERMS = None  # node key of the terms stored at a node
+
+    def __init__(self):
+        self.roots = ({}, {})  # subterms left to right, right to left; node: key -> child node, and TERMS -> {term: value}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def put(self, term, value):
+        """
+            Store a value for a term, replacing any value already stored for it
+        """
+        for reverse, root in enumerate(self.roots):
+            node = root
+            for key in self._get_keys(term, reverse):
+                node = node.setdefault(key, {})
+            terms = node.setdefault(DiscriminationTree.TERMS, {})
+            if not reverse and term not in terms: self.count += 1
+            terms[term] = value
+
+    def remove(self, term):
+        """
+            Remove a term, and the nodes left without terms
+        """
+        for reverse, root in enumerate(self.roots):
+            path = [root]
+            keys = self._get_keys(term, reverse)
+            for key in keys:
+                node = path[-1].get(key)
+                if node is None: return
+                path.append(node)
+            terms = path[-1].get(DiscriminationTree.TERMS)
+            if terms is None or term not in terms: return
+            del terms[term]
+            if not reverse: self.count -= 1
+            if len(terms) == 0: del path[-1][DiscriminationTree.TERMS]
+            for depth in range(len(keys), 0, -1):
+                if len(path[depth]) > 0: break
+                del path[depth - 1][keys[depth - 1]]
+
+    def get_candidates(self, term):
+        """
+            :return: list of (stored term, value) that match the term except at variables
+        """
+        keys = self._get_keys(term, reverse=False)
+        reversed_keys = self._get_keys(term, reverse=True)
+        if self._get_first_variable_index(reversed_keys) > self._get_first_variable_index(keys):
+            return self._get_candidates(self.roots[1], reversed_keys)
+        return self._get_candidates(self.roots[0], keys)
+
+    def get_unifiable(self, term):
+        """
+            :return: list of (stored term, value) whose term unifies with the given term
+        """
+        return [(candidate, value) for candidate, value in self.get_candidates(term)
+                if NALGrammar.Terms.unify(term, candidate) is not None]
+
+    def _get_candidates(self, root, keys):
+        ends = self._get_subterm_ends(keys)
+        candidates = []
+        stack = [(root, 0)]
+        while len(stack) > 0:
+            node, i = stack.pop()
+            if i == len(keys):
+                candidates.extend(node.get(DiscriminationTree.TERMS, {}).items())
+                continue
+            key = keys[i]
+            if key is DiscriminationTree.VARIABLE:
+                for next_node in self._skip_terms(node, 1):
+                    stack.append((next_node, i + 1))
+                continue
+            child = node.get(key)
+            if child is not None: stack.append((child, i + 1))
+            variable_child = node.get(DiscriminationTree.VARIABLE)
+            if variable_child is not None: stack.append((variable_child, ends[i]))
+        return candidates
+
+    def _skip_terms(self, node, number_of_terms):
+        """
+            :return: generator of the nodes reached from node by skipping number_of_terms whole terms
+        """
+        if number_of_terms == 0:
+            yield node
+            return
+        for key, child in node.items():
+            if key is DiscriminationTree.TERMS: continue
+            if isinstance(key, tuple):
+                yield from self._skip_terms(child, number_of_terms - 1 + key[1])
+            else:
+                yield from self._skip_terms(child, number_of_terms - 1)
+
+    @staticmethod
+    def _get_keys(term, reverse, keys=None):
+        """
+            :param reverse: visit subterms right to left
+            :return: list of the term's keys in preorder
+        """
+        if keys is None: keys = []
+        if isinstance(term, NALGrammar.Terms.VariableTerm):
+            keys.append(DiscriminationTree.VARIABLE)
+        elif isinstance(term, (NALGrammar.Terms.StatementTerm, NALGrammar.Terms.CompoundTerm)) \
+                and not isinstance(term, NALGrammar.Terms.SpatialTerm):
+            keys.append((term.kind, len(term.subterms)))
+            for subterm in (reversed(term.subterms) if reverse else term.subterms):
+                DiscriminationTree._get_keys(subterm, reverse, keys)
+        else:
+            keys.append(term)
+        return keys
+
+    @staticmethod
+    def _get_first_variable_index(keys):
+        for i, key in enumerate(keys):
+            if key is DiscriminationTree.VARIABLE: return i
+        return len(keys)
+
+    @staticmethod
+    def _get_subterm_ends(keys):
+        """
+            :return: for each key, the index of the key after the subterm it starts
+        """
+        ends = [0] * len(keys)
+        for i in range(len(keys) - 1, -1, -1):
+            end = i + 1
+            if isinstance(keys[i], tuple):
+                for _ in range(keys[i][1]): end = ends[end]
+            ends[i] = end
+        return ends
+
+
 class Task:
     """
        NARS Task
     """
 
-    def __init__(self, sentence, is_input_task=False):
+    def __init__(self, sentence, is_input_task=False, origin=None):
         Asserts.assert_sentence(sentence)
         self.sentence = sentence
         self.creation_timestamp: int = Global.Global.get_current_cycle_number()  # save the task's creation time
         self.is_from_input: bool = is_input_task
+        self.origin = origin  # network client the input came from, to send answers back to; None otherwise
         # only used for question tasks
         self.needs_to_be_answered_in_output: bool = is_input_task
 
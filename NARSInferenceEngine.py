@@ -62,7 +62,7 @@ def do_semantic_inference_two_judgment(j1: NALGrammar.Sentences, j2: NALGrammar.
     ===============================================
     """
 
-    if j1.value.confidence == 0 or j2.value.confidence == 0:
+    if (not isinstance(j1, NALGrammar.Sentences.Question) and j1.value.confidence == 0) or j2.value.confidence == 0:
         if Config.DEBUG: Global.Global.debug_print("Can't do inference between negative premises")
         return [] # can't do inference with 2 entirely negative premises
 
@@ -86,7 +86,7 @@ def do_semantic_inference_two_judgment(j1: NALGrammar.Sentences, j2: NALGrammar.
         return all_derived_sentences
 
 
-    if j1.value.frequency == 0 or j2.value.frequency == 0:
+    if (not isinstance(j1, NALGrammar.Sentences.Question) and j1.value.frequency == 0) or j2.value.frequency == 0:
         if Config.DEBUG: Global.Global.debug_print("Can't do inference between negative premises")
         return [] # can't do inference with 2 entirely negative premises
 
@@ -168,7 +168,7 @@ def do_semantic_inference_two_judgment(j1: NALGrammar.Sentences, j2: NALGrammar.
                 """
                     j1 = M-->P, j2 = S-->M
                 """
-                if not j1.is_array and not j2.is_array:
+                if not j1.is_array() and not j2.is_array():
                     """
                     # Deduction
                     """
@@ -187,7 +187,7 @@ def do_semantic_inference_two_judgment(j1: NALGrammar.Sentences, j2: NALGrammar.
                     j1=M-->P
                     j2=M-->S
                 """
-                if not j1.is_array and not j2.is_array:
+                if not j1.is_array() and not j2.is_array():
                     """
                     # Induction
                     """
@@ -0,0 +1,87 @@
+"""
+    Created: October 19, 2026
+    Purpose: Lightweight counters and timers for the NARS working cycle.
+
+        Each phase of the working cycle is timed with one timer read at its end,
+        and the counters are plain integers, so instrumentation can stay on all the time.
+        The totals can be read as a snapshot, and are periodically appended to a file as JSON lines.
+"""
+import json
+import timeit
+
+import Config
+
+
+class Instrumentation:
+    """
+        Per-phase timers and counters for a NARS instance.
+    """
+    # working cycle phases
+    PHASE_INPUT_CHANNEL = "input_channel"
+    PHASE_GLOBAL_BUFFER = "global_buffer"
+    PHASE_CONSIDER = "consider"
+    PHASE_OPERATIONS = "operations"
+    PHASES = (PHASE_INPUT_CHANNEL, PHASE_GLOBAL_BUFFER, PHASE_CONSIDER, PHASE_OPERATIONS)
+
+    def __init__(self, NARS, log_interval=None, log_filename=None):
+        """
+        :param NARS: the NARS instance being measured
+        :param log_interval: working cycles between metrics JSON lines; 0 to not log. Config.METRICS_LOG_INTERVAL by default
+        :param log_filename: file to append JSON lines to; "" to print them. Config.METRICS_LOG_FILENAME by default
+        """
+        self.NARS = NARS
+        self.log_interval = Config.METRICS_LOG_INTERVAL if log_interval is None else log_interval
+        self.log_filename = Config.METRICS_LOG_FILENAME if log_filename is None else log_filename
+
+        self.start_time = timeit.default_timer()
+        self.phase_start_time = self.start_time
+        self.phase_seconds = dict.fromkeys(Instrumentation.PHASES, 0.0)
+
+        # counters
+        self.number_of_cycles = 0
+        self.number_of_tasks_processed = 0
+        self.number_of_derivations = 0
+
+    def start_cycle(self):
+        self.phase_start_time = timeit.default_timer()
+
+    def end_phase(self, phase):
+        """
+            Add the time since the previous phase ended (or the cycle started) to the phase.
+        """
+        now = timeit.default_timer()
+        self.phase_seconds[phase] += now - self.phase_start_time
+        self.phase_start_time = now
+
+    def end_cycle(self):
+        self.number_of_cycles += 1
+        if self.log_interval > 0 and self.number_of_cycles % self.log_interval == 0:
+            self.log_snapshot()
+
+    def snapshot(self):
+        """
+            :return: dict of the metrics totalled since this instrumentation was created
+        """
+        elapsed_seconds = timeit.default_timer() - self.start_time
+        memory = self.NARS.memory
+        return {
+            "cycle": self.NARS.current_cycle_number,
+            "elapsed_seconds": elapsed_seconds,
+            "cycles": self.number_of_cycles,
+            "cycles_per_second": self.number_of_cycles / elapsed_seconds if elapsed_seconds > 0 else 0.0,
+            "phase_seconds": dict(self.phase_seconds),
+            "tasks_processed": self.number_of_tasks_processed,
+            "derivations": self.number_of_derivations,
+            "concepts": len(memory),
+            "concepts_created": memory.number_of_concepts_created,
+            "concepts_evicted": memory.number_of_concepts_evicted,
+            "global_buffer": len(self.NARS.global_buffer)
+        }
+
+    def log_snapshot(self):
+        line = json.dumps(self.snapshot())
+        if self.log_filename == "":
+            print(line)
+            return
+        with open(self.log_filename, "a") as file:
+            file.write(line + "\n")
@@ -0,0 +1,140 @@
+"""
+    Created: October 19, 2026
+    Purpose: Read-only, memory-mapped store of background knowledge.
+
+        Large static knowledge bases are kept on disk in a columnar layout (one .npy file per column)
+        rather than as live Concepts. The files are memory-mapped read-only,
+        so several NARS processes can share one knowledge base without copying it.
+        Memory consults the store when a concept is missing, and promotes the entry into a live concept.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+import NALGrammar
+
+TERM_HASHES_FILENAME = "term_hashes.npy"  # uint64, sorted; row i describes the i-th smallest hash
+TERM_OFFSETS_FILENAME = "term_offsets.npy"  # uint64 (rows + 1); term i is term_blob[offsets[i]:offsets[i+1]]
+TERM_BLOB_FILENAME = "term_blob.npy"  # uint8; utf-8 term strings back to back
+FREQUENCY_FILENAME = "frequency.npy"  # float32
+CONFIDENCE_FILENAME = "confidence.npy"  # float32; 0 if the term has no belief (it is only a subterm)
+LINK_OFFSETS_FILENAME = "link_offsets.npy"  # uint64 (rows + 1); links of row i are link_targets[offsets[i]:offsets[i+1]]
+LINK_TARGETS_FILENAME = "link_targets.npy"  # uint32 row indices
+
+
+def hash_term_string(term_string):
+    """
+        Stable 64-bit hash of a term string (the built-in hash() differs between processes)
+    """
+    return int.from_bytes(hashlib.blake2b(term_string.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def build_knowledge_base(path, judgments):
+    """
+        Write a knowledge base directory from eternal Judgments.
+
+        Each statement gets a row holding its most confident truth-value.
+        Its subject and predicate get rows too, and are linked with the statement in both directions.
+
+        :param path: directory to write the columns into
+        :param judgments: iterable of Judgments
+        :return: number of rows written
+    """
+    truth_values = {}  # term string -> (frequency, confidence)
+    links = {}  # term string -> set of linked term strings
+
+    def add_row(term_string):
+        if term_string not in truth_values: truth_values[term_string] = (0.0, 0.0)
+        if term_string not in links: links[term_string] = set()
+
+    for j in judgments:
+        statement_string = str(j.statement)
+        add_row(statement_string)
+        if j.value.confidence > truth_values[statement_string][1]:
+            truth_values[statement_string] = (j.value.frequency, j.value.confidence)
+
+        if isinstance(j.statement, NALGrammar.Terms.StatementTerm):
+            for subterm in (j.statement.get_subject_term(), j.statement.get_predicate_term()):
+                subterm_string = str(subterm)
+                add_row(subterm_string)
+                links[statement_string].add(subterm_string)
+                links[subterm_string].add(statement_string)
+
+    term_strings = sorted(truth_values.keys(), key=hash_term_string)
+    row_of_term = {term_string: row for row, term_string in enumerate(term_strings)}
+
+    encoded_terms = [term_string.encode("utf-8") for term_string in term_strings]
+    term_offsets = np.zeros(len(term_strings) + 1, dtype=np.uint64)
+    term_offsets[1:] = np.cumsum([len(encoded) for encoded in encoded_terms])
+
+    link_offsets = np.zeros(len(term_strings) + 1, dtype=np.uint64)
+    link_offsets[1:] = np.cumsum([len(links[term_string]) for term_string in term_strings])
+    link_targets = np.fromiter((row_of_term[linked] for term_string in term_strings
+                                for linked in sorted(links[term_string])),
+                               dtype=np.uint32, count=int(link_offsets[-1]))
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, TERM_HASHES_FILENAME),
+            np.array([hash_term_string(term_string) for term_string in term_strings], dtype=np.uint64))
+    np.save(os.path.join(path, TERM_OFFSETS_FILENAME), term_offsets)
+    np.save(os.path.join(path, TERM_BLOB_FILENAME), np.frombuffer(b"".join(encoded_terms), dtype=np.uint8))
+    np.save(os.path.join(path, FREQUENCY_FILENAME),
+            np.array([truth_values[term_string][0] for term_string in term_strings], dtype=np.float32))
+    np.save(os.path.join(path, CONFIDENCE_FILENAME),
+            np.array([truth_values[term_string][1] for term_string in term_strings], dtype=np.float32))
+    np.save(os.path.join(path, LINK_OFFSETS_FILENAME), link_offsets)
+    np.save(os.path.join(path, LINK_TARGETS_FILENAME), link_targets)
+
+    return len(term_strings)
+
+
+class KnowledgeBase:
+    """
+        Read-only view of a knowledge base directory written by build_knowledge_base().
+
+        Rows are looked up by binary search over the sorted term hashes.
+    """
+
+    def __init__(self, path):
+        def load(filename):
+            return np.load(os.path.join(path, filename), mmap_mode="r")
+
+        self.path = path
+        self.term_hashes = load(TERM_HASHES_FILENAME)
+        self.term_offsets = load(TERM_OFFSETS_FILENAME)
+        self.term_blob = load(TERM_BLOB_FILENAME)
+        self.frequency = load(FREQUENCY_FILENAME)
+        self.confidence = load(CONFIDENCE_FILENAME)
+        self.link_offsets = load(LINK_OFFSETS_FILENAME)
+        self.link_targets = load(LINK_TARGETS_FILENAME)
+
+    def __len__(self):
+        return len(self.term_hashes)
+
+    def find_row(self, term_string):
+        """
+            :return: row of the term in the knowledge base; None if it is not stored
+        """
+        term_hash = np.uint64(hash_term_string(term_string))
+        row = int(np.searchsorted(self.term_hashes, term_hash, side="left"))
+        while row < len(self.term_hashes) and self.term_hashes[row] == term_hash:
+            if self.get_term_string(row) == term_string: return row
+            row += 1  # hash collision
+        return None
+
+    def get_term_string(self, row):
+        start, end = int(self.term_offsets[row]), int(self.term_offsets[row + 1])
+        return self.term_blob[start:end].tobytes().decode("utf-8")
+
+    def get_truth_value(self, row):
+        """
+            :return: (frequency, confidence) of the row's belief; None if it has no belief
+        """
+        confidence = float(self.confidence[row])
+        if confidence == 0.0: return None
+        return float(self.frequency[row]), confidence
+
+    def get_linked_rows(self, row):
+        start, end = int(self.link_offsets[row]), int(self.link_offsets[row + 1])
+        return self.link_targets[start:end]
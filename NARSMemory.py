@@ -9,15 +9,20 @@ import Global
 import NALGrammar
 import NALSyntax
 import NARSDataStructures.Bag
+import NARSDataStructures.LinkGraph
 import NARSDataStructures.Other
 import NARSDataStructures.ItemContainers
 import NALInferenceRules
+import NARSKnowledgeBase
 """
     Author: Christian Hahm
     Created: October 9, 2020
     Purpose: Defines NARS internal memory
 """
 
+FIRST_ORDER_COPULAS = frozenset(copula for copula in NALSyntax.Copula if NALSyntax.Copula.is_first_order(copula))
+HIGHER_ORDER_COPULAS = frozenset(NALSyntax.Copula) - FIRST_ORDER_COPULAS
+
 
 class Memory:
     """
@@ -26,14 +31,36 @@ class Memory:
     next_stamp_id = 0
     next_percept_id = 0
 
-    def __init__(self):
+    def __init__(self, rng=None):
+        """
+        :param rng: random.Random that the memory and its concepts draw from; the global random module by default
+        """
+        self.rng = random if rng is None else rng
         self.concepts_bag = NARSDataStructures.Bag.Bag(item_type=Concept,
                                                        capacity=Config.MEMORY_CONCEPT_CAPACITY,
-                                                       granularity=10000)
+                                                       granularity=10000,
+                                                       rng=self.rng)
+        self.term_ids = {}  # term -> dense integer ID, the key of the term's concept
+        self.terms_by_id = []  # term ID -> term, for display; None for released IDs
+        self.free_term_ids = []  # released term IDs, to reuse for new terms
+        self.subterm_index = NARSDataStructures.Other.SubtermIndex()  # subterm ID -> IDs of the statement concepts containing it
+        self.link_graph = NARSDataStructures.LinkGraph.LinkGraph(LINK_RELATIONS, rng=self.rng)  # links between concepts
+        self.term_index = NARSDataStructures.Other.DiscriminationTree()  # concept terms, to find those unifying with a term
+        self.write_ahead_log = None  # records concept creation when persistence is enabled
+        self.knowledge_base = None  # read-only background knowledge, consulted when a concept is missing
+        self.knowledge_base_hits = {}  # knowledge base row -> lookups as a related statement, while not promoted
+        self.number_of_concepts_created = 0
+        self.number_of_concepts_evicted = 0  # lowest priority concepts purged to make room for new ones
 
     def __len__(self):
         return self.get_number_of_concepts()
 
+    def attach_knowledge_base(self, path):
+        """
+            Use a memory-mapped knowledge base (see NARSKnowledgeBase) as background knowledge.
+        """
+        self.knowledge_base = NARSKnowledgeBase.KnowledgeBase(path)
+
     def get_random_concept(self):
         """
             Probabilistically peek the concepts
@@ -46,6 +73,57 @@ class Memory:
         """
         return self.concepts_bag.peek()
 
+    def get_term_id(self, term):
+        """
+            Intern a term: get the dense integer ID that keys its concept,
+            assigning a released ID (or the next ID) the first time the term is seen.
+            The ID is kept while the term's concept is in memory or the subterm index refers to it,
+            then released by release_term_id_if_unused().
+        """
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            if len(self.free_term_ids) > 0:
+                term_id = self.free_term_ids.pop()
+                self.terms_by_id[term_id] = term
+            else:
+                term_id = len(self.terms_by_id)
+                self.terms_by_id.append(term)
+            self.term_ids[term] = term_id
+        return term_id
+
+    def release_term_id_if_unused(self, term_id):
+        """
+            Release a term ID for reuse, unless a concept in memory or the subterm index still refers to it.
+            Only call this once the links and indexes of the term's evicted concept are cleared,
+            so nothing can mistake the ID's next term for this one.
+        """
+        if term_id is None: return
+        if term_id in self.concepts_bag.item_lookup_dict or self.subterm_index.contains_subterm(term_id): return
+        term = self.terms_by_id[term_id]
+        if term is None: return
+        del self.term_ids[term]
+        self.terms_by_id[term_id] = None
+        self.free_term_ids.append(term_id)
+
+    def get_term_from_id(self, term_id):
+        return self.terms_by_id[term_id]
+
+    def get_concept_key(self, term):
+        """
+            :return: key of the term's concept in the concepts bag; None if the term has no ID
+        """
+        return self.term_ids.get(term)
+
+    def peek_existing_concept_item(self, term):
+        """
+            Peek the concept item named by a term, without creating it
+
+            :return: Concept item; None if the concept is not in memory
+        """
+        concept_key = self.get_concept_key(term)
+        if concept_key is None: return None
+        return self.concepts_bag.peek(concept_key)
+
     def get_number_of_concepts(self):
         """
             Get the number of concepts that exist in memory
@@ -60,17 +138,30 @@ class Memory:
             :returns New Concept item created from the term
         """
         Asserts.assert_term(term)
-        concept_key = NARSDataStructures.ItemContainers.Item.get_key_from_object(term)
+        if len(self.concepts_bag) == self.concepts_bag.capacity:
+            # purge the lowest quality concept to make room,
+            # before interning the term, so the term can't get an ID released by the purge while it is still used
+            purged_item = self.concepts_bag._TAKE_MIN()
+            if purged_item is not None:
+                self.unindex_concept(purged_item.object)
+                self.link_graph.remove_node(purged_item.object)
+                self.release_term_id_if_unused(purged_item.key)
+                self.number_of_concepts_evicted += 1
+
+        concept_key = self.get_term_id(term)
         assert not (concept_key in self.concepts_bag.item_lookup_dict), "Cannot create new concept. Concept already exists."
         # create new concept
-        new_concept = Concept(term)
+        new_concept = Concept(term, id=concept_key, rng=self.rng, link_graph=self.link_graph)
 
         # put into data structure
         self.concepts_bag.PUT_NEW(new_concept) # add to bag
+        self.number_of_concepts_created += 1
+        self.term_index.put(term, concept_key)
+        if self.write_ahead_log is not None: self.write_ahead_log.log_concept_creation(term)
 
         if isinstance(term, NALGrammar.Terms.CompoundTerm) and not isinstance(term, NALGrammar.Terms.SpatialTerm):
             #todo allow array elements
-            for i, subterm in np.ndenumerate(term.subterms):
+            for subterm in term.subterms:
                 # get/create subterm concepts
                 if not isinstance(subterm, NALGrammar.Terms.VariableTerm):  # don't create concepts for variables or array elements
                     subconcept = self.peek_concept(subterm)
@@ -78,22 +169,49 @@ class Memory:
                     new_concept.set_term_links(subconcept)
 
         elif isinstance(term, NALGrammar.Terms.StatementTerm):
+            self.subterm_index.add(concept_key,
+                                   subject_id=self.get_term_id(term.get_subject_term()),
+                                   predicate_id=self.get_term_id(term.get_predicate_term()),
+                                   copula=term.copula)
             subject_concept: Concept = self.peek_concept(term.get_subject_term())
             predicate_concept: Concept = self.peek_concept(term.get_predicate_term())
 
             new_concept.set_term_links(subject_concept)
             new_concept.set_term_links(predicate_concept)
 
-            if not term.is_first_order():
+            if not term.is_first_order() and self.is_concept_in_memory(new_concept):
                 # implication statement
-                # do prediction/explanation linking with subterms
-                if subject_concept is not None: subject_concept.set_prediction_link(new_concept)
+                # do prediction/explanation linking with subterms, unless creating them evicted the concepts
+                if subject_concept is not None and self.is_concept_in_memory(subject_concept):
+                    subject_concept.set_prediction_link(new_concept)
                 if predicate_concept is not None: predicate_concept.set_explanation_link(new_concept)
 
         concept = self.concepts_bag.peek(concept_key)
+        if concept is not None and concept.object is not new_concept: return None  # evicted, and its ID reused
 
         return concept
 
+    def is_concept_in_memory(self, concept):
+        """
+            :return: If this concept object, and not just one for the same term, is in the concepts bag
+        """
+        item = self.concepts_bag.item_lookup_dict.get(concept.id)
+        return item is not None and item.object is concept
+
+    def unindex_concept(self, concept):
+        """
+            Remove an evicted concept from the term index, and the subterm index if it is a statement.
+            The IDs of the statement's subterms are released if nothing else refers to them.
+        """
+        term = concept.term
+        self.term_index.remove(term)
+        if not isinstance(term, NALGrammar.Terms.StatementTerm): return
+        subject_id = self.get_concept_key(term.get_subject_term())
+        predicate_id = self.get_concept_key(term.get_predicate_term())
+        self.subterm_index.remove(concept.id, subject_id=subject_id, predicate_id=predicate_id, copula=term.copula)
+        self.release_term_id_if_unused(subject_id)
+        if predicate_id != subject_id: self.release_term_id_if_unused(predicate_id)
+
     def peek_concept(self, term):
         item = self.peek_concept_item(term)
         if item is None: return None
@@ -114,9 +232,7 @@ class Memory:
         if isinstance(term, NALGrammar.Terms.VariableTerm): return None #todo created concepts for closed variable terms
 
         # try to find the existing concept
-        concept_key = NARSDataStructures.ItemContainers.Item.get_key_from_object(term)
-
-        concept_item: NARSDataStructures.ItemContainers.Item = self.concepts_bag.peek(concept_key)
+        concept_item: NARSDataStructures.ItemContainers.Item = self.peek_existing_concept_item(term)
 
         if concept_item is not None:
             return concept_item  # return if it already exists
@@ -125,62 +241,122 @@ class Memory:
         # it must be created along with its sub-concepts if necessary
         concept_item = self.conceptualize_term(term)
 
+        if concept_item is not None and self.knowledge_base is not None:
+            self.promote_from_knowledge_base(concept_item)  # unless the new concept was already evicted
+
         return concept_item
 
+    def promote_from_knowledge_base(self, concept_item):
+        """
+            Copy the knowledge base entry of a newly created concept into it, if there is one:
+            its background belief, and its links to concepts already in memory, as term links.
 
-    def get_semantically_related_concept(self, statement_concept):
+            Every miss in peek_concept_item() promotes, since the concept is created anyway;
+            get_related_concept_from_knowledge_base() only promotes entries looked up often enough.
+
+            :param concept_item: Item of the new concept
         """
-            Get concepts (named by a Statement Term) that are semantically related to the given concept.
+        concept: Concept = concept_item.object
+        row = self.knowledge_base.find_row(concept.get_term_string())
+        if row is None: return
+        self.knowledge_base_hits.pop(row, None)
 
-            Using term-links, returns a concept with the same copula order; one for the subject and one for the predicate.
+        truth_value = self.knowledge_base.get_truth_value(row)
+        if truth_value is not None:
+            frequency, confidence = truth_value
+            belief = NALGrammar.Sentences.Judgment(statement=concept.term,
+                                                   value=NALGrammar.Values.TruthValue(frequency, confidence))
+            concept.belief_table.put(belief)
 
-            For a first-order statement, may try to instead return higher-order concepts based on implication links
+        for linked_row in self.knowledge_base.get_linked_rows(row)[:self.link_graph.row_capacity].tolist():
+            linked_term = NALGrammar.Terms.from_string(self.knowledge_base.get_term_string(linked_row))
+            linked_concept_item = self.peek_existing_concept_item(linked_term)
+            if linked_concept_item is None: continue
+            concept.term_links.add(linked_concept_item.object, priority=0.5)
+            linked_concept_item.object.term_links.add(concept, priority=0.5)
 
-            :param statement_concept - Statement-Term Concept for which to find a semantically related Statement-Term concept
+    def get_related_concept_from_knowledge_base(self, statement_concept):
+        """
+            Get a statement concept from the knowledge base sharing a subject or predicate
+            with the given concept.
+            A related statement not in memory is promoted into memory once it has been looked up
+            Config.KNOWLEDGE_BASE_PROMOTION_HITS times.
 
-            :return Statement-Term Concepts semantically related to param: `statement_concept`
+            :return: related Concept; None if the knowledge base holds none, or it is not yet promoted
         """
+        if self.knowledge_base is None: return None
+        row = self.knowledge_base.find_row(statement_concept.get_term_string())
+        if row is None: return None
 
-        count = 0
-        related_concept = None
-        if len(statement_concept.term_links) == 0: return None
-        while count < Config.NUMBER_OF_ATTEMPTS_TO_SEARCH_FOR_SEMANTICALLY_RELATED_CONCEPT \
-                and (related_concept is None):
-            count += 1
-            shared_term_concept = statement_concept.term_links.peek().object
-            if statement_concept.term.is_first_order():
-                # S --> P
-                if len(statement_concept.term_links) != 0:
-                    shared_term_concept = statement_concept.term_links.peek().object
-                    if isinstance(shared_term_concept.term, NALGrammar.Terms.AtomicTerm):
-                        # atomic term concept (S)
-                        related_concept = shared_term_concept.term_links.peek().object # peek additional term links to get another statement term
-                    elif isinstance(shared_term_concept.term, NALGrammar.Terms.CompoundTerm):
-                        if shared_term_concept.term.is_first_order():
-                            # the subject or predicate is a first-order compound
-                            related_concept = shared_term_concept.term_links.peek().object # peek additional term links to get a statement term
-                            if not isinstance(related_concept.term, NALGrammar.Terms.StatementTerm): related_concept = None
-                        else:
-                            # this statement is in a higher-order compound, we can use it in inference
-                            related_concept = shared_term_concept
-                    elif isinstance(shared_term_concept.term, NALGrammar.Terms.StatementTerm):
-                        # implication statement (S-->P) ==> B
-                        related_concept = shared_term_concept
-            else:
-                # S ==> P
-                # term linked concept is A-->B
-                if len(shared_term_concept.prediction_links) == 0 and len(shared_term_concept.explanation_links) == 0:
-                    continue
-                elif len(shared_term_concept.prediction_links) != 0 and len(shared_term_concept.explanation_links) == 0:
-                    bag = shared_term_concept.prediction_links
-                elif len(shared_term_concept.explanation_links) != 0 and len(shared_term_concept.prediction_links) == 0:
-                    bag = shared_term_concept.explanation_links
-                else:
-                    bag = random.choice([shared_term_concept.prediction_links,shared_term_concept.explanation_links])
+        subterm_rows = self.knowledge_base.get_linked_rows(row)
+        if len(subterm_rows) == 0: return None
+        subterm_row = subterm_rows[self.rng.randrange(len(subterm_rows))]
+
+        statement_rows = self.knowledge_base.get_linked_rows(subterm_row)
+        related_row = statement_rows[self.rng.randrange(len(statement_rows))]
+        if related_row == row: return None
+
+        related_term = NALGrammar.Terms.from_string(self.knowledge_base.get_term_string(related_row))
+        related_concept_item = self.peek_existing_concept_item(related_term)
+        if related_concept_item is not None: return related_concept_item.object
+
+        related_row = int(related_row)
+        hits = self.knowledge_base_hits.get(related_row, 0) + 1
+        if hits < Config.KNOWLEDGE_BASE_PROMOTION_HITS:
+            self.knowledge_base_hits[related_row] = hits
+            return None
+        return self.peek_concept(related_term)
+
+
+    def get_unifiable_concepts(self, term):
+        """
+            Get the concepts whose terms unify with a term, e.g. (robin --> bird) and (#x --> bird) for (?x --> bird)
+
+            :param term: term, usually containing query or independent variables
+            :return: list of Concepts in memory
+        """
+        concepts = []
+        for _, concept_key in self.term_index.get_unifiable(term):
+            concept_item = self.concepts_bag.peek(concept_key)
+            if concept_item is not None: concepts.append(concept_item.object)
+        return concepts
+
+    def get_semantically_related_concept(self, statement_concept):
+        """
+            Get a concept (named by a Statement Term) that is semantically related to the given concept.
 
-                related_concept = bag.peek().object
+            Using the subterm index, returns a concept with the same copula order sharing the subject or the predicate.
+            May instead return a higher-order concept containing the given statement (e.g. (S-->P) ==> B).
 
-        return related_concept
+            :param statement_concept - Statement-Term Concept for which to find a semantically related Statement-Term concept
+
+            :return Statement-Term Concept semantically related to param: `statement_concept`; None if none was found
+        """
+        statement_term = statement_concept.term
+        if not isinstance(statement_term, NALGrammar.Terms.StatementTerm): return None
+        # an evicted concept's ID may belong to another term by now
+        if not self.is_concept_in_memory(statement_concept): return self.get_related_concept_from_knowledge_base(statement_concept)
+        copulas = FIRST_ORDER_COPULAS if statement_term.is_first_order() else HIGHER_ORDER_COPULAS
+        shared_term_ids = (self.get_concept_key(statement_term.get_subject_term()),
+                           self.get_concept_key(statement_term.get_predicate_term()))
+
+        for _ in range(Config.NUMBER_OF_ATTEMPTS_TO_SEARCH_FOR_SEMANTICALLY_RELATED_CONCEPT):
+            if self.rng.random() < 0.5:
+                # S --> P and S --> M, or M --> P
+                related_id = self.subterm_index.get_random_statement_id(self.rng.choice(shared_term_ids),
+                                                                        self.rng,
+                                                                        copulas=copulas,
+                                                                        exclude_id=statement_concept.id)
+            else:
+                # (S --> P) ==> B, or B ==> (S --> P)
+                related_id = self.subterm_index.get_random_statement_id(statement_concept.id,
+                                                                        self.rng,
+                                                                        copulas=HIGHER_ORDER_COPULAS)
+            if related_id is None: continue
+            related_item = self.concepts_bag.peek(related_id)
+            if related_item is not None: return related_item.object
+
+        return self.get_related_concept_from_knowledge_base(statement_concept)
 
     def get_best_explanation(self, j):
         """
@@ -191,8 +367,7 @@ class Memory:
         """
         statement_concept: Concept = self.peek_concept(j.statement) # B
         best_explanation_belief = None
-        for explanation_concept_item in statement_concept.explanation_links:
-            explanation_concept: Concept = explanation_concept_item.object  # A =/> B
+        for explanation_concept in statement_concept.explanation_links:  # A =/> B
             if len(explanation_concept.belief_table) == 0: continue
 
             belief = explanation_concept.belief_table.peek_highest_confidence_interactable(j)
@@ -219,8 +394,7 @@ class Memory:
         MAX_ATTEMPTS = Config.NUMBER_OF_ATTEMPTS_TO_SEARCH_FOR_SEMANTICALLY_RELATED_BELIEF
 
         while count < MAX_ATTEMPTS:
-            item = statement_concept.explanation_links.peek()
-            explanation_concept: Concept = item.object  # A =/> B
+            explanation_concept: Concept = statement_concept.explanation_links.peek()  # A =/> B
 
             if explanation_concept.term.get_subject_term().contains_positive():
                 # (A &/ B) =/> C and A.
@@ -234,8 +408,7 @@ class Memory:
             count += 1
 
         if best_explanation_belief is None:
-            item = statement_concept.explanation_links.peek()
-            best_explanation_belief = item.object.belief_table.peek_random()
+            best_explanation_belief = statement_concept.explanation_links.peek().belief_table.peek_random()
 
         return best_explanation_belief
 
@@ -252,8 +425,7 @@ class Memory:
         count = 0
         MAX_ATTEMPTS = Config.NUMBER_OF_ATTEMPTS_TO_SEARCH_FOR_SEMANTICALLY_RELATED_BELIEF
         while count < MAX_ATTEMPTS:
-            item = statement_concept.prediction_links.peek()
-            prediction_concept: Concept = item.object  # A =/> B
+            prediction_concept: Concept = statement_concept.prediction_links.peek()  # A =/> B
 
             if prediction_concept.term.get_predicate_term().contains_positive():
                 # (A &/ B) =/> C and A.
@@ -266,8 +438,7 @@ class Memory:
             count += 1
 
         if best_prediction_belief is None:
-            item = statement_concept.prediction_links.peek()
-            best_prediction_belief = item.object.belief_table.peek_random()
+            best_prediction_belief = statement_concept.prediction_links.peek().belief_table.peek_random()
 
         return best_prediction_belief
 
@@ -281,8 +452,7 @@ class Memory:
         statement_concept: Concept = self.peek_concept(j.statement) # B
         if len(statement_concept.prediction_links) == 0: return None
 
-        prediction_concept_item = statement_concept.prediction_links.peek()
-        prediction_concept = prediction_concept_item.object
+        prediction_concept = statement_concept.prediction_links.peek()
         prediction_belief = prediction_concept.belief_table.peek()
 
         return prediction_belief
@@ -297,8 +467,7 @@ class Memory:
         concept: Concept = self.peek_concept(j.statement) # B
         if len(concept.explanation_links) == 0: return None
 
-        explanation_concept_item = concept.explanation_links.peek()
-        explanation_concept = explanation_concept_item.object
+        explanation_concept = concept.explanation_links.peek()
         explanation_belief = explanation_concept.belief_table.peek_random()
 
         return explanation_belief
@@ -314,8 +483,7 @@ class Memory:
         count = 0
         MAX_ATTEMPTS = Config.NUMBER_OF_ATTEMPTS_TO_SEARCH_FOR_SEMANTICALLY_RELATED_BELIEF
         while count < MAX_ATTEMPTS:
-            explanation_concept_item = concept.explanation_links.peek()
-            explanation_concept = explanation_concept_item.object
+            explanation_concept = concept.explanation_links.peek()
             if len(explanation_concept.belief_table ) == 0: continue
             belief = explanation_concept.belief_table.peek()
 
@@ -349,8 +517,7 @@ class Memory:
         """
         concept = self.peek_concept(j.statement)
         best_belief = None
-        for prediction_concept_item in concept.prediction_links:
-            prediction_concept = prediction_concept_item.object
+        for prediction_concept in concept.prediction_links:
             if len(prediction_concept.belief_table ) == 0: continue
             prediction_belief = prediction_concept.belief_table.peek()
 
@@ -370,10 +537,9 @@ class Memory:
         """
         concept = self.peek_concept(j.statement)
         best_belief = None
-        for concept_item in concept.explanation_links:
-            concept = concept_item.object
-            if len(concept.belief_table ) == 0: continue
-            belief = concept.belief_table.peek()
+        for explanation_concept in concept.explanation_links:
+            if len(explanation_concept.belief_table ) == 0: continue
+            belief = explanation_concept.belief_table.peek()
 
             if belief is not None and\
                 NALSyntax.TermConnector.is_conjunction(belief.statement.get_subject_term().connector) and\
@@ -398,8 +564,7 @@ class Memory:
         count = 0
         MAX_ATTEMPTS = Config.NUMBER_OF_ATTEMPTS_TO_SEARCH_FOR_SEMANTICALLY_RELATED_BELIEF
         while count < MAX_ATTEMPTS:
-            item = prediction_links.peek()
-            prediction_concept: Concept = item.object  # A =/> B
+            prediction_concept: Concept = prediction_links.peek()  # A =/> B
 
             if self.peek_concept(prediction_concept.term.get_predicate_term()).is_desired():
                 # (A &/ B) =/> C and A.
@@ -422,8 +587,7 @@ class Memory:
         """
         concept = self.peek_concept(j.statement)
         positive_beliefs = []
-        for prediction_concept_item in concept.prediction_links:
-            prediction_concept = prediction_concept_item.object
+        for prediction_concept in concept.prediction_links:
             if len(prediction_concept.belief_table) == 0: continue
             prediction_belief = prediction_concept.belief_table.peek()
 
@@ -433,7 +597,7 @@ class Memory:
 
         if len(positive_beliefs) == 0:
             return None
-        return positive_beliefs[round(random.random() * (len(positive_beliefs)-1))]
+        return positive_beliefs[round(self.rng.random() * (len(positive_beliefs)-1))]
 
     def get_random_prediction(self, j):
         """
@@ -444,7 +608,7 @@ class Memory:
         concept = self.peek_concept(j.statement)
         if len(concept.prediction_links) == 0:
             return None
-        prediction_concept = concept.prediction_links.peek().object
+        prediction_concept = concept.prediction_links.peek()
         if len(prediction_concept.belief_table) == 0:
             return None
         return prediction_concept.belief_table.peek()
@@ -452,8 +616,7 @@ class Memory:
     def get_all_positive_predictions(self, j):
         predictions = []
         concept = self.peek_concept(j.statement)
-        for prediction_concept_item in concept.prediction_links:
-            prediction_concept = prediction_concept_item.object
+        for prediction_concept in concept.prediction_links:
             if len(prediction_concept.belief_table ) == 0: continue
             prediction_belief = prediction_concept.belief_table.peek()
 
@@ -471,8 +634,7 @@ class Memory:
         :return:
         """
         best_belief = None
-        for prediction_concept_item in concept.prediction_links:
-            prediction_concept = prediction_concept_item.object
+        for prediction_concept in concept.prediction_links:
             if len(prediction_concept.belief_table ) == 0: continue
             prediction_belief = prediction_concept.belief_table.peek()
 
@@ -502,28 +664,59 @@ class Memory:
         return self.next_percept_id - 1
 
 
+LINK_RELATIONS = ("term_links", "subterm_links", "superterm_links", "prediction_links", "explanation_links")
+
+
+class LinkViewAttribute:
+    """
+        Concept attribute for a view of the concept's links in one relation of its Memory's LinkGraph.
+        The view is created on first access and cached on the concept.
+    """
+    def __set_name__(self, owner, name):
+        self.relation = name
+
+    def __get__(self, concept, owner=None):
+        if concept is None: return self
+        if concept.link_graph is None:
+            # a concept made outside a Memory links in a graph of its own
+            concept.link_graph = NARSDataStructures.LinkGraph.LinkGraph(LINK_RELATIONS, rng=concept.rng)
+        view = NARSDataStructures.LinkGraph.LinkView(concept.link_graph, self.relation, concept)
+        concept.__dict__[self.relation] = view  # shadows this attribute from now on
+        return view
+
+
 class Concept:
     """
         NARS Concept
     """
-    def __init__(self, term):
+    term_links = LinkViewAttribute()  # related concepts (related by term)
+    subterm_links = LinkViewAttribute()  # related concepts (related by term)
+    superterm_links = LinkViewAttribute()  # related concepts (related by term)
+    prediction_links = LinkViewAttribute()
+    explanation_links = LinkViewAttribute()
+
+    def __init__(self, term, id=None, rng=None, link_graph=None):
+        """
+        :param term: concept's unique term
+        :param id: the term's interned ID in Memory, which keys the concept in bags
+        :param rng: random.Random that the concept's tables draw from; the global random module by default
+        :param link_graph: LinkGraph holding the concept's links; a new graph, made when first linked, by default
+        """
         Asserts.assert_term(term)
         self.term = term  # concept's unique term
-        self.term_links = NARSDataStructures.Bag.Bag(item_type=Concept, capacity=Config.CONCEPT_LINK_CAPACITY)  # Bag of related concepts (related by term)
-        self.subterm_links = NARSDataStructures.Bag.Bag(item_type=Concept,
-                                                     capacity=Config.CONCEPT_LINK_CAPACITY)  # Bag of related concepts (related by term)
-        self.superterm_links = NARSDataStructures.Bag.Bag(item_type=Concept,
-                                                     capacity=Config.CONCEPT_LINK_CAPACITY)  # Bag of related concepts (related by term)
-        self.belief_table = NARSDataStructures.Other.Table(NALGrammar.Sentences.Judgment)
-        self.desire_table = NARSDataStructures.Other.Table(NALGrammar.Sentences.Goal)
-        self.prediction_links = NARSDataStructures.Bag.Bag(item_type=Concept, capacity=Config.CONCEPT_LINK_CAPACITY)
-        self.explanation_links = NARSDataStructures.Bag.Bag(item_type=Concept, capacity=Config.CONCEPT_LINK_CAPACITY)
+        self.id = id
+        self.rng = rng
+        self.link_graph = link_graph
+        self.link_row = None  # row in the link graph, assigned when the concept is first linked
+        self.belief_table = NARSDataStructures.Other.Table(NALGrammar.Sentences.Judgment, rng=rng)
+        self.desire_table = NARSDataStructures.Other.Table(NALGrammar.Sentences.Goal, rng=rng)
 
     def __str__(self):
         return self.get_term_string()
 
     def __eq__(self, other):
-        return self.get_term_string() == other.get_formatted_string()
+        if not isinstance(other, Concept): return NotImplemented
+        return self.term == other.term
 
     def get_term(self):
         return self.term
@@ -566,19 +759,14 @@ class Concept:
         if subterm_concept in self.term_links: return  # already linked
 
         # add to term links
-        # item = self.term_links.PUT_NEW(subterm_concept)
-        # self.term_links.change_priority(item.key, new_priority=0.5)
-        #
-        # item = subterm_concept.term_links.PUT_NEW(self)
-        # subterm_concept.term_links.change_priority(item.key, new_priority=0.5)
+        # self.term_links.add(subterm_concept, priority=0.5)
+        # subterm_concept.term_links.add(self, priority=0.5)
 
         # add to subterm links
-        # item = self.subterm_links.PUT_NEW(subterm_concept)
-        # self.subterm_links.change_priority(item.key, new_priority=0.5)
+        # self.subterm_links.add(subterm_concept, priority=0.5)
         #
         # # add to superterm links
-        # item = subterm_concept.superterm_links.PUT_NEW(self)
-        # subterm_concept.superterm_links.change_priority(item.key, new_priority=0.5)
+        # subterm_concept.superterm_links.add(self, priority=0.5)
 
     def remove_term_link(self, concept):
         """
@@ -587,8 +775,8 @@ class Concept:
         """
         assert_concept(concept)
         assert (concept in self.term_links), concept + "must be in term links."
-        self.term_links.TAKE_USING_KEY(key=NARSDataStructures.ItemContainers.Item.get_key_from_object(concept))
-        concept.term_links.TAKE_USING_KEY(key=NARSDataStructures.ItemContainers.Item.get_key_from_object(self))
+        self.term_links.remove(concept)
+        concept.term_links.remove(self)
 
     def set_prediction_link(self, concept):
         """
@@ -598,8 +786,7 @@ class Concept:
         if concept is None: return
         assert_concept(concept)
         if concept in self.prediction_links: return  # already linked
-        concept_item = self.prediction_links.PUT_NEW(concept)
-        self.prediction_links.change_priority(concept_item.key, new_priority=0.99)
+        self.prediction_links.add(concept, priority=0.99)
 
     def remove_prediction_link(self, concept):
         """
@@ -608,7 +795,7 @@ class Concept:
         """
         assert_concept(concept)
         assert (concept in self.prediction_links), concept + "must be in prediction links."
-        self.prediction_links.TAKE_USING_KEY(key=NARSDataStructures.ItemContainer.Item.get_key_from_object(concept))
+        self.prediction_links.remove(concept)
 
     def set_explanation_link(self, concept):
         """
@@ -619,8 +806,7 @@ class Concept:
         return #todo remove
         assert_concept(concept)
         if concept in self.explanation_links: return  # already linked
-        concept_item = self.explanation_links.PUT_NEW(concept)
-        self.explanation_links.change_priority(concept_item.key,new_priority=0.99)
+        self.explanation_links.add(concept, priority=0.99)
 
 
     def remove_explanation_link(self, concept):
@@ -630,7 +816,7 @@ class Concept:
         """
         assert_concept(concept)
         assert (concept in self.explanation_links), concept + "must be in prediction links."
-        self.explanation_links.TAKE_USING_KEY(key=NARSDataStructures.ItemContainer.Item.get_key_from_object(concept))
+        self.explanation_links.remove(concept)
 
     def get_term_string(self):
         """
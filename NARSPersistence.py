@@ -0,0 +1,431 @@
+"""
+    Created: October 19, 2026
+    Purpose: Saves and loads NARS Memory to/from disk.
+
+        Memory is written as a stream of flat concept records instead of pickling the whole object graph,
+        so large memories can be saved and loaded without deep recursion or holding a second copy in RAM.
+
+        Changes made between snapshots can be recorded in an append-only write-ahead log,
+        which is replayed on top of the last snapshot after a crash.
+"""
+import atexit
+import os
+import pickle
+import struct
+import zlib
+
+import Global
+import NALGrammar
+import NALSyntax
+import NARSMemory
+from NALGrammar.Values import TruthValue, DesireValue
+
+SNAPSHOT_FORMAT = "NARS-SNAPSHOT"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_CHUNK_SIZE = 4096  # how many concept records are written per chunk
+
+
+def create_concept_record(concept_item):
+    """
+        Flatten a concept item into a record of plain values.
+
+        Record: (term string, priority, quality, beliefs, desires, prediction link terms, explanation link terms)
+            where each belief/desire row is (frequency, confidence, occurrence time)
+
+        :param concept_item: Item wrapping the Concept to flatten
+        :return: flat tuple describing the concept
+    """
+    concept: NARSMemory.Concept = concept_item.object
+    beliefs = [(belief.value.frequency, belief.value.confidence, belief.stamp.occurrence_time)
+               for (belief, _) in concept.belief_table]
+    desires = [(desire.value.frequency, desire.value.confidence, desire.stamp.occurrence_time)
+               for (desire, _) in concept.desire_table]
+    # links are stored by term string, since concept keys are only meaningful to the Memory that interned them
+    prediction_link_terms = [linked_concept.get_term_string() for linked_concept in concept.prediction_links]
+    explanation_link_terms = [linked_concept.get_term_string() for linked_concept in concept.explanation_links]
+    return (concept.get_term_string(),
+            concept_item.budget.get_priority(),
+            concept_item.budget.get_quality(),
+            beliefs,
+            desires,
+            prediction_link_terms,
+            explanation_link_terms)
+
+
+def save_memory_snapshot(memory, filename, current_cycle_number=0, header_fields=None):
+    """
+        Stream a Memory to disk as a header followed by chunks of flat concept records.
+
+        :param memory: Memory to save
+        :param filename: file to write
+        :param current_cycle_number: working cycle at which the snapshot is taken
+        :param header_fields: (Optional) dict of extra values to store in the header
+        :return: number of concept records written
+    """
+    header = {"format": SNAPSHOT_FORMAT,
+              "version": SNAPSHOT_VERSION,
+              "number_of_concepts": len(memory),
+              "next_stamp_id": memory.next_stamp_id,
+              "next_percept_id": memory.next_percept_id,
+              "current_cycle_number": current_cycle_number}
+    if header_fields is not None: header.update(header_fields)
+
+    count = 0
+    with open(filename, "wb") as f:
+        pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+        chunk = []
+        for concept_item in memory.concepts_bag:
+            chunk.append(create_concept_record(concept_item))
+            if len(chunk) == SNAPSHOT_CHUNK_SIZE:
+                pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+                count += len(chunk)
+                chunk = []
+        if len(chunk) > 0:
+            pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+            count += len(chunk)
+        pickle.dump(None, f, pickle.HIGHEST_PROTOCOL)  # end marker
+        f.flush()
+        os.fsync(f.fileno())
+
+    return count
+
+
+def read_snapshot_header(f):
+    header = pickle.load(f)
+    assert isinstance(header, dict) and header.get("format") == SNAPSHOT_FORMAT, \
+        "ERROR: File is not a NARS memory snapshot"
+    assert header["version"] == SNAPSHOT_VERSION, \
+        "ERROR: Unsupported memory snapshot version " + str(header["version"])
+    return header
+
+
+def iterate_snapshot_records(f):
+    """
+        Yield the concept records of an opened snapshot file, one chunk in memory at a time.
+    """
+    while True:
+        chunk = pickle.load(f)
+        if chunk is None: return
+        for record in chunk:
+            yield record
+
+
+def load_memory_snapshot(filename, memory=None):
+    """
+        Rebuild a Memory from a snapshot file.
+
+        Sentences are created with new stamps, so the Memory should be the one NARS is currently using
+        (i.e. Global.NARS.memory) when the snapshot is loaded.
+
+        :param filename: snapshot file to read
+        :param memory: (Optional) empty Memory to load into; a new one is created if not given
+        :return: (memory, header, number of records skipped because their term could not be parsed)
+    """
+    if memory is None: memory = NARSMemory.Memory()
+    skipped = 0
+    pending_links = []
+    restored_concepts = {}  # term string -> restored Concept, to restore links by
+    with open(filename, "rb") as f:
+        header = read_snapshot_header(f)
+        memory.next_stamp_id = max(memory.next_stamp_id, header["next_stamp_id"])
+        memory.next_percept_id = max(memory.next_percept_id, header["next_percept_id"])
+
+        for record in iterate_snapshot_records(f):
+            term_string, priority, quality, beliefs, desires, prediction_link_terms, explanation_link_terms = record
+            try:
+                term = NALGrammar.Terms.from_string(term_string)
+            except (AssertionError, AttributeError, IndexError, ValueError):
+                skipped += 1  # e.g. spatial terms, which have no parseable string form
+                continue
+
+            concept_item = memory.peek_concept_item(term)
+            if concept_item is None:
+                skipped += 1
+                continue
+            concept: NARSMemory.Concept = concept_item.object
+            restored_concepts[term_string] = concept
+
+            for (frequency, confidence, occurrence_time) in beliefs:
+                belief = NALGrammar.Sentences.Judgment(statement=term,
+                                                       value=TruthValue(frequency, confidence),
+                                                       occurrence_time=occurrence_time)
+                concept.belief_table.insert_object(belief, belief.value.confidence)
+            for (frequency, confidence, occurrence_time) in desires:
+                desire = NALGrammar.Sentences.Goal(statement=term,
+                                                   value=DesireValue(frequency, confidence),
+                                                   occurrence_time=occurrence_time)
+                concept.desire_table.insert_object(desire, desire.value.confidence)
+
+            memory.concepts_bag.change_quality(concept_item.key, new_quality=quality)
+            memory.concepts_bag.change_priority(concept_item.key, new_priority=priority)
+
+            if len(prediction_link_terms) > 0 or len(explanation_link_terms) > 0:
+                pending_links.append((concept, prediction_link_terms, explanation_link_terms))
+
+    # links can only be restored once every concept exists
+    for (concept, prediction_link_terms, explanation_link_terms) in pending_links:
+        for link_term_string in prediction_link_terms:
+            linked_concept = restored_concepts.get(link_term_string)
+            if linked_concept is not None: concept.set_prediction_link(linked_concept)
+        for link_term_string in explanation_link_terms:
+            linked_concept = restored_concepts.get(link_term_string)
+            if linked_concept is not None: concept.set_explanation_link(linked_concept)
+
+    if skipped > 0:
+        Global.Global.debug_print("Skipped " + str(skipped) + " concepts that could not be restored from " + filename)
+
+    return memory, header, skipped
+
+
+class WriteAheadLog:
+    """
+        Append-only log of changes made to Memory since the last snapshot.
+
+        File layout:
+            header: magic, generation
+            records: type (1 byte), payload length (4 bytes), payload CRC32 (4 bytes), payload
+
+        Records are buffered and written + fsync'd in batches; the log is closed (flushing any partial batch)
+        when the process exits cleanly.
+        A torn record at the end of the file (e.g. from a crash mid-write) is ignored on replay.
+
+        The generation number ties the log to the snapshot it extends;
+        it is stored in the snapshot header when the log is compacted.
+    """
+    MAGIC = b"NARSWAL1"
+    FILE_HEADER = struct.Struct("<8sQ")
+    RECORD_HEADER = struct.Struct("<BII")
+    VALUES = struct.Struct("<ddq")
+    PRIORITY = struct.Struct("<d")
+
+    RECORD_CONCEPT = 1  # concept created: term
+    RECORD_SENTENCE = 2  # sentence put into a belief or desire table: punctuation, term, f, c, occurrence time
+    RECORD_PRIORITY = 3  # concept priority changed: term, priority
+    RECORD_QUALITY = 4  # concept quality changed: term, quality
+    RECORD_CLEAR = 5  # concept's belief table emptied: term
+
+    ETERNAL = -1  # occurrence time stored for eternal sentences
+
+    def __init__(self, filename, fsync_batch_size):
+        """
+            Open a write-ahead log for appending, creating it if it does not exist.
+
+            :param filename: log file
+            :param fsync_batch_size: number of records buffered before they are written and fsync'd
+        """
+        self.filename = filename
+        self.fsync_batch_size = fsync_batch_size
+        self.pending_records = bytearray()
+        self.number_of_pending_records = 0
+
+        if not os.path.exists(filename) or os.path.getsize(filename) < self.FILE_HEADER.size:
+            self._write_new_file(generation=0)
+
+        with open(filename, "rb") as f:
+            magic, self.generation = self.FILE_HEADER.unpack(f.read(self.FILE_HEADER.size))
+        assert magic == self.MAGIC, "ERROR: " + filename + " is not a NARS write-ahead log"
+
+        self.file = open(filename, "ab")
+        atexit.register(self.close)
+
+    def __len__(self):
+        """
+            :return: size of the log in bytes, including records not yet flushed
+        """
+        return self.file.tell() + len(self.pending_records)
+
+    def _write_new_file(self, generation):
+        with open(self.filename, "wb") as f:
+            f.write(self.FILE_HEADER.pack(self.MAGIC, generation))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append_record(self, record_type, payload):
+        self.pending_records += self.RECORD_HEADER.pack(record_type, len(payload), zlib.crc32(payload))
+        self.pending_records += payload
+        self.number_of_pending_records += 1
+        if self.number_of_pending_records >= self.fsync_batch_size:
+            self.flush()
+
+    @classmethod
+    def _pack_string(cls, string):
+        data = string.encode("utf-8")
+        return struct.pack("<I", len(data)) + data
+
+    @classmethod
+    def _unpack_string(cls, payload, offset):
+        (length,) = struct.unpack_from("<I", payload, offset)
+        offset += 4
+        return payload[offset:offset + length].decode("utf-8"), offset + length
+
+    def log_concept_creation(self, term):
+        self._append_record(self.RECORD_CONCEPT, self._pack_string(str(term)))
+
+    def log_sentence(self, sentence):
+        """
+            Record a Judgment or Goal put into its concept's table
+        """
+        occurrence_time = sentence.stamp.occurrence_time
+        if occurrence_time is None: occurrence_time = self.ETERNAL
+        payload = sentence.punctuation.value.encode("utf-8") \
+                  + self._pack_string(str(sentence.statement)) \
+                  + self.VALUES.pack(sentence.value.frequency, sentence.value.confidence, occurrence_time)
+        self._append_record(self.RECORD_SENTENCE, payload)
+
+    def log_priority_change(self, term, priority):
+        self._append_record(self.RECORD_PRIORITY, self._pack_string(str(term)) + self.PRIORITY.pack(priority))
+
+    def log_quality_change(self, term, quality):
+        self._append_record(self.RECORD_QUALITY, self._pack_string(str(term)) + self.PRIORITY.pack(quality))
+
+    def log_belief_table_clear(self, term):
+        self._append_record(self.RECORD_CLEAR, self._pack_string(str(term)))
+
+    def flush(self):
+        """
+            Write all buffered records and fsync them to disk
+        """
+        if self.number_of_pending_records == 0: return
+        self.file.write(self.pending_records)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending_records = bytearray()
+        self.number_of_pending_records = 0
+
+    def close(self):
+        """
+            Flush buffered records and close the file. Safe to call more than once.
+        """
+        if self.file.closed: return
+        self.flush()
+        self.file.close()
+        atexit.unregister(self.close)
+
+    def truncate(self, generation):
+        """
+            Empty the log, starting a new generation.
+            Only call this once everything logged so far is stored in a snapshot of that generation.
+        """
+        self.pending_records = bytearray()
+        self.number_of_pending_records = 0
+        self.file.close()
+        self._write_new_file(generation)
+        self.generation = generation
+        self.file = open(self.filename, "ab")
+
+    @classmethod
+    def iterate_records(cls, filename):
+        """
+            Yield decoded records (record type, term string, values...) from a log file.
+            Stops at the first torn or corrupt record.
+        """
+        with open(filename, "rb") as f:
+            data = f.read()
+        offset = cls.FILE_HEADER.size
+        while offset + cls.RECORD_HEADER.size <= len(data):
+            record_type, length, checksum = cls.RECORD_HEADER.unpack_from(data, offset)
+            offset += cls.RECORD_HEADER.size
+            payload = data[offset:offset + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum: return  # torn write
+            offset += length
+
+            if record_type == cls.RECORD_CONCEPT or record_type == cls.RECORD_CLEAR:
+                term_string, _ = cls._unpack_string(payload, 0)
+                yield record_type, term_string
+            elif record_type == cls.RECORD_SENTENCE:
+                punctuation = payload[0:1].decode("utf-8")
+                term_string, value_offset = cls._unpack_string(payload, 1)
+                frequency, confidence, occurrence_time = cls.VALUES.unpack_from(payload, value_offset)
+                if occurrence_time == cls.ETERNAL: occurrence_time = None
+                yield record_type, term_string, punctuation, frequency, confidence, occurrence_time
+            elif record_type == cls.RECORD_PRIORITY or record_type == cls.RECORD_QUALITY:
+                term_string, value_offset = cls._unpack_string(payload, 0)
+                (value,) = cls.PRIORITY.unpack_from(payload, value_offset)
+                yield record_type, term_string, value
+            else:
+                return  # unknown record, treat the rest of the log as corrupt
+
+    @classmethod
+    def replay(cls, filename, memory):
+        """
+            Re-apply the changes recorded in a log file to a Memory.
+
+            :return: (number of records applied, number of records skipped)
+        """
+        applied = 0
+        skipped = 0
+        for record in cls.iterate_records(filename):
+            record_type, term_string = record[0], record[1]
+            try:
+                term = NALGrammar.Terms.from_string(term_string)
+            except (AssertionError, AttributeError, IndexError, ValueError):
+                skipped += 1
+                continue
+            concept_item = memory.peek_concept_item(term)
+            if concept_item is None:
+                skipped += 1
+                continue
+
+            if record_type == cls.RECORD_SENTENCE:
+                _, _, punctuation, frequency, confidence, occurrence_time = record
+                if punctuation == NALSyntax.Punctuation.Goal.value:
+                    concept_item.object.desire_table.put(NALGrammar.Sentences.Goal(statement=term,
+                                                                                   value=DesireValue(frequency, confidence),
+                                                                                   occurrence_time=occurrence_time))
+                else:
+                    concept_item.object.belief_table.put(NALGrammar.Sentences.Judgment(statement=term,
+                                                                                       value=TruthValue(frequency, confidence),
+                                                                                       occurrence_time=occurrence_time))
+            elif record_type == cls.RECORD_PRIORITY:
+                memory.concepts_bag.change_priority(concept_item.key, new_priority=record[2])
+            elif record_type == cls.RECORD_QUALITY:
+                memory.concepts_bag.change_quality(concept_item.key, new_quality=record[2])
+            elif record_type == cls.RECORD_CLEAR:
+                concept_item.object.belief_table.clear()
+            applied += 1
+
+        return applied, skipped
+
+
+def recover_memory(memory, snapshot_filename, log_filename):
+    """
+        Rebuild memory after a restart: load the last snapshot, then replay the write-ahead log on top of it.
+        The log is only replayed if it extends that snapshot (same generation);
+        otherwise a crash happened mid-compaction and the snapshot already contains its changes.
+
+        :param memory: empty Memory to rebuild into
+        :return: (log generation of the snapshot, cycle number the snapshot was taken at)
+    """
+    generation = 0
+    cycle_number = 0
+    if os.path.exists(snapshot_filename):
+        _, header, _ = load_memory_snapshot(snapshot_filename, memory=memory)
+        generation = header.get("log_generation", 0)
+        cycle_number = header["current_cycle_number"]
+
+    if os.path.exists(log_filename) and os.path.getsize(log_filename) >= WriteAheadLog.FILE_HEADER.size:
+        with open(log_filename, "rb") as f:
+            _, log_generation = WriteAheadLog.FILE_HEADER.unpack(f.read(WriteAheadLog.FILE_HEADER.size))
+        if log_generation == generation:
+            applied, skipped = WriteAheadLog.replay(log_filename, memory)
+            Global.Global.print_to_output("REPLAYED WRITE-AHEAD LOG: " + str(applied) + " records"
+                                          + (" (" + str(skipped) + " skipped)" if skipped > 0 else ""))
+
+    return generation, cycle_number
+
+
+def compact_write_ahead_log(memory, write_ahead_log, snapshot_filename, current_cycle_number=0):
+    """
+        Fold the log into a fresh snapshot, then empty the log.
+
+        The snapshot is written to a temporary file and atomically renamed,
+        so a crash at any point leaves either the old snapshot + old log, or the new snapshot.
+    """
+    write_ahead_log.flush()
+    generation = write_ahead_log.generation + 1
+    temporary_filename = snapshot_filename + ".tmp"
+    save_memory_snapshot(memory, temporary_filename,
+                         current_cycle_number=current_cycle_number,
+                         header_fields={"log_generation": generation})
+    os.replace(temporary_filename, snapshot_filename)
+    write_ahead_log.truncate(generation)
@@ -0,0 +1,184 @@
+"""
+    Created: October 19, 2026
+    Purpose: Network front end for NARS.
+
+        Clients connect over TCP or a Unix socket and send newline-delimited Narsese.
+        Shell commands (save, load, ...) are rejected unless Config.SERVER_ALLOW_COMMANDS is set.
+        Each line goes into the input channel's bounded input queue, tagged with the client it came from,
+        so answers to a client's questions (OUT:) are streamed back to that client.
+        Executed operations (EXE:) are sent to every client.
+        A client that reads its replies too slowly is disconnected, so its unsent replies can't grow without bound.
+
+        The server runs its own asyncio event loop on a background thread;
+        the reasoning loop only ever calls the thread-safe send() and broadcast().
+"""
+import asyncio
+import itertools
+import threading
+import timeit
+
+import Config
+import Global
+import InputChannel
+
+
+class TokenBucket:
+    """
+        Rate limiter: allows `rate` events per second on average, and bursts of up to `burst` events.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill_time = timeit.default_timer()
+
+    def take(self):
+        """
+            Take a token if one is available.
+
+            :return: 0 if a token was taken; otherwise the seconds to wait until one will be available
+        """
+        now = timeit.default_timer()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill_time) * self.rate)
+        self.last_refill_time = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class NARSServer:
+    """
+        asyncio server accepting newline-delimited Narsese from many concurrent clients.
+    """
+    ENCODING = "utf-8"
+
+    def __init__(self, host=None, port=None, unix_socket_path=None, lines_per_second=None, burst=None,
+                 max_write_buffer=None):
+        """
+        :param host: TCP host to listen on. Config.SERVER_HOST by default
+        :param port: TCP port to listen on; 0 to pick a free port. Config.SERVER_PORT by default
+        :param unix_socket_path: listen on this Unix socket instead of TCP. Config.SERVER_UNIX_SOCKET_PATH by default
+        :param lines_per_second: per-connection rate limit. Config.SERVER_LINES_PER_SECOND by default
+        :param burst: lines a connection may send at once before being rate limited. Config.SERVER_BURST by default
+        :param max_write_buffer: bytes of unsent replies a connection may have before it is dropped.
+            Config.SERVER_MAX_WRITE_BUFFER by default
+        """
+        self.host = Config.SERVER_HOST if host is None else host
+        self.port = Config.SERVER_PORT if port is None else port
+        self.unix_socket_path = Config.SERVER_UNIX_SOCKET_PATH if unix_socket_path is None else unix_socket_path
+        self.lines_per_second = Config.SERVER_LINES_PER_SECOND if lines_per_second is None else lines_per_second
+        self.burst = Config.SERVER_BURST if burst is None else burst
+        self.max_write_buffer = Config.SERVER_MAX_WRITE_BUFFER if max_write_buffer is None else max_write_buffer
+
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.started = threading.Event()
+        self.startup_error = None  # exception raised while starting to listen, e.g. the port is in use
+        self.clients = {}  # client ID -> StreamWriter
+        self.next_client_id = itertools.count(1)
+
+    def start(self):
+        """
+            Start serving on a background thread.
+
+            :return: the address being listened on: (host, port), or the Unix socket path
+            :raises the error that prevented the server from listening, e.g. OSError if the address is in use
+        """
+        self.thread = threading.Thread(target=self._run, name="NARS server thread", daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.startup_error is not None: raise self.startup_error
+        if self.unix_socket_path != "": return self.unix_socket_path
+        return self.server.sockets[0].getsockname()[:2]
+
+    def stop(self):
+        if self.loop is None: return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            if self.unix_socket_path != "":
+                self.server = self.loop.run_until_complete(
+                    asyncio.start_unix_server(self._handle_client, path=self.unix_socket_path))
+            else:
+                self.server = self.loop.run_until_complete(
+                    asyncio.start_server(self._handle_client, host=self.host, port=self.port))
+        except Exception as error:
+            # start() re-raises it on the thread that started the server
+            self.startup_error = error
+            self.loop.close()
+            self.loop = None
+            return
+        finally:
+            self.started.set()
+        Global.Global.print_to_output("NARS server listening on " + str(self.server.sockets[0].getsockname()))
+        self.loop.run_forever()
+
+        self.server.close()
+        for writer in self.clients.values(): writer.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    async def _handle_client(self, reader, writer):
+        client_id = next(self.next_client_id)
+        self.clients[client_id] = writer
+        rate_limit = TokenBucket(rate=self.lines_per_second, burst=self.burst)
+        try:
+            while True:
+                line = await reader.readline()
+                if len(line) == 0: break  # client disconnected
+                line = line.decode(NARSServer.ENCODING).strip()
+                if line == "": continue
+                if not Config.SERVER_ALLOW_COMMANDS and InputChannel.is_command(line):
+                    self._write(client_id, "ERROR: commands are not accepted over the network, input rejected: " + line)
+                    continue
+
+                # wait for the rate limit instead of reading on, so TCP flow control slows the client down
+                wait_time = rate_limit.take()
+                while wait_time > 0:
+                    await asyncio.sleep(wait_time)
+                    wait_time = rate_limit.take()
+
+                if not InputChannel.parse_and_queue_input_string(line, source=InputChannel.SOURCE_NETWORK,
+                                                                 origin=client_id):
+                    self._write(client_id, "ERROR: input queue is full, input rejected: " + line)
+        except (ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            del self.clients[client_id]
+            writer.close()
+
+    def _write(self, client_id, message):
+        writer = self.clients.get(client_id)
+        if writer is None or writer.is_closing(): return  # client has gone
+        writer.write((message + "\n").encode(NARSServer.ENCODING))
+        if writer.transport.get_write_buffer_size() > self.max_write_buffer:
+            # the client is not reading its replies; drop it, discarding what it has not read
+            Global.Global.print_to_output("NARS server disconnected client " + str(client_id) + ", too slow to read replies")
+            writer.transport.abort()
+
+    def send(self, message, origin):
+        """
+            Send a line to the client an input came from. Can be called from any thread.
+
+            :param origin: client ID the input was tagged with; nothing is sent if None
+        """
+        if origin is None or self.loop is None: return
+        self.loop.call_soon_threadsafe(self._write, origin, message)
+
+    def broadcast(self, message):
+        """
+            Send a line to every connected client. Can be called from any thread.
+        """
+        if self.loop is None: return
+        self.loop.call_soon_threadsafe(self._write_to_all, message)
+
+    def _write_to_all(self, message):
+        for client_id in list(self.clients):
+            self._write(client_id, message)
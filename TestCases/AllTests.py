@@ -2,6 +2,7 @@ import DataStructureTests
 import GrammarTests
 import InferenceEngineTests
 import InferenceRuleTests
+import InputChannelTests
 import Config
 
 
@@ -10,6 +11,7 @@ def main():
     GrammarTests.main()
     InferenceEngineTests.main()
     InferenceRuleTests.main()
+    InputChannelTests.main()
 
 if __name__ == "__main__":
     Config.DEBUG = False
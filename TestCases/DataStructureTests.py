@@ -1,11 +1,24 @@
+import json
+import os
+import queue
 import random
+import shutil
+import subprocess
+import sys
 
 import Global
 import NARSDataStructures
+import NARSDataStructures.LinkGraph
 import NALGrammar
 import NALSyntax
+import Config
 import NARS
+import NARSInstrumentation
 import NARSMemory
+import NARSKnowledgeBase
+import NARSPersistence
+import NALInferenceRules
+import numpy as np
 
 """
     Author: Christian Hahm
@@ -122,9 +135,9 @@ def test_concept_termlinking():
     assert (len(statement_concept.term_links) == 2), "TEST FAILURE: Concept " + str(
         statement_concept) + " does not have 2 termlinks"
     assert (len(conceptA.term_links) == 1), "TEST FAILURE: Concept " + str(
-        conceptA) + " does not have 1 termlink. Has: " + str(conceptA.term_links.count)
+        conceptA) + " does not have 1 termlink. Has: " + str(len(conceptA.term_links))
     assert (len(conceptB.term_links) == 1), "TEST FAILURE: Concept " + str(
-        conceptB) + " does not have 1 termlink. Has: " + str(conceptB.term_links.count)
+        conceptB) + " does not have 1 termlink. Has: " + str(len(conceptB.term_links))
 
     statement_concept.remove_term_link(conceptA)  # remove concept A's termlink
 
@@ -132,13 +145,64 @@ def test_concept_termlinking():
     assert (len(conceptA.term_links) == 0), "TEST FAILURE: Concept " + str(conceptA) + " does not have 0 termlinks"
     assert (len(conceptB.term_links) == 1), "TEST FAILURE: Concept " + str(conceptB) + " does not have 1 termlink"
 
-    take = statement_concept.term_links.TAKE_USING_KEY(NARSDataStructures.ItemContainers.Item.get_key_from_object(
-        conceptB)).object  # take out the only remaining concept (concept B)
+    take = statement_concept.term_links.remove(conceptB)  # take out the only remaining concept (concept B)
 
     assert (take == conceptB), "TEST FAILURE: Removed concept was not Concept 'B'"
     assert (len(conceptB.term_links) == 1), "TEST FAILURE: Concept does not have 1 termlink"
 
 
+def test_temporal_module_ring_buffer():
+    """
+        Test that the temporal module keeps only its newest events, and drops the indexes of events it forgets
+    """
+    Global.Global.NARS = NARS.NARS()
+    temporal_module = NARSDataStructures.Buffers.TemporalModule(Global.Global.NARS,
+                                                                item_type=NARSDataStructures.Other.Task,
+                                                                capacity=3)
+    for event_string in ("(a-->b)", "(&&,(a-->b),(c-->d))", "(&&,(e-->f),(g-->h))", "(i-->j)", "(&&,(k-->l),(m-->n))"):
+        j = NALGrammar.Sentences.new_sentence_from_string(event_string + ". :|: %1.0;0.9%")
+        temporal_module.PUT_NEW(NARSDataStructures.Other.Task(j))
+        for i in range(len(temporal_module) - 1):
+            temporal_module.get_conjunction(temporal_module[i], temporal_module[-1])
+
+    chain = [str(item.object.sentence.statement) for item in temporal_module]
+    expected_chain = [str(NALGrammar.Terms.from_string(s)) for s in ("(&&,(e-->f),(g-->h))", "(i-->j)", "(&&,(k-->l),(m-->n))")]
+    assert chain == expected_chain, "TEST FAILURE: Temporal chain should hold the 3 newest events, not " + str(chain)
+    assert len(temporal_module.item_lookup_dict) == 3, "TEST FAILURE: Forgotten events were not removed from the lookup table"
+
+    conjunction_events = temporal_module.events_by_type[NARSDataStructures.Buffers.TemporalModule.EVENT_CONJUNCTION_OF_EVENTS]
+    assert list(conjunction_events) == [temporal_module[0], temporal_module[2]], \
+        "TEST FAILURE: Events indexed by type should only hold the events still in the chain"
+    keys_in_chain = {item.key for item in temporal_module}
+    assert set(temporal_module.conjunction_terms) <= keys_in_chain, \
+        "TEST FAILURE: Cached conjunctions of forgotten events should be removed"
+
+
+def test_scheduler():
+    """
+        Test that the scheduler runs only the entries that are due, earliest first, and skips cancelled entries
+    """
+    scheduler = NARSDataStructures.Other.Scheduler()
+    run = []
+    scheduler.schedule(5, "operation", run.append, "op5")
+    scheduler.schedule(2, "operation", run.append, "op2")
+    scheduler.schedule(2, "operation", run.append, "op2 again")
+    anticipation = scheduler.schedule(3, "anticipation", run.append, "anticipation3")
+    scheduler.schedule(4, "anticipation", run.append, "anticipation4")
+    assert len(scheduler) == 5 and scheduler.count("operation") == 3, "TEST FAILURE: Scheduler should count pending entries"
+
+    assert scheduler.run_due(1) == 0, "TEST FAILURE: No entry is due at cycle 1"
+    scheduler.run_due(2)
+    assert run == ["op2", "op2 again"], "TEST FAILURE: Entries due the same cycle should run in scheduling order, not " + str(run)
+
+    scheduler.cancel(anticipation)
+    scheduler.cancel_group("operation")
+    assert len(scheduler) == 1 and scheduler.count("operation") == 0, "TEST FAILURE: Cancelled entries should not be counted"
+    scheduler.run_due(10)
+    assert run == ["op2", "op2 again", "anticipation4"], "TEST FAILURE: Cancelled entries should not run, ran " + str(run)
+    assert len(scheduler.heap) == 0, "TEST FAILURE: Scheduler should be empty after running every due entry"
+
+
 def test_bag_overflow_purge():
     """
         Test if bag stays within capacity when it overflows.
@@ -233,7 +297,9 @@ def test_bag_priority_changing():
 
 
 def test_4_event_temporal_chaining():
-    calculate_expected_num_of_results = lambda N: int(N * (N + 1) / 2 - 1)
+    # for each of the N - 1 earlier events: A && D and A =/> D;
+    # for each consecutive pair: (A && B) =/> D; for each consecutive triple: (A && B && C) =/> D
+    calculate_expected_num_of_results = lambda N: 2 * (N - 1) + max(N - 2, 0) + max(N - 3, 0)
 
     capacities = [2, 3, 6, 10]
 
@@ -241,7 +307,7 @@ def test_4_event_temporal_chaining():
         event_buffer = NARSDataStructures.Buffers.TemporalModule(NARS=None, item_type=NARSDataStructures.Other.Task,
                                                                  capacity=capacity)
 
-        for i in range(capacity):
+        for i in range(2 * capacity):  # fill the window twice, so cached conjunctions of popped events are dropped
             event_buffer.PUT_NEW(NARSDataStructures.Other.Task(
                 NALGrammar.Sentences.new_sentence_from_string("(a" + str(i) + "-->b" + str(i) + "). :|:")))
 
@@ -249,6 +315,534 @@ def test_4_event_temporal_chaining():
         expected = calculate_expected_num_of_results(capacity)
         assert actual == expected, "ERROR: Event buffer of size " + str(capacity) + " produced " + str(
             actual) + " results, instead of expected " + str(expected)
+        assert len(event_buffer.conjunction_terms) <= capacity \
+               and len(event_buffer.consecutive_conjunction_terms) <= capacity, \
+            "ERROR: Event buffer of size " + str(capacity) + " kept conjunctions of events no longer in the chain"
+
+
+def test_input_queue():
+    """
+        Test that the input queue takes higher-priority sources first, FIFO within a source,
+        and applies its overflow policy when full
+    """
+    input_queue = NARSDataStructures.Other.InputQueue(capacity=3,
+                                                      overflow_policy=NARSDataStructures.Other.InputQueue.OVERFLOW_DROP_OLDEST,
+                                                      source_priorities={"user": 1})
+    input_queue.put("file1", source="file")
+    input_queue.put("file2", source="file")
+    input_queue.put("user1", source="user")
+    input_queue.put("user2", source="user")  # full, so drops the oldest low-priority input
+    assert len(input_queue) == 3, "TEST FAILURE: Input queue should hold 3 inputs"
+    assert input_queue.number_dropped == 1, "TEST FAILURE: Input queue should have dropped 1 input"
+    taken = [input_queue.take() for _ in range(3)]
+    assert taken == ["user1", "user2", "file2"], "TEST FAILURE: Input queue took inputs in the wrong order: " + str(taken)
+    assert input_queue.take() is None, "TEST FAILURE: Empty input queue should return None"
+
+    input_queue = NARSDataStructures.Other.InputQueue(capacity=1,
+                                                      overflow_policy=NARSDataStructures.Other.InputQueue.OVERFLOW_REJECT_NEWEST)
+    assert input_queue.put("first"), "TEST FAILURE: Input queue should accept input when it has room"
+    assert not input_queue.put("second"), "TEST FAILURE: Full input queue should reject the newest input"
+    assert input_queue.take() == "first", "TEST FAILURE: Input queue should have kept the first input"
+
+
+def test_question_subscriptions():
+    """
+        Test that a standing question is pushed each better answer, and only better answers
+    """
+    Global.Global.NARS = NARS.NARS()
+    answers = queue.Queue()
+    statement = NALGrammar.Terms.from_string("(robin-->bird)")
+    subscription = Global.Global.NARS.subscribe_to_question(statement, answers.put)
+    assert answers.empty(), "TEST FAILURE: No answer should be pushed before there are beliefs"
+
+    belief_table = Global.Global.NARS.memory.peek_concept(statement).belief_table
+    j = NALGrammar.Sentences.new_sentence_from_string("(robin-->bird). %1.0;0.5%")
+    Global.Global.NARS.process_judgment_sentence_initial(j)
+    assert answers.get_nowait() is belief_table.peek_max(), "TEST FAILURE: First belief should be pushed as the answer"
+
+    Global.Global.NARS.process_judgment_sentence_initial(j)  # same evidence again, so no better answer
+    assert answers.empty(), "TEST FAILURE: Answer should not be pushed again when the best belief did not improve"
+
+    j = NALGrammar.Sentences.new_sentence_from_string("(robin-->bird). %1.0;0.8%")
+    Global.Global.NARS.process_judgment_sentence_initial(j)  # revised into a more confident answer
+    best_answer = answers.get_nowait()
+    assert best_answer is belief_table.peek_max() and best_answer.value.confidence > 0.8, \
+        "TEST FAILURE: Improved belief should be pushed as the new answer"
+
+    late_answers = queue.Queue()
+    Global.Global.NARS.subscribe_to_question(statement, late_answers.put)
+    assert late_answers.get_nowait() is best_answer, "TEST FAILURE: New subscriber should be given the current best answer"
+
+    Global.Global.NARS.unsubscribe_from_question(statement, subscription)
+    j = NALGrammar.Sentences.new_sentence_from_string("(robin-->bird). %1.0;0.9%")
+    Global.Global.NARS.process_judgment_sentence_initial(j)
+    assert answers.empty(), "TEST FAILURE: Unsubscribed question should not be pushed answers"
+    assert late_answers.get_nowait() is belief_table.peek_max(), "TEST FAILURE: Remaining subscriber was not pushed the better answer"
+
+
+def test_concept_link_graph():
+    """
+        Test that concept links are views into the memory-wide link graph,
+        which compacts the holes left by growing and removing links
+    """
+    memory = NARSMemory.Memory(rng=random.Random(0))
+    conceptA = memory.peek_concept(NALGrammar.Terms.from_string("a"))
+    assert conceptA.link_graph is memory.link_graph, "TEST FAILURE: Concept should link in its memory's graph"
+    assert conceptA.link_row is None and len(conceptA.prediction_links) == 0, \
+        "TEST FAILURE: Concept should have no links, nor a row, until it is linked"
+
+    concepts = [memory.peek_concept(NALGrammar.Terms.from_string("(a=/>b" + str(i) + ")")) for i in range(10)]
+    for i, concept in enumerate(concepts):
+        conceptA.prediction_links.add(concept, priority=i / 10)
+    assert list(conceptA.prediction_links) == concepts, "TEST FAILURE: Links should be iterated in the order they were added"
+    assert concepts[3] in conceptA.prediction_links and conceptA not in concepts[3].prediction_links, \
+        "TEST FAILURE: Links should be one-directional"
+    assert conceptA.prediction_links.get_priority(concepts[3]) == 0.3, "TEST FAILURE: Wrong link priority"
+    assert all(conceptA.prediction_links.peek() is not concepts[0] for _ in range(50)), \
+        "TEST FAILURE: A link with no priority should not be peeked"
+
+    conceptA.prediction_links.remove(concepts[3])
+    conceptA.prediction_links.add(concepts[4], priority=0.9)  # already linked
+    assert len(conceptA.prediction_links) == 9 and concepts[3] not in conceptA.prediction_links, \
+        "TEST FAILURE: Link was not removed"
+    assert conceptA.prediction_links.get_priority(concepts[4]) == 0.9, "TEST FAILURE: Re-adding a link should set its priority"
+
+    adjacency = memory.link_graph.adjacencies["prediction_links"]
+    links_before = sorted(concept.link_row for concept in conceptA.prediction_links)
+    adjacency.compact()
+    assert adjacency.end == adjacency.number_of_links == 9, "TEST FAILURE: Compacted arrays should have no holes"
+    assert sorted(concept.link_row for concept in conceptA.prediction_links) == links_before, "TEST FAILURE: Compaction changed the links"
+
+    full_graph = NARSDataStructures.LinkGraph.LinkGraph(("links",), row_capacity=3)
+    nodes = [NARSMemory.Concept(NALGrammar.Terms.from_string("n" + str(i)), link_graph=full_graph) for i in range(5)]
+    for i, priority in enumerate([0.5, 0.1, 0.7, 0.6]):
+        full_graph.add_link("links", nodes[4], nodes[i], priority)
+    assert list(full_graph.get_view("links", nodes[4])) == [nodes[0], nodes[3], nodes[2]], \
+        "TEST FAILURE: A full row should replace its lowest priority link"
+
+    assert conceptA.prediction_links is conceptA.prediction_links, "TEST FAILURE: Link views should be cached"
+    standalone_concept = NARSMemory.Concept(NALGrammar.Terms.from_string("s"))
+    assert len(standalone_concept.prediction_links) == 0 and standalone_concept.link_graph is not memory.link_graph, \
+        "TEST FAILURE: A concept made outside a Memory should link in a graph of its own"
+
+    # removing a node frees its row once the links to it are purged
+    graph = NARSDataStructures.LinkGraph.LinkGraph(("links",))
+    nodes = [NARSMemory.Concept(NALGrammar.Terms.from_string("m" + str(i)), link_graph=graph) for i in range(4)]
+    graph.add_link("links", nodes[0], nodes[1], 0.5)
+    graph.add_link("links", nodes[0], nodes[2], 0.5)
+    graph.add_link("links", nodes[1], nodes[0], 0.5)
+    removed_row = nodes[1].link_row
+    graph.remove_node(nodes[1])
+    view = graph.get_view("links", nodes[0])
+    assert list(view) == [nodes[2]] and len(view) == 1 and view.peek() is nodes[2], \
+        "TEST FAILURE: Links to a removed node should be skipped"
+    assert graph.nodes[removed_row] is None and nodes[1].link_row is None, \
+        "TEST FAILURE: The graph should not keep a removed node"
+    graph.purge_dead_rows()
+    assert len(graph) == 1, "TEST FAILURE: Purging should drop the links to removed nodes"
+    graph.add_link("links", nodes[0], nodes[3], 0.5)
+    assert nodes[3].link_row == removed_row and list(view) == [nodes[2], nodes[3]], \
+        "TEST FAILURE: A purged row should be reused without the links it had"
+
+    # a full memory reuses the rows of evicted concepts
+    old_capacity = Config.MEMORY_CONCEPT_CAPACITY
+    Config.MEMORY_CONCEPT_CAPACITY = 50
+    try:
+        memory = NARSMemory.Memory(rng=random.Random(0))
+    finally:
+        Config.MEMORY_CONCEPT_CAPACITY = old_capacity
+    for i in range(1000):
+        memory.peek_concept(NALGrammar.Terms.from_string("(a" + str(i) + "=/>b" + str(i) + ")"))
+    graph = memory.link_graph
+    assert len(graph.nodes) < 2 * 50 + NARSDataStructures.LinkGraph.LinkGraph.MIN_DEAD_ROWS_TO_PURGE, \
+        "TEST FAILURE: The link graph should not grow past the memory's capacity"
+    assert all(memory.is_concept_in_memory(node) for node in graph.nodes if node is not None), \
+        "TEST FAILURE: The link graph should only hold concepts that are in memory"
+
+
+def test_interned_concept_keys():
+    """
+        Test that concepts are keyed by dense integer term IDs, which map back to their terms,
+        and are reused only once nothing refers to the evicted concept's term
+    """
+    Global.Global.NARS = NARS.NARS()
+    memory = Global.Global.NARS.memory
+    term = NALGrammar.Terms.from_string("((a-->b)=/>(c-->d))")
+    concept_item = memory.peek_concept_item(term)
+    assert isinstance(concept_item.key, int), "TEST FAILURE: Concept key should be an integer term ID"
+    assert memory.get_term_from_id(concept_item.key) is term, "TEST FAILURE: Term ID did not map back to its term"
+    assert sorted(memory.concepts_bag.item_lookup_dict) == list(range(len(memory.terms_by_id))), \
+        "TEST FAILURE: Term IDs should be dense"
+
+    subject_concept = memory.peek_concept(term.get_subject_term())
+    assert concept_item.object in subject_concept.prediction_links \
+           and subject_concept.prediction_links.peek(concept_item.object) is concept_item.object, \
+        "TEST FAILURE: Subject concept should be linked to the implication concept"
+
+    memory.concepts_bag.TAKE_USING_KEY(concept_item.key)  # as if evicted
+    assert memory.peek_existing_concept_item(term) is None, "TEST FAILURE: Evicted concept should not be found"
+    new_concept_item = memory.peek_concept_item(NALGrammar.Terms.from_string("((a-->b)=/>(c-->d))"))
+    assert new_concept_item.key == concept_item.key, "TEST FAILURE: Re-created concept should keep its term ID"
+    assert memory.peek_concept_item(NALGrammar.Terms.from_string("e")).key == len(memory.terms_by_id) - 1, \
+        "TEST FAILURE: New term should get the next term ID"
+
+    goal = NALGrammar.Sentences.new_sentence_from_string("(c-->d)! %1.0;0.9%")
+    Global.Global.NARS.process_goal_task(NARSDataStructures.Other.Task(goal, is_input_task=True))
+    assert memory.peek_concept_item(goal.statement).budget.get_quality() == 0.999, \
+        "TEST FAILURE: Goal should raise the quality of its statement's concept"
+
+    old_capacity = Config.MEMORY_CONCEPT_CAPACITY
+    Config.MEMORY_CONCEPT_CAPACITY = 50
+    try:
+        memory = NARSMemory.Memory(rng=random.Random(0))
+    finally:
+        Config.MEMORY_CONCEPT_CAPACITY = old_capacity
+    for i in range(1000):
+        memory.peek_concept(NALGrammar.Terms.from_string("(a" + str(i) + "-->b" + str(i % 7) + ")"))
+    assert len(memory.terms_by_id) < 2 * 50, "TEST FAILURE: Term IDs of evicted concepts should be reused"
+    assert all(memory.get_term_from_id(item.key) == item.object.term for item in memory.concepts_bag), \
+        "TEST FAILURE: A reused term ID should map to its new term"
+    assert all(memory.get_term_from_id(subterm_id) is not None for subterm_id in memory.subterm_index.buckets), \
+        "TEST FAILURE: A term ID the subterm index refers to should not be released"
+
+
+def test_subterm_index():
+    """
+        Test that memory indexes statement concepts by subterm,
+        finds related statements through the index, and unindexes evicted concepts
+    """
+    Global.Global.NARS = NARS.NARS(seed=0)
+    memory = Global.Global.NARS.memory
+    statement_concept_items = [memory.peek_concept_item(NALGrammar.Terms.from_string(statement_string))
+                               for statement_string in ("(a-->b)", "(b-->c)", "(d-->b)", "(b<->e)", "((a-->b)==>(f-->g))")]
+    b_id = memory.get_concept_key(NALGrammar.Terms.from_string("b"))
+    index = memory.subterm_index
+    assert sorted(index.get_statement_ids(b_id)) == sorted(item.key for item in statement_concept_items[:4]), \
+        "TEST FAILURE: Statements containing b were not indexed"
+    assert sorted(index.get_statement_ids(b_id, position=NARSDataStructures.Other.SubtermIndex.SUBJECT)) \
+           == [statement_concept_items[1].key, statement_concept_items[3].key], "TEST FAILURE: Wrong statements with b as subject"
+    assert index.get_statement_ids(b_id, copulas=(NALSyntax.Copula.Similarity,)) \
+           == [statement_concept_items[3].key], "TEST FAILURE: Wrong statements with b and a similarity copula"
+
+    rng = random.Random(0)
+    for _ in range(50):
+        statement_id = index.get_random_statement_id(b_id, rng, exclude_id=statement_concept_items[0].key)
+        assert statement_id in (statement_concept_items[1].key, statement_concept_items[2].key, statement_concept_items[3].key), \
+            "TEST FAILURE: Random statement should contain b and not be the excluded statement"
+
+    for _ in range(20):
+        related_concept = memory.get_semantically_related_concept(statement_concept_items[0].object)
+        assert related_concept is not None and related_concept is not statement_concept_items[0].object, \
+            "TEST FAILURE: Did not find a related concept"
+        assert related_concept.term.get_subject_term() == statement_concept_items[0].object.term \
+               or related_concept.term.is_first_order(), \
+            "TEST FAILURE: Related concept should share a subterm with the same copula order, or contain the statement"
+
+    for item in list(memory.concepts_bag):
+        memory.concepts_bag.TAKE_USING_KEY(item.key)  # as if evicted
+        memory.unindex_concept(item.object)
+    assert len(index) == 0, "TEST FAILURE: Evicted statements should be removed from the index"
+    assert index.get_random_statement_id(b_id, rng) is None, "TEST FAILURE: Empty index should have no candidates"
+
+
+def test_discrimination_tree():
+    """
+        Test that memory finds the concepts whose terms unify with a term containing variables,
+        answers questions with variables, and drops evicted concepts from its term index
+    """
+    Global.Global.NARS = NARS.NARS(seed=0)
+    memory = Global.Global.NARS.memory
+    for judgment_string in ("(robin-->bird). %1.0;0.9%", "(sparrow-->bird). %1.0;0.6%", "(robin-->animal). %1.0;0.9%"):
+        judgment = NALGrammar.Sentences.new_sentence_from_string(judgment_string)
+        Global.Global.NARS.process_judgment_task(NARSDataStructures.Other.Task(judgment, is_input_task=True))
+
+    def get_unifiable_term_strings(term_string):
+        return sorted(str(concept.term) for concept in memory.get_unifiable_concepts(NALGrammar.Terms.from_string(term_string)))
+
+    assert get_unifiable_term_strings("(?x-->bird)") == ["(robin --> bird)", "(sparrow --> bird)"], \
+        "TEST FAILURE: Wrong concepts unify with a query variable subject"
+    assert get_unifiable_term_strings("(robin-->#y)") == ["(robin --> animal)", "(robin --> bird)"], \
+        "TEST FAILURE: Wrong concepts unify with an independent variable predicate"
+    assert get_unifiable_term_strings("(?x-->?x)") == [], "TEST FAILURE: A repeated variable must unify with the same term"
+    assert get_unifiable_term_strings("(?x==>?y)") == [], "TEST FAILURE: Terms with another copula should not unify"
+
+    question = NALGrammar.Sentences.new_sentence_from_string("(?x-->bird)?")
+    question_task = NARSDataStructures.Other.Task(question, is_input_task=True)
+    Global.Global.NARS.process_task(question_task)
+    assert not question_task.needs_to_be_answered_in_output, "TEST FAILURE: Question with a variable was not answered"
+
+    concept_item = memory.peek_existing_concept_item(NALGrammar.Terms.from_string("(robin-->bird)"))
+    memory.concepts_bag.TAKE_USING_KEY(concept_item.key)  # as if evicted
+    memory.unindex_concept(concept_item.object)
+    assert get_unifiable_term_strings("(?x-->bird)") == ["(sparrow --> bird)"], \
+        "TEST FAILURE: Evicted concept should be removed from the term index"
+
+
+def test_spatial_buffer_quadtree():
+    """
+        Test that the vision buffer's quadtree truth-values match folding F_Intersection over the children
+    """
+    Global.Global.NARS = NARS.NARS()
+    img = np.random.default_rng(0).integers(0, 256, size=Config.VISION_DIMENSIONS)
+    pyramid = Global.Global.NARS.vision_buffer.calculate_quadtree_pyramid(img)
+
+    def calculate_node_truth_value(level, node):
+        if level == 0:
+            frequencies, confidences = pyramid[0]
+            return NALGrammar.Values.TruthValue(frequencies[node, 0], confidences[node, 0])
+        truth_value = None
+        for child in range(4 * node, 4 * node + 4):
+            child_truth_value = calculate_node_truth_value(level - 1, child)
+            if truth_value is None:
+                truth_value = child_truth_value
+            else:
+                truth_value = NALInferenceRules.TruthValueFunctions.F_Intersection(truth_value.frequency,
+                                                                                   truth_value.confidence,
+                                                                                   child_truth_value.frequency,
+                                                                                   child_truth_value.confidence)
+        return truth_value
+
+    root_level = len(pyramid) - 1
+    expected = calculate_node_truth_value(root_level, 0)
+    frequencies, confidences = pyramid[root_level]
+    assert abs(frequencies[0, 0] - expected.frequency) < 1e-9 and abs(confidences[0, 0] - expected.confidence) < 1e-9, \
+        "TEST FAILURE: Quadtree root truth-value does not match F_Intersection of its leaves"
+
+    Global.Global.NARS.vision_buffer.set_image(img)
+    assert len(Global.Global.NARS.vision_buffer.events_bag) == sum(len(frequencies) for frequencies, _ in pyramid), \
+        "TEST FAILURE: Every quadtree node should enter the events bag"
+
+    vision_buffer = Global.Global.NARS.vision_buffer
+    root_statement = vision_buffer.get_quadtree_statement_term(node=len(vision_buffer.quadtree_subject_terms) - 1,
+                                                               channel=0)
+    vision_buffer.set_image(255 - img)
+    assert any(item.object.statement is root_statement for item in vision_buffer.events_bag), \
+        "TEST FAILURE: Quadtree terms should be reused across frames"
+
+
+def test_memory_snapshot_round_trip():
+    """
+        Test if a memory snapshot restores concepts, beliefs, and prediction links
+    """
+    memory = Global.Global.NARS.memory
+    for i in range(10):
+        j = NALGrammar.Sentences.new_sentence_from_string("(s" + str(i) + "-->p" + str(i) + "). %0.8;0.7%")
+        memory.peek_concept(j.statement).belief_table.put(j)
+    implication = NALGrammar.Terms.from_string("((s0-->p0) =/> (s1-->p1))")
+    memory.peek_concept(implication)
+
+    filename = "test_memory_snapshot.nars"
+    NARSPersistence.save_memory_snapshot(memory, filename)
+    loaded_memory, _, skipped = NARSPersistence.load_memory_snapshot(filename)
+    os.remove(filename)
+
+    assert skipped == 0, "TEST FAILURE: Snapshot skipped " + str(skipped) + " concepts"
+    assert len(loaded_memory) == len(memory), "TEST FAILURE: Snapshot did not restore every concept"
+    for i in range(10):
+        statement = NALGrammar.Terms.from_string("(s" + str(i) + "-->p" + str(i) + ")")
+        belief = loaded_memory.peek_concept(statement).belief_table.peek()
+        assert belief is not None and belief.value.frequency == 0.8 and belief.value.confidence == 0.7, \
+            "TEST FAILURE: Snapshot did not restore belief for " + str(statement)
+    subject_concept = loaded_memory.peek_concept(NALGrammar.Terms.from_string("(s0-->p0)"))
+    assert len(subject_concept.prediction_links) == 1, "TEST FAILURE: Snapshot did not restore prediction link"
+
+
+def test_write_ahead_log_recovery():
+    """
+        Test if memory changes logged after a snapshot are recovered by a restarted NARS,
+        including after the log is compacted, and belief tables emptied between vision frames
+    """
+    old_settings = (Config.WRITE_AHEAD_LOG_ENABLED, Config.WRITE_AHEAD_LOG_FILENAME, Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME)
+    Config.WRITE_AHEAD_LOG_ENABLED = True
+    Config.WRITE_AHEAD_LOG_FILENAME = "test_memory.wal"
+    Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME = "test_memory.nars"
+    old_NARS = Global.Global.NARS
+    try:
+        nars = NARS.NARS()
+        nars.process_judgment_sentence_initial(NALGrammar.Sentences.new_sentence_from_string("(a-->b). %0.8;0.7%"))
+        nars.compact_write_ahead_log()
+        nars.process_judgment_sentence_initial(NALGrammar.Sentences.new_sentence_from_string("(c-->d). %0.6;0.5%"))
+        Global.Global.NARS = nars
+        nars.vision_buffer.set_image(np.ones(shape=Config.VISION_DIMENSIONS))
+        nars.vision_buffer.set_image(np.full(shape=Config.VISION_DIMENSIONS, fill_value=0.2))  # replaces the beliefs
+        quadtree_beliefs = {str(concept_item.object.term): concept_item.object.belief_table.peek()
+                            for concept_item in nars.vision_buffer.quadtree_concept_items.values()}
+        nars.write_ahead_log.flush()  # then "crash" without saving
+
+        recovered_nars = NARS.NARS()
+        Global.Global.NARS = recovered_nars
+        for statement_string, frequency in [("(a-->b)", 0.8), ("(c-->d)", 0.6)]:
+            statement = NALGrammar.Terms.from_string(statement_string)
+            belief = recovered_nars.memory.peek_concept(statement).belief_table.peek()
+            assert belief is not None and belief.value.frequency == frequency, \
+                "TEST FAILURE: Belief " + statement_string + " was not recovered from the write-ahead log"
+        for statement_string, belief in quadtree_beliefs.items():
+            belief_table = recovered_nars.memory.peek_concept(NALGrammar.Terms.from_string(statement_string)).belief_table
+            assert len(belief_table) == 1 and belief_table.peek().value.frequency == belief.value.frequency \
+                   and belief_table.peek().value.confidence == belief.value.confidence, \
+                "TEST FAILURE: Quadtree belief " + statement_string + " was not recovered from the latest frame"
+        recovered_nars.write_ahead_log.close()
+        nars.write_ahead_log.close()
+    finally:
+        for filename in (Config.WRITE_AHEAD_LOG_FILENAME, Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME):
+            if os.path.exists(filename): os.remove(filename)
+        Config.WRITE_AHEAD_LOG_ENABLED, Config.WRITE_AHEAD_LOG_FILENAME, Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME = old_settings
+        Global.Global.NARS = old_NARS
+
+
+def test_write_ahead_log_clean_exit():
+    """
+        Test if records still buffered (fewer than one fsync batch) are written when a NARS process exits cleanly
+    """
+    filenames = ("test_exit_memory.wal", "test_exit_memory.nars")
+    script = "\n".join([
+        "import Config",
+        "Config.GUI_USE_INTERFACE, Config.SILENT_MODE = False, True",
+        "Config.WRITE_AHEAD_LOG_ENABLED = True",
+        "Config.WRITE_AHEAD_LOG_FILENAME, Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME = " + repr(filenames),
+        "Config.WRITE_AHEAD_LOG_FSYNC_BATCH_SIZE = 256",
+        "import NARS, NALGrammar",
+        "nars = NARS.NARS()",
+        "nars.process_judgment_sentence_initial(NALGrammar.Sentences.new_sentence_from_string('(a-->b). %0.8;0.7%'))",
+        "assert nars.write_ahead_log.number_of_pending_records > 0"])
+    old_settings = (Config.WRITE_AHEAD_LOG_ENABLED, Config.WRITE_AHEAD_LOG_FILENAME, Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME)
+    old_NARS = Global.Global.NARS
+    try:
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        completed = subprocess.run([sys.executable, "-c", script], env=environment, capture_output=True)
+        assert completed.returncode == 0, "ERROR: NARS process failed: " + completed.stderr.decode()
+
+        Config.WRITE_AHEAD_LOG_ENABLED = True
+        Config.WRITE_AHEAD_LOG_FILENAME, Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME = filenames
+        recovered_nars = NARS.NARS()
+        belief = recovered_nars.memory.peek_concept(NALGrammar.Terms.from_string("(a-->b)")).belief_table.peek()
+        recovered_nars.write_ahead_log.close()
+        assert belief is not None and belief.value.frequency == 0.8, \
+            "TEST FAILURE: Buffered write-ahead log records were lost on a clean exit"
+    finally:
+        for filename in filenames:
+            if os.path.exists(filename): os.remove(filename)
+        Config.WRITE_AHEAD_LOG_ENABLED, Config.WRITE_AHEAD_LOG_FILENAME, Config.WRITE_AHEAD_LOG_SNAPSHOT_FILENAME = old_settings
+        Global.Global.NARS = old_NARS
+
+
+def test_working_cycle_instrumentation():
+    """
+        Test that the working cycle counts tasks, derivations, and concepts, and logs metrics as JSON lines
+    """
+    Global.Global.NARS = NARS.NARS()
+    filename = "test_working_cycle_instrumentation.jsonl"
+    instrumentation = NARSInstrumentation.Instrumentation(Global.Global.NARS, log_interval=2, log_filename=filename)
+    Global.Global.NARS.instrumentation = instrumentation
+    try:
+        for sentence_string in ("(&&,(a-->b),(c-->d)). :|: %1.0;0.9%", "(&&,(e-->f),(g-->h)). :|: %1.0;0.9%"):
+            j = NALGrammar.Sentences.new_sentence_from_string(sentence_string)
+            Global.Global.NARS.global_buffer.PUT_NEW(NARSDataStructures.Other.Task(j, is_input_task=True))
+        Global.Global.NARS.do_working_cycles(4)
+
+        snapshot = instrumentation.snapshot()
+        assert snapshot["cycles"] == 4, "TEST FAILURE: Instrumentation should have counted 4 cycles"
+        assert snapshot["tasks_processed"] >= 2, "TEST FAILURE: Input tasks were not counted as processed"
+        assert snapshot["derivations"] > 0, "TEST FAILURE: Temporal conjunction of the 2 events was not counted"
+        assert snapshot["concepts_created"] >= 3, "TEST FAILURE: Concepts for the events were not counted"
+        assert all(seconds >= 0 for seconds in snapshot["phase_seconds"].values()) \
+               and set(snapshot["phase_seconds"]) == set(NARSInstrumentation.Instrumentation.PHASES), \
+            "TEST FAILURE: Every working cycle phase should be timed"
+
+        with open(filename) as file:
+            lines = [json.loads(line) for line in file]
+        assert [line["cycles"] for line in lines] == [2, 4], "TEST FAILURE: Metrics should be logged every 2 cycles"
+
+        memory = Global.Global.NARS.memory
+        memory.concepts_bag.capacity = len(memory)
+        memory.peek_concept(NALGrammar.Terms.from_string("z"))
+        assert memory.number_of_concepts_evicted == 1, "TEST FAILURE: Concept purged from a full memory was not counted"
+    finally:
+        if os.path.exists(filename): os.remove(filename)
+
+
+def test_seeded_reasoner_is_reproducible():
+    """
+        Test that reasoners given the same seed make the same random choices, regardless of the global random state
+    """
+    def run(seed):
+        Global.Global.NARS = NARS.NARS(seed=seed)
+        random.seed()  # the global random state should not matter
+        for i in range(10):
+            j = NALGrammar.Sentences.new_sentence_from_string("(a" + str(i) + "-->b). %1.0;0.9%")
+            Global.Global.NARS.global_buffer.PUT_NEW(NARSDataStructures.Other.Task(j, is_input_task=True))
+        Global.Global.NARS.do_working_cycles(10)
+        memory = Global.Global.NARS.memory
+        return [str(memory.concepts_bag.peek()) for _ in range(20)]
+
+    assert run(seed=1) == run(seed=1), "TEST FAILURE: Reasoners with the same seed did not make the same random choices"
+    assert run(seed=1) != run(seed=2), "TEST FAILURE: Reasoners with different seeds made the same random choices"
+
+
+def test_knowledge_base_promotion():
+    """
+        Test if concepts missing from memory are promoted from a memory-mapped knowledge base
+    """
+    path = "test_knowledge_base"
+    judgments = [NALGrammar.Sentences.new_sentence_from_string("(robin-->bird). %0.9;0.8%"),
+                 NALGrammar.Sentences.new_sentence_from_string("(bird-->animal). %1.0;0.7%")]
+    NARSKnowledgeBase.build_knowledge_base(path, judgments)
+    try:
+        memory = NARSMemory.Memory(rng=random.Random(0))
+        memory.attach_knowledge_base(path)
+        assert len(memory.knowledge_base) == 5, "TEST FAILURE: Knowledge base should hold 2 statements and 3 subterms"
+
+        robin_concept = memory.peek_concept(NALGrammar.Terms.from_string("(robin-->bird)"))
+        belief = robin_concept.belief_table.peek()
+        assert belief is not None and abs(belief.value.frequency - 0.9) < 1e-6, \
+            "TEST FAILURE: Belief was not promoted from the knowledge base"
+        assert memory.peek_concept(NALGrammar.Terms.from_string("bird")) in robin_concept.term_links, \
+            "TEST FAILURE: Knowledge base links were not promoted into term links"
+
+        # the related statement is only promoted once it has been looked up enough times
+        related_term = NALGrammar.Terms.from_string("(bird-->animal)")
+        for _ in range(50):
+            if len(memory.knowledge_base_hits) > 0: break
+            assert memory.get_related_concept_from_knowledge_base(robin_concept) is None, \
+                "TEST FAILURE: Related statement was promoted on its first lookup"
+        assert memory.knowledge_base_hits != {} and memory.peek_existing_concept_item(related_term) is None, \
+            "TEST FAILURE: Related statement should be looked up once and not yet promoted"
+        related_concept = None
+        for _ in range(50):
+            related_concept = related_concept or memory.get_related_concept_from_knowledge_base(robin_concept)
+        assert related_concept is not None and str(related_concept) == "(bird --> animal)", \
+            "TEST FAILURE: Knowledge base links did not lead to the related statement"
+        belief = related_concept.belief_table.peek()
+        assert belief is not None and belief.value.frequency == 1.0, \
+            "TEST FAILURE: Belief was not promoted from the knowledge base"
+        assert len(memory.peek_concept(NALGrammar.Terms.from_string("(robin-->animal)")).belief_table) == 0, \
+            "TEST FAILURE: Concept not in the knowledge base should have no beliefs"
+    finally:
+        memory = None
+        shutil.rmtree(path)
+
+
+def test_knowledge_base_promotion_of_evicted_concept():
+    """
+        Test that peeking a knowledge base concept that is evicted while its subterms are created returns no concept
+    """
+    path = "test_knowledge_base"
+    NARSKnowledgeBase.build_knowledge_base(path, [NALGrammar.Sentences.new_sentence_from_string("(a-->b). %0.9;0.8%")])
+    old_capacity = Config.MEMORY_CONCEPT_CAPACITY
+    Config.MEMORY_CONCEPT_CAPACITY = 3
+    try:
+        for seed in range(20):  # the new concept is evicted for some seeds
+            memory = NARSMemory.Memory(rng=random.Random(seed))
+            memory.attach_knowledge_base(path)
+            for atom in ("c", "d", "e"):
+                memory.peek_concept(NALGrammar.Terms.from_string(atom))
+            concept_item = memory.peek_concept_item(NALGrammar.Terms.from_string("(a-->b)"))
+            assert concept_item is None or memory.is_concept_in_memory(concept_item.object), \
+                "TEST FAILURE: Peeked concept should be in memory, or None if it was evicted"
+    finally:
+        Config.MEMORY_CONCEPT_CAPACITY = old_capacity
+        memory = None
+        shutil.rmtree(path)
 
 
 def main():
@@ -271,6 +865,9 @@ def main():
     test_buffer_removemax()
     test_buffer_removemin()
     # test_event_buffer_processing()
+    test_input_queue()
+    test_temporal_module_ring_buffer()
+    test_scheduler()
 
     """
         Bag Tests
@@ -279,6 +876,23 @@ def main():
     test_bag_clear()
     test_bag_priority_changing()
 
+    """
+        Memory Tests
+    """
+    test_concept_link_graph()
+    test_question_subscriptions()
+    test_interned_concept_keys()
+    test_subterm_index()
+    test_discrimination_tree()
+    test_spatial_buffer_quadtree()
+    test_memory_snapshot_round_trip()
+    test_write_ahead_log_recovery()
+    test_write_ahead_log_clean_exit()
+    test_knowledge_base_promotion()
+    test_knowledge_base_promotion_of_evicted_concept()
+    test_working_cycle_instrumentation()
+    test_seeded_reasoner_is_reproducible()
+
     print("All Data Structure Tests successfully passed.")
 
 
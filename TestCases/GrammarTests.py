@@ -1,3 +1,5 @@
+import numpy as np
+
 import NARSDataStructures
 import NALGrammar
 import NALSyntax
@@ -33,6 +35,119 @@ def calculate_syntactic_complexity_test():
     assert singleton_set_internal_compound_term._calculate_syntactic_complexity() == singleton_set_internal_compound_term_complexity
     assert statement_term._calculate_syntactic_complexity() == statement_term_complexity
 
+def term_metadata_test():
+    """
+        Test the structural metadata computed when a term is constructed
+    """
+    statement_term = NALGrammar.Terms.from_string("((&&,(a-->b),(c-->#x))=/>(d-->e))")
+    assert statement_term.depth == 3, "TEST FAILURE: Depth should be 3, not " + str(statement_term.depth)
+    assert statement_term.syntactic_complexity == 11, "TEST FAILURE: Complexity should be 11"
+    assert statement_term.has_variable and statement_term.contains_variable(), "TEST FAILURE: Variable not found"
+    assert not statement_term.get_predicate_term().has_variable, "TEST FAILURE: Predicate has no variable"
+    assert not statement_term.is_first_order() and statement_term.get_predicate_term().is_first_order(), \
+        "TEST FAILURE: Wrong order"
+    assert statement_term.kind == NALSyntax.Copula.PredictiveImplication \
+           and statement_term.get_subject_term().kind == NALSyntax.TermConnector.Conjunction, \
+        "TEST FAILURE: Wrong copula or connector class"
+
+    # order-invariant subterms are sorted, so both orders give the same structure
+    assert NALGrammar.Terms.from_string("(&&,(c-->d),(a-->b))").structural_hash \
+           == NALGrammar.Terms.from_string("(&&,(a-->b),(c-->d))").structural_hash, \
+        "TEST FAILURE: Equal terms should have equal structural hashes"
+    assert NALGrammar.Terms.from_string("(a-->b)").structural_hash \
+           != NALGrammar.Terms.from_string("(a<->b)").structural_hash, \
+        "TEST FAILURE: Terms differing only by copula should have different structural hashes"
+
+    NARS.NARS()  # creates the SELF term
+    operation_term = NALGrammar.Terms.from_string("((*,{SELF})-->op)")
+    assert operation_term.is_op() and operation_term.contains_op(), "TEST FAILURE: Operation not recognized"
+    assert NALGrammar.Terms.from_string("((a-->b)=/>((*,{SELF})-->op))").contains_op(), \
+        "TEST FAILURE: Operation in an implication not recognized"
+    assert not NALGrammar.Terms.from_string("((*,{OTHER})-->op)").is_op(), "TEST FAILURE: Not an operation"
+
+
+def subterm_storage_test():
+    """
+        Test that subterms are stored as tuples, in canonical order for order-invariant connectors
+    """
+    subterms = [NALGrammar.Terms.from_string("c"), NALGrammar.Terms.from_string("a"), NALGrammar.Terms.from_string("b")]
+    conjunction = NALGrammar.Terms.CompoundTerm(subterms=subterms, term_connector=NALSyntax.TermConnector.Conjunction)
+    assert isinstance(conjunction.subterms, tuple), "TEST FAILURE: Subterms should be stored as a tuple"
+    assert [subterm.structural_hash for subterm in conjunction.subterms] \
+           == sorted(subterm.structural_hash for subterm in subterms), \
+        "TEST FAILURE: Order-invariant subterms were not sorted by structural hash"
+    assert str(conjunction) == str(NALGrammar.Terms.from_string("(&&,b,c,a)")), \
+        "TEST FAILURE: Same conjunction in a different order should have the same string"
+    assert [str(subterm) for subterm in subterms] == ["c", "a", "b"], "TEST FAILURE: Caller's subterm list was changed"
+
+    sequence = NALGrammar.Terms.CompoundTerm(subterms=subterms, term_connector=NALSyntax.TermConnector.SequentialConjunction)
+    assert [str(subterm) for subterm in sequence.subterms] == ["c", "a", "b"], \
+        "TEST FAILURE: Sequence subterms should keep their order"
+
+    statement_term = NALGrammar.Terms.from_string("(b<->a)")
+    assert isinstance(statement_term.subterms, tuple) \
+           and statement_term.subterms == NALGrammar.Terms.from_string("(a<->b)").subterms, \
+        "TEST FAILURE: Symmetric statement subterms should be a sorted tuple"
+
+    statement_terms = [NALGrammar.Terms.StatementTerm(NALGrammar.Terms.AtomicTerm(name), NALGrammar.Terms.AtomicTerm("p"),
+                                                      NALSyntax.Copula.Inheritance) for name in ("s2", "s1")]
+    NALGrammar.Terms.CompoundTerm(subterms=statement_terms, term_connector=NALSyntax.TermConnector.Conjunction)
+    assert all(statement_term._string is None for statement_term in statement_terms), \
+        "TEST FAILURE: Sorting subterms should not build their strings"
+
+
+def lazy_term_string_test():
+    """
+        Test that compound term strings are only built when needed, and terms compare by structure
+    """
+    a, b = NALGrammar.Terms.AtomicTerm("a"), NALGrammar.Terms.AtomicTerm("b")
+    statement_term = NALGrammar.Terms.StatementTerm(a, b, NALSyntax.Copula.Inheritance)
+    conjunction = NALGrammar.Terms.CompoundTerm([statement_term, a], NALSyntax.TermConnector.SequentialConjunction)
+    same_conjunction = NALGrammar.Terms.from_string("(&/,(a-->b),a)")
+
+    assert conjunction._string is None, "TEST FAILURE: Term string should not be built on construction"
+    assert conjunction == same_conjunction and hash(conjunction) == hash(same_conjunction), \
+        "TEST FAILURE: Terms with the same structure should be equal, with equal hashes"
+    assert conjunction._string is None and statement_term._string is None, \
+        "TEST FAILURE: Comparing terms should not build their strings"
+    assert conjunction != NALGrammar.Terms.from_string("(&/,a,(a-->b))") \
+           and statement_term != NALGrammar.Terms.from_string("(a<->b)"), "TEST FAILURE: Different terms are equal"
+    assert {conjunction: 1}.get(same_conjunction) == 1, "TEST FAILURE: Equal term not found in a dict"
+    assert conjunction != str(conjunction) and a != "a", "TEST FAILURE: Terms should not equal their strings"
+
+    assert str(conjunction) == "(&/,(a --> b),a)", "TEST FAILURE: Wrong term string " + str(conjunction)
+    for term_string in ("{a}", "((a-->b)=/>(&&,c,(*,{SELF},d)))"):
+        term = NALGrammar.Terms.from_string(term_string)
+        assert NALGrammar.Terms.from_string(str(term)) == term, "TEST FAILURE: Term string did not parse back to the term"
+
+
+def spatial_term_digest_test():
+    """
+        Test that spatial terms are identified by a fixed-size content digest, without building their strings
+    """
+    def make_spatial_term(bright_pixel):
+        elements = np.empty(shape=(28, 28), dtype=object)
+        for (y, x), _ in np.ndenumerate(elements):
+            predicate = "bright" if (y, x) == bright_pixel else "dark"
+            elements[y, x] = NALGrammar.Terms.from_string("(p" + str(y) + "_" + str(x) + "-->" + predicate + ")")
+        return NALGrammar.Terms.SpatialTerm(elements, NALSyntax.TermConnector.ArrayConjunction)
+
+    spatial_term = make_spatial_term((3, 4))
+    same_spatial_term = make_spatial_term((3, 4))
+    assert len(spatial_term.content_digest) == NALGrammar.Terms.SpatialTerm.DIGEST_SIZE, \
+        "TEST FAILURE: Digest should have a fixed size"
+    assert spatial_term == same_spatial_term and hash(spatial_term) == hash(same_spatial_term), \
+        "TEST FAILURE: Spatial terms with the same elements should be equal, with equal hashes"
+    assert spatial_term != make_spatial_term((4, 3)), "TEST FAILURE: Spatial terms with different elements are equal"
+    assert spatial_term._string is None and same_spatial_term._string is None, \
+        "TEST FAILURE: Spatial term strings should not be built to compare or hash them"
+
+    memory = NARS.NARS().memory
+    concept_item = memory.peek_concept_item(spatial_term)
+    assert memory.peek_existing_concept_item(same_spatial_term) is concept_item, \
+        "TEST FAILURE: Array concept should be found by an equal spatial term"
+
+
 def array_term_indexing_test():
     array_term_name = "M"
     array_term = NALGrammar.Terms.SpatialTerm(name=array_term_name, dimensions=(5, 5)) # create a 5x5 array term
@@ -64,6 +179,10 @@ def main():
         Term Tests
     """
     calculate_syntactic_complexity_test()
+    term_metadata_test()
+    subterm_storage_test()
+    lazy_term_string_test()
+    spatial_term_digest_test()
     array_term_indexing_test()
 
     print("All Grammar Tests successfully passed.")
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import os
+import socket
+import tempfile
+
+import numpy as np
+
+import Config
+import Global
+import InputChannel
+import NARS
+import NARSServer
+
+"""
+    Created: October 19, 2026
+    Purpose: Unit Testing for the NARS input channel
+"""
+
+
+def test_frame_stream_drops_oldest():
+    """
+        Test that a full frame stream drops its oldest frame and keeps the rest in order
+    """
+    stream = InputChannel.FrameStream(capacity=3)
+    for i in range(5):
+        stream.put(np.full(shape=(2, 2), fill_value=i))
+
+    assert len(stream) == 3, "TEST FAILURE: Frame stream should hold 3 frames, not " + str(len(stream))
+    assert stream.number_of_frames_dropped == 2, "TEST FAILURE: Frame stream should have dropped 2 frames"
+    for expected_value in (2, 3, 4):
+        frame = stream.take()
+        assert frame[0, 0] == expected_value, "TEST FAILURE: Frames were not taken oldest first"
+    assert stream.take() is None, "TEST FAILURE: Empty frame stream should return None"
+    assert stream.number_of_frames_taken == 3, "TEST FAILURE: Frame stream should have counted 3 frames taken"
+
+
+def test_frame_stream_replay():
+    """
+        Test that frames replayed from a .npy file reach the vision buffer in order, at the configured rate
+    """
+    Global.Global.NARS = NARS.NARS()
+    filename = "test_frame_stream_replay.npy"
+    frames = np.stack([np.full(shape=Config.VISION_DIMENSIONS, fill_value=value) for value in (0, 255)])
+    np.save(filename, frames)
+
+    stream = InputChannel.frame_stream
+    while stream.take() is not None: pass
+    frames_per_cycle = Config.VISION_FRAMES_PER_CYCLE
+    Config.VISION_FRAMES_PER_CYCLE = 1
+    try:
+        InputChannel.replay_frames_from_file(filename).join()
+        assert len(stream) == len(frames), "TEST FAILURE: Not every replayed frame was put into the stream"
+
+        for i in range(len(frames)):
+            InputChannel.process_input_channel()
+            assert len(stream) == len(frames) - (i + 1), "TEST FAILURE: Input channel should take 1 frame per cycle"
+            assert np.array_equal(Global.Global.NARS.vision_buffer.img, frames[i]), \
+                "TEST FAILURE: Replayed frames were not seen in order"
+    finally:
+        Config.VISION_FRAMES_PER_CYCLE = frames_per_cycle
+        os.remove(filename)
+
+
+def test_load_input_streaming():
+    """
+        Test that a NAL file is loaded in batches by worker processes, skipping bad lines, and can be resumed
+    """
+    Global.Global.NARS = NARS.NARS()
+    global_buffer = Global.Global.NARS.global_buffer
+    filename = "test_load_input_streaming.nal"
+    number_of_sentences = 500
+    with open(filename, "w") as file:
+        for i in range(number_of_sentences):
+            file.write("(a" + str(i) + "-->b). %1.0;0.9%\n")
+            if i == 100: file.write("not narsese\n")
+
+    def load_all(loader):
+        number_loaded = 0
+        while not loader.is_done():
+            number_loaded += loader.load_batch()
+            while global_buffer.take() is not None: pass  # the working cycle would consume these
+        return number_loaded
+
+    try:
+        loader = InputChannel.NALFileLoader(filename, number_of_workers=2, chunk_size=1024, batch_size=50)
+        assert load_all(loader) == number_of_sentences, "TEST FAILURE: Not every sentence in the file was loaded"
+        assert loader.number_of_sentences_rejected == 1, "TEST FAILURE: The bad line should have been rejected"
+        assert loader.offset == os.path.getsize(filename), "TEST FAILURE: Loader should end at the end of the file"
+
+        # resume after the first 10 lines
+        with open(filename, "rb") as file:
+            resume_offset = sum(len(file.readline()) for _ in range(10))
+        loader = InputChannel.NALFileLoader(filename, start_offset=resume_offset, number_of_workers=0, batch_size=50)
+        assert load_all(loader) == number_of_sentences - 10, "TEST FAILURE: Resumed load should skip the first 10 lines"
+    finally:
+        os.remove(filename)
+
+
+def test_input_record_and_replay():
+    """
+        Test that a recorded input stream is replayed on the same working cycles it was recorded on
+    """
+    Global.Global.NARS = NARS.NARS()
+    filename = "test_input_record_and_replay.jsonl"
+    try:
+        InputChannel.start_recording_input(filename)
+        InputChannel.parse_and_queue_input_string("(a-->b). %1.0;0.9%")
+        Global.Global.NARS.do_working_cycles(3)
+        InputChannel.parse_and_queue_input_string("(b-->c). %1.0;0.9%")
+        Global.Global.NARS.do_working_cycle()
+        InputChannel.stop_recording_input()
+
+        with open(filename) as file:
+            recording = [json.loads(line) for line in file]
+        assert [input_string for _, input_string in recording] == ["(a-->b). %1.0;0.9%", "(b-->c). %1.0;0.9%"], \
+            "TEST FAILURE: Inputs were not recorded in order"
+        assert recording[1][0] - recording[0][0] == 3, "TEST FAILURE: Inputs were not recorded with their working cycles"
+
+        Global.Global.NARS = NARS.NARS()
+        InputChannel.replay_input_from_file(filename)
+        number_taken = InputChannel.input_queue.number_taken
+        taken_per_cycle = []
+        for _ in range(5):
+            Global.Global.NARS.do_working_cycle()
+            taken_per_cycle.append(InputChannel.input_queue.number_taken - number_taken)
+        assert taken_per_cycle == [1, 1, 1, 2, 2], \
+            "TEST FAILURE: Replayed inputs were not input on their recorded cycles: " + str(taken_per_cycle)
+    finally:
+        InputChannel.stop_recording_input()
+        InputChannel.input_replay.clear()
+        if os.path.exists(filename): os.remove(filename)
+
+
+def test_token_bucket():
+    """
+        Test that the rate limiter allows a burst, then makes the caller wait
+    """
+    rate_limit = NARSServer.TokenBucket(rate=10, burst=2)
+    assert rate_limit.take() == 0 and rate_limit.take() == 0, "TEST FAILURE: Burst should be allowed without waiting"
+    wait_time = rate_limit.take()
+    assert 0 < wait_time <= 0.1, "TEST FAILURE: Third token should need a wait of up to 0.1s, not " + str(wait_time)
+
+
+def run_server_client(server, connect):
+    """
+        Send a belief and then a question as a network client, running working cycles until the answer comes back.
+
+        :param connect: coroutine function opening a (reader, writer) connection to the server
+        :return: the line the client received
+    """
+    async def client():
+        reader, writer = await connect()
+        other_reader, other_writer = await connect()  # a second client, which should not get the answer
+
+        number_taken = InputChannel.input_queue.number_taken
+        writer.write(b"(robin-->bird). %1.0;0.9%\n")
+        await writer.drain()
+        for _ in range(50):
+            Global.Global.NARS.do_working_cycle()
+            if InputChannel.input_queue.number_taken > number_taken: break  # the belief has been input
+            await asyncio.sleep(0.01)
+
+        writer.write(b"(robin-->bird)?\n")
+        await writer.drain()
+        answer = None
+        for _ in range(50):
+            Global.Global.NARS.do_working_cycle()
+            try:
+                answer = await asyncio.wait_for(reader.readline(), timeout=0.05)
+                break
+            except asyncio.TimeoutError:
+                pass
+
+        try:
+            other_answer = await asyncio.wait_for(other_reader.readline(), timeout=0.1)
+        except asyncio.TimeoutError:
+            other_answer = None
+        assert other_answer is None, "TEST FAILURE: Answer was sent to a client that didn't ask"
+
+        writer.close()
+        other_writer.close()
+        return answer.decode(NARSServer.NARSServer.ENCODING) if answer is not None else None
+
+    Global.Global.NARS = NARS.NARS()
+    Global.Global.NARS.server = server
+    try:
+        return asyncio.run(client())
+    finally:
+        server.stop()
+        Global.Global.NARS.server = None
+
+
+def test_server_answers_client():
+    """
+        Test that a question sent over TCP is answered to the client that asked it
+    """
+    server = NARSServer.NARSServer(host="127.0.0.1", port=0, unix_socket_path="")
+    host, port = server.start()
+    answer = run_server_client(server, lambda: asyncio.open_connection(host, port))
+    assert answer is not None and answer.startswith("OUT: "), "TEST FAILURE: Client did not get an answer, got " + str(answer)
+    assert "robin-->bird" in answer.replace(" ", ""), "TEST FAILURE: Wrong answer sent to client: " + answer
+
+    if hasattr(socket, "AF_UNIX"):
+        path = os.path.join(tempfile.mkdtemp(), "nars.sock")
+        server = NARSServer.NARSServer(unix_socket_path=path)
+        server.start()
+        answer = run_server_client(server, lambda: asyncio.open_unix_connection(path))
+        assert answer is not None and answer.startswith("OUT: "), "TEST FAILURE: Unix socket client did not get an answer"
+        os.remove(path)
+
+
+def test_server_startup_failure():
+    """
+        Test that a server that cannot listen raises the original error
+    """
+    with socket.socket() as taken_socket:
+        taken_socket.bind(("127.0.0.1", 0))
+        taken_socket.listen()
+        server = NARSServer.NARSServer(host="127.0.0.1", port=taken_socket.getsockname()[1], unix_socket_path="")
+        try:
+            server.start()
+            assert False, "TEST FAILURE: Server should not start on a port that is in use"
+        except OSError:
+            pass
+        server.stop()  # nothing to stop
+        server.broadcast("EXE: nothing")  # ignored, not sent to a closed loop
+
+
+def test_server_rejects_commands():
+    """
+        Test that shell commands sent by a network client are rejected instead of executed
+    """
+    Global.Global.NARS = NARS.NARS()
+    saves = []
+    Global.Global.NARS.save_memory_to_disk = lambda: saves.append(True)
+    server = NARSServer.NARSServer(host="127.0.0.1", port=0, unix_socket_path="")
+    host, port = server.start()
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"save\n")
+        await writer.drain()
+        reply = await asyncio.wait_for(reader.readline(), timeout=5)
+        writer.close()
+        return reply.decode(NARSServer.NARSServer.ENCODING)
+
+    try:
+        reply = asyncio.run(client())
+    finally:
+        server.stop()
+    assert reply.startswith("ERROR:"), "TEST FAILURE: Command from a network client was not rejected, got " + reply
+
+    # a command after a carriage return is only split into its own line when the input is processed
+    InputChannel.parse_and_queue_input_string("(a-->b).\rsave", source=InputChannel.SOURCE_NETWORK, origin=1)
+    InputChannel.process_input_channel()
+    assert len(saves) == 0, "TEST FAILURE: Command from a network client was executed"
+
+
+def test_server_drops_slow_client():
+    """
+        Test that a client that doesn't read its replies is disconnected once too many are waiting to be sent
+    """
+    server = NARSServer.NARSServer(host="127.0.0.1", port=0, unix_socket_path="", max_write_buffer=65536)
+    host, port = server.start()
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        while len(server.clients) == 0: await asyncio.sleep(0.01)
+        for _ in range(1000):  # never read, until the socket buffers are full
+            if len(server.clients) == 0: break
+            server.broadcast("EXE: " + "x" * 65536)
+            await asyncio.sleep(0.01)
+        writer.close()
+        return len(server.clients) == 0
+
+    try:
+        disconnected = asyncio.run(client())
+    finally:
+        server.stop()
+    assert disconnected, "TEST FAILURE: Client that does not read its replies was not disconnected"
+
+
+def main():
+    """
+        Vision Input Tests
+    """
+    test_frame_stream_drops_oldest()
+    test_frame_stream_replay()
+
+    """
+        File Input Tests
+    """
+    test_load_input_streaming()
+    test_input_record_and_replay()
+
+    """
+        Network Input Tests
+    """
+    test_token_bucket()
+    test_server_answers_client()
+    test_server_startup_failure()
+    test_server_rejects_commands()
+    test_server_drops_slow_client()
+
+    print("All Input Channel Tests successfully passed.")
+
+
+if __name__ == "__main__":
+    Config.DEBUG = False
+    Config.GUI_USE_INTERFACE = False
+    Config.SILENT_MODE = True
+    main()
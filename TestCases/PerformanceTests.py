@@ -0,0 +1,361 @@
+import os
+import timeit
+import tracemalloc
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+import Config
+import Global
+import InputChannel
+import NALGrammar
+import NALSyntax
+import NARS
+import NARSDataStructures
+import NARSMemory
+import NARSPersistence
+import numpy as np
+
+"""
+    Created: October 19, 2026
+    Purpose: Throughput benchmarks for NARS data structures.
+        These print measurements instead of asserting on them, since timings depend on the machine.
+"""
+
+
+def print_benchmark_result(name, count, unit, seconds):
+    rate = count / seconds if seconds > 0 else float("inf")
+    print(name + ": " + str(count) + " " + unit + " in " + "{:.3f}".format(seconds) + "s ("
+          + "{:.0f}".format(rate) + " " + unit + "/s)")
+
+
+def get_peak_rss_in_megabytes():
+    """
+        :return: peak resident set size of this process in MiB; None if the platform can't report it
+    """
+    if resource is None: return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / 2 ** 10 if os.uname().sysname != "Darwin" else peak_rss / 2 ** 20  # KiB on Linux, bytes on macOS
+
+
+def benchmark_concept_creation(number_of_concepts=20000):
+    """
+        Measure concept creation throughput and the memory allocated per atomic concept
+    """
+    Global.Global.NARS = NARS.NARS()
+    memory = Global.Global.NARS.memory
+    terms = [NALGrammar.Terms.from_string("t" + str(i)) for i in range(number_of_concepts)]
+
+    rss_before = get_peak_rss_in_megabytes()
+    tracemalloc.start()
+    start = timeit.default_timer()
+    for term in terms:
+        memory.conceptualize_term(term)
+    seconds = timeit.default_timer() - start
+    allocated_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = get_peak_rss_in_megabytes()
+
+    print_benchmark_result("Concept creation", number_of_concepts, "concepts", seconds)
+    print("Memory per concept: " + "{:.0f}".format(allocated_bytes / number_of_concepts) + " bytes allocated"
+          + ("" if rss_before is None else
+             ", " + "{:.0f}".format((rss_after - rss_before) * 2 ** 20 / number_of_concepts) + " bytes peak RSS growth"))
+
+
+def benchmark_term_construction(number_of_terms=20000, number_of_iterations=200000):
+    """
+        Measure compound term construction, and iteration over and indexing into subterms
+    """
+    atoms = [NALGrammar.Terms.AtomicTerm("t" + str(i)) for i in range(8)]
+    statements = [NALGrammar.Terms.StatementTerm(atoms[i], atoms[(i + 1) % len(atoms)], NALSyntax.Copula.Inheritance)
+                  for i in range(len(atoms))]
+
+    start = timeit.default_timer()
+    terms = []
+    for i in range(number_of_terms):
+        terms.append(NALGrammar.Terms.CompoundTerm(subterms=[statements[i % 8], statements[(i + 3) % 8], atoms[i % 5]],
+                                                   term_connector=NALSyntax.TermConnector.SequentialConjunction))
+    print_benchmark_result("Compound term construction", number_of_terms, "terms", timeit.default_timer() - start)
+
+    start = timeit.default_timer()
+    for term in terms:
+        str(term)
+    print_benchmark_result("Compound term string building", number_of_terms, "terms", timeit.default_timer() - start)
+
+    start = timeit.default_timer()
+    count = 0
+    for i in range(number_of_iterations):
+        term = terms[i % number_of_terms]
+        for subterm in term.subterms:
+            count += subterm.is_operation
+        count += term.subterms[0] is term.subterms[-1]
+    print_benchmark_result("Subterm iteration", number_of_iterations, "terms", timeit.default_timer() - start)
+
+    long_subterms = [NALGrammar.Terms.AtomicTerm("t" + str(i)) for i in range(20000)]
+    start = timeit.default_timer()
+    for _ in range(10):
+        str(NALGrammar.Terms.CompoundTerm(subterms=long_subterms, term_connector=NALSyntax.TermConnector.SequentialConjunction))
+    print_benchmark_result("Long conjunction (20000 subterms) construction and string", 10, "terms",
+                           timeit.default_timer() - start)
+
+
+def benchmark_spatial_term_lookup(number_of_terms=20, number_of_lookups=2000):
+    """
+        Measure 28x28 spatial term construction, and array concept lookups by an equal spatial term
+    """
+    Global.Global.NARS = NARS.NARS()
+    memory = Global.Global.NARS.memory
+    element_terms = [NALGrammar.Terms.from_string("(p" + str(i) + "-->" + brightness + ")")
+                     for i in range(28 * 28) for brightness in ("bright", "dark")]
+    rng = np.random.default_rng(0)
+    element_choices = [rng.integers(2, size=28 * 28) for _ in range(number_of_terms)]
+
+    def make_spatial_terms():
+        return [NALGrammar.Terms.SpatialTerm(np.array([element_terms[2 * i + choice] for i, choice in enumerate(choices)],
+                                                      dtype=object).reshape(28, 28),
+                                             NALSyntax.TermConnector.ArrayConjunction)
+                for choices in element_choices]
+
+    start = timeit.default_timer()
+    spatial_terms = make_spatial_terms()
+    print_benchmark_result("Spatial term (28x28) construction", number_of_terms, "terms", timeit.default_timer() - start)
+
+    for spatial_term in spatial_terms:
+        memory.peek_concept(spatial_term)
+    equal_spatial_terms = make_spatial_terms()
+    start = timeit.default_timer()
+    for i in range(number_of_lookups):
+        memory.peek_concept(equal_spatial_terms[i % number_of_terms])
+    print_benchmark_result("Array concept lookup (28x28)", number_of_lookups, "lookups", timeit.default_timer() - start)
+
+
+def benchmark_bag(granularity=10000, number_of_bags=200, number_of_items=100, number_of_peeks=10000):
+    """
+        Measure Bag construction, clear(), and probabilistic peeks with few occupied levels
+    """
+    start = timeit.default_timer()
+    bags = [NARSDataStructures.Bag.Bag(item_type=NARSMemory.Concept, capacity=number_of_items, granularity=granularity)
+            for _ in range(number_of_bags)]
+    print_benchmark_result("Bag construction (granularity " + str(granularity) + ")", number_of_bags, "bags",
+                           timeit.default_timer() - start)
+
+    bag = bags[0]
+    for i in range(number_of_items):
+        bag.PUT_NEW(NARSMemory.Concept(NALGrammar.Terms.from_string("t" + str(i)), id=i))
+
+    start = timeit.default_timer()
+    for _ in range(number_of_peeks):
+        bag.peek()
+    print_benchmark_result("Bag peek (" + str(number_of_items) + " items)", number_of_peeks, "peeks",
+                           timeit.default_timer() - start)
+
+    start = timeit.default_timer()
+    for bag in bags:
+        bag.clear()
+    print_benchmark_result("Bag clear", number_of_bags, "bags", timeit.default_timer() - start)
+
+
+def benchmark_concept_lookup(number_of_concepts=2000, number_of_lookups=200000):
+    """
+        Measure concept lookups by term, and link bag lookups by concept, for nested statement terms
+    """
+    Global.Global.NARS = NARS.NARS()
+    memory = Global.Global.NARS.memory
+    terms = [NALGrammar.Terms.from_string("((&&,(a" + str(i) + "-->b),(c-->(*,d,e" + str(i) + ")))=/>(f-->g" + str(i) + "))")
+             for i in range(number_of_concepts)]
+    concepts = [memory.peek_concept(term) for term in terms]
+    for concept in concepts[:Config.CONCEPT_LINK_CAPACITY]:
+        concepts[0].set_prediction_link(concept)
+    links = concepts[0].prediction_links
+    linked_concepts = concepts[:Config.CONCEPT_LINK_CAPACITY]
+
+    start = timeit.default_timer()
+    for i in range(number_of_lookups):
+        memory.peek_concept(terms[i % number_of_concepts])
+    print_benchmark_result("Concept lookup by term", number_of_lookups, "lookups", timeit.default_timer() - start)
+
+    start = timeit.default_timer()
+    for i in range(number_of_lookups):
+        concept = linked_concepts[i % len(linked_concepts)]
+        if concept in links: links.get_priority(concept)
+    print_benchmark_result("Link lookup by concept", number_of_lookups, "lookups", timeit.default_timer() - start)
+
+
+def benchmark_link_traversal(number_of_links=Config.CONCEPT_LINK_CAPACITY, number_of_traversals=2000):
+    """
+        Measure get_best_prediction, which walks all of a concept's prediction links
+    """
+    Global.Global.NARS = NARS.NARS(seed=0)
+    memory = Global.Global.NARS.memory
+    for i in range(number_of_links):
+        prediction = NALGrammar.Sentences.new_sentence_from_string("((a-->b)=/>(c-->d" + str(i) + ")). %1.0;0.9%")
+        memory.peek_concept(prediction.statement).belief_table.put(prediction)
+    event = NALGrammar.Sentences.new_sentence_from_string("(a-->b). :|: %1.0;0.9%")
+
+    start = timeit.default_timer()
+    for _ in range(number_of_traversals):
+        memory.get_best_prediction(event)
+    print_benchmark_result("Prediction link traversal (" + str(number_of_links) + " links)", number_of_traversals,
+                           "traversals", timeit.default_timer() - start)
+
+
+def benchmark_related_concept_retrieval(number_of_statements=5000, number_of_retrievals=50000):
+    """
+        Measure how fast memory finds a statement concept sharing a subterm with a given statement concept
+    """
+    Global.Global.NARS = NARS.NARS(seed=0)
+    memory = Global.Global.NARS.memory
+    concepts = [memory.peek_concept(NALGrammar.Terms.from_string("(s" + str(i % 500) + "-->p" + str(i // 500) + ")"))
+                for i in range(number_of_statements)]
+
+    start = timeit.default_timer()
+    number_found = 0
+    for i in range(number_of_retrievals):
+        if memory.get_semantically_related_concept(concepts[i % number_of_statements]) is not None: number_found += 1
+    print_benchmark_result("Related concept retrieval (" + str(number_found) + " found)", number_of_retrievals,
+                           "retrievals", timeit.default_timer() - start)
+
+
+def benchmark_variable_query(concept_counts=(1000, 10000, 50000), number_of_queries=200):
+    """
+        Measure the latency of finding the concepts that unify with a term containing variables,
+        against the number of concepts, compared with unifying the term with every concept
+    """
+    for number_of_concepts in concept_counts:
+        Global.Global.NARS = NARS.NARS(seed=0)
+        memory = Global.Global.NARS.memory
+        for i in range(number_of_concepts):
+            memory.peek_concept(NALGrammar.Terms.from_string("(s" + str(i) + "-->p" + str(i % 100) + ")"))
+        queries = [NALGrammar.Terms.from_string("(?x-->p" + str(i % 100) + ")") for i in range(number_of_queries)]
+
+        start = timeit.default_timer()
+        for query in queries:
+            memory.get_unifiable_concepts(query)
+        print_benchmark_result("Variable query, term index (" + str(len(memory)) + " concepts)", number_of_queries,
+                               "queries", timeit.default_timer() - start)
+
+        start = timeit.default_timer()
+        for query in queries[:10]:
+            [item for item in memory.concepts_bag if NALGrammar.Terms.unify(query, item.object.term) is not None]
+        print_benchmark_result("Variable query, scanning concepts (" + str(len(memory)) + " concepts)", 10,
+                               "queries", timeit.default_timer() - start)
+
+
+def benchmark_spatial_buffer(number_of_frames=20):
+    """
+        Measure how fast the vision buffer encodes frames into quadtree events
+    """
+    Global.Global.NARS = NARS.NARS()
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, size=(number_of_frames,) + Config.VISION_DIMENSIONS)
+
+    start = timeit.default_timer()
+    for frame in frames:
+        Global.Global.NARS.vision_buffer.set_image(frame)
+    print_benchmark_result("Spatial buffer " + str(Config.VISION_DIMENSIONS) + " encoding", number_of_frames, "frames",
+                           timeit.default_timer() - start)
+
+
+def benchmark_temporal_chaining(window_sizes=(15, 50, 100, 200), number_of_events=2000):
+    """
+        Measure how fast the temporal module chains new events, for several temporal chain window sizes
+    """
+    Global.Global.NARS = NARS.NARS()
+    rng = np.random.default_rng(0)
+    event_strings = ("(a{}-->b)", "(&&,(a{}-->b),(c-->d))", "(&&,(&&,(e{}-->f),(g-->h)),(i-->j))")
+    events = [NALGrammar.Sentences.new_sentence_from_string(event_strings[rng.integers(len(event_strings))].format(
+        rng.integers(10)) + ". :|: %1.0;0.9%") for _ in range(number_of_events)]
+
+    temporal_chaining_4_events = Config.TEMPORAL_CHAINING_4_EVENTS
+    for chaining_4_events in (False, True):
+        Config.TEMPORAL_CHAINING_4_EVENTS = chaining_4_events
+        for window_size in window_sizes:
+            Global.Global.NARS = NARS.NARS()
+            global_buffer = Global.Global.NARS.global_buffer
+            temporal_module = NARSDataStructures.Buffers.TemporalModule(Global.Global.NARS,
+                                                                        item_type=NARSDataStructures.Other.Task,
+                                                                        capacity=window_size)
+            start = timeit.default_timer()
+            for event in events:
+                # only input events start chains of 4
+                temporal_module.PUT_NEW(NARSDataStructures.Other.Task(event, is_input_task=True))
+                while global_buffer.take() is not None: pass  # the working cycle would consume the derived sentences
+            print_benchmark_result("Temporal chaining" + (" of 4 events" if chaining_4_events else "")
+                                   + " (window " + str(window_size) + ")", number_of_events, "events",
+                                   timeit.default_timer() - start)
+    Config.TEMPORAL_CHAINING_4_EVENTS = temporal_chaining_4_events
+
+
+def benchmark_load_input(number_of_sentences=50000, number_of_workers=(0, 4)):
+    """
+        Measure NAL file loading throughput, parsing in the reasoner and in worker processes
+    """
+    filename = "benchmark_load_input.nal"
+    with open(filename, "w") as file:
+        for i in range(number_of_sentences):
+            file.write("((&&,a" + str(i) + ",b)-->(||,c,d" + str(i) + ")). %1.0;0.9%\n")
+
+    for workers in number_of_workers:
+        Global.Global.NARS = NARS.NARS()
+        global_buffer = Global.Global.NARS.global_buffer
+        start = timeit.default_timer()
+        loader = InputChannel.NALFileLoader(filename, number_of_workers=workers)
+        while not loader.is_done():
+            loader.load_batch()
+            while global_buffer.take() is not None: pass
+        print_benchmark_result("Load input (" + str(workers) + " parse workers)", loader.number_of_sentences_loaded,
+                               "sentences", timeit.default_timer() - start)
+    os.remove(filename)
+
+
+def benchmark_memory_snapshot(number_of_concepts=100000):
+    """
+        Measure snapshot save and load throughput for a memory holding the given number of concepts
+    """
+    Global.Global.NARS = NARS.NARS()
+    memory = Global.Global.NARS.memory
+    while len(memory) < number_of_concepts:
+        i = len(memory)
+        j = NALGrammar.Sentences.new_sentence_from_string("(s" + str(i) + "-->p" + str(i) + "). %0.9;0.8%")
+        memory.peek_concept(j.statement).belief_table.put(j)
+
+    filename = "benchmark_memory_snapshot.nars"
+    start = timeit.default_timer()
+    count = NARSPersistence.save_memory_snapshot(memory, filename)
+    print_benchmark_result("Snapshot save", count, "concepts", timeit.default_timer() - start)
+    print("Snapshot size: " + "{:.1f}".format(os.path.getsize(filename) / 2 ** 20) + " MiB")
+
+    Global.Global.NARS = NARS.NARS()
+    start = timeit.default_timer()
+    loaded_memory, _, _ = NARSPersistence.load_memory_snapshot(filename, memory=Global.Global.NARS.memory)
+    print_benchmark_result("Snapshot load", len(loaded_memory), "concepts", timeit.default_timer() - start)
+    os.remove(filename)
+
+
+def main():
+    """
+        Memory Benchmarks
+    """
+    benchmark_concept_creation()
+    benchmark_concept_lookup()
+    benchmark_term_construction()
+    benchmark_spatial_term_lookup()
+    benchmark_related_concept_retrieval()
+    benchmark_link_traversal()
+    benchmark_variable_query()
+    benchmark_bag()
+    benchmark_spatial_buffer()
+    benchmark_temporal_chaining()
+    benchmark_load_input()
+    benchmark_memory_snapshot()
+
+    print("All Performance Tests finished.")
+
+
+if __name__ == "__main__":
+    Config.DEBUG = False
+    Config.GUI_USE_INTERFACE = False
+    Config.SILENT_MODE = True
+    main()
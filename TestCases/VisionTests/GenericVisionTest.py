@@ -35,9 +35,10 @@ class GenericVisionTest:
         self.break_duration = 1000
 
         # shuffle dataset
-        p = np.random.permutation(len(self.x_train))
+        rng = np.random.default_rng(Config.RANDOM_SEED)
+        p = rng.permutation(len(self.x_train))
         self.x_train, self.y_train = self.x_train[p], self.y_train[p]
-        p = np.random.permutation(len(self.x_test))
+        p = rng.permutation(len(self.x_test))
         self.x_test, self.y_test = self.x_test[p], self.y_test[p]
 
         # trim dataset to size
@@ -0,0 +1,192 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import Config
+import Global
+import InputChannel
+import NARS
+from PerformanceTests import get_peak_rss_in_megabytes
+
+"""
+    Created: October 19, 2026
+    Purpose: Reproducible working cycle benchmarks, with a regression gate.
+        Each workload is a seeded synthetic input stream, fed to NARS one working cycle at a time.
+        Run with --save-baseline to record the results as a JSON baseline;
+        later runs exit with code 1 when a metric is worse than the baseline by more than the threshold.
+"""
+
+BASELINE_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+THROUGHPUT_METRICS = ("cycles_per_second", "tasks_per_second")  # higher is better
+MEMORY_METRICS = ("peak_allocated_megabytes",)  # lower is better
+
+
+"""
+    Workloads
+        Each yields the input of one working cycle at a time: (Narsese input strings, vision frame or None)
+"""
+
+
+def syllogistic_chain_workload(rng, number_of_cycles):
+    """
+        A chain of inheritance beliefs (s0-->s1), (s1-->s2), ... with questions about its ends
+    """
+    for cycle in range(number_of_cycles):
+        i = cycle % 100
+        inputs = ["(s" + str(i) + "-->s" + str(i + 1) + "). %1.0;0.9%"]
+        if cycle % 10 == 9: inputs.append("(s" + str(rng.integers(i + 1)) + "-->s" + str(i + 1) + ")?")
+        yield inputs, None
+
+
+def event_stream_workload(rng, number_of_cycles):
+    """
+        One event per cycle, of the kinds the temporal module chains
+    """
+    event_strings = ("(a{}-->b). :|: %1.0;0.9%",
+                     "(&&,(a{}-->b),(c-->d)). :|: %1.0;0.9%",
+                     "(&&,(&&,(e{}-->f),(g-->h)),(i-->j)). :|: %1.0;0.9%")
+    for _ in range(number_of_cycles):
+        yield [event_strings[rng.integers(len(event_strings))].format(rng.integers(10))], None
+
+
+def operation_workload(rng, number_of_cycles):
+    """
+        Operation goals, and goals for sequences (context &/ operation) whose context is observed first
+    """
+    for cycle in range(number_of_cycles):
+        context = "(e" + str(rng.integers(10)) + "-->f)"
+        operation = "((*,{SELF})-->op" + str(rng.integers(5)) + ")"
+        if cycle % 2 == 0:
+            yield [context + ". :|: %1.0;0.9%"], None
+        else:
+            yield ["(&&," + context + "," + operation + ")! :|: %1.0;0.9%", operation + "! :|: %1.0;0.9%"], None
+
+
+def vision_workload(rng, number_of_cycles):
+    """
+        MNIST-like images: a few bright strokes on a dark background, one frame per cycle
+    """
+    height, width = Config.VISION_DIMENSIONS[:2]
+    for _ in range(number_of_cycles):
+        frame = np.zeros(Config.VISION_DIMENSIONS)
+        for _ in range(rng.integers(2, 5)):
+            row, column = rng.integers(height), rng.integers(width)
+            if rng.random() < 0.5:
+                frame[row:row + 2, column:column + width // 3] = 255
+            else:
+                frame[row:row + height // 3, column:column + 2] = 255
+        yield [], frame
+
+
+WORKLOADS = {
+    "syllogistic_chain": syllogistic_chain_workload,
+    "event_stream": event_stream_workload,
+    "operations": operation_workload,
+    "vision": vision_workload
+}
+
+
+def run_workload(workload, number_of_cycles, seed, trace_allocations=False):
+    """
+        Run a workload on a new NARS.
+
+        :param trace_allocations: also measure the peak memory allocated while running
+            (tracemalloc slows the run, so its throughput should not be used)
+        :return: dict of metrics
+    """
+    Global.Global.NARS = NARS.NARS(seed=seed)
+    while InputChannel.input_queue.take() is not None: pass
+    while InputChannel.frame_stream.take() is not None: pass
+    cycle_inputs = list(workload(np.random.default_rng(seed), number_of_cycles))  # generated before timing
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # e.g. EXE: lines
+        if trace_allocations: tracemalloc.start()
+        start = timeit.default_timer()
+        for input_strings, frame in cycle_inputs:
+            for input_string in input_strings:
+                InputChannel.parse_and_queue_input_string(input_string)
+            if frame is not None: InputChannel.frame_stream.put(frame)
+            Global.Global.NARS.do_working_cycle()
+        seconds = timeit.default_timer() - start
+
+    if trace_allocations:
+        _, peak_allocated_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"peak_allocated_megabytes": peak_allocated_bytes / 2 ** 20}
+
+    return {"cycles_per_second": number_of_cycles / seconds,
+            "tasks_per_second": Global.Global.NARS.instrumentation.number_of_tasks_processed / seconds,
+            "peak_rss_megabytes": get_peak_rss_in_megabytes()}
+
+
+def find_regressions(results, baseline, threshold):
+    """
+        :return: a description of each metric that is worse than the baseline by more than the threshold fraction
+    """
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline: continue
+        if (baseline[name]["cycles"], baseline[name]["seed"]) != (metrics["cycles"], metrics["seed"]):
+            print("Skipping " + name + ": the baseline was recorded with different --cycles or --seed")
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if metrics[metric] < baseline[name][metric] * (1 - threshold):
+                regressions.append(name + " " + metric + ": " + "{:.1f}".format(metrics[metric])
+                                   + " < baseline " + "{:.1f}".format(baseline[name][metric]))
+        for metric in MEMORY_METRICS:
+            if metrics[metric] > baseline[name][metric] * (1 + threshold):
+                regressions.append(name + " " + metric + ": " + "{:.1f}".format(metrics[metric])
+                                   + " > baseline " + "{:.1f}".format(baseline[name][metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the working cycle benchmarks")
+    parser.add_argument("--cycles", type=int, default=200, help="working cycles per workload")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--baseline", default=BASELINE_FILENAME, help="JSON baseline to compare with or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fraction a metric may be worse than the baseline before the run fails")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.workloads:
+        metrics = run_workload(WORKLOADS[name], args.cycles, args.seed)
+        metrics.update(run_workload(WORKLOADS[name], args.cycles, args.seed, trace_allocations=True))
+        metrics.update({"cycles": args.cycles, "seed": args.seed})
+        results[name] = metrics
+        print(name + ": " + json.dumps(metrics))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print("Saved baseline to " + args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at " + args.baseline + "; run with --save-baseline to record one.")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = find_regressions(results, baseline, args.threshold)
+    for regression in regressions:
+        print("REGRESSION: " + regression)
+    if len(regressions) > 0: return 1
+    print("No regressions beyond " + "{:.0%}".format(args.threshold) + " of the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    Config.DEBUG = False
+    Config.GUI_USE_INTERFACE = False
+    Config.SILENT_MODE = True
+    sys.exit(main())
@@ -14,6 +14,7 @@ import Global
 import InputChannel
 import NARSGUI
 import NARS
+import NARSServer
 
 
 
@@ -75,6 +76,18 @@ def main(start=True):
                                            daemon=True)
     shell_input_thread.start()
 
+    # record or replay the input stream
+    if Config.INPUT_RECORD_FILENAME != "":
+        InputChannel.start_recording_input(Config.INPUT_RECORD_FILENAME)
+    if Config.INPUT_REPLAY_FILENAME != "":
+        InputChannel.replay_input_from_file(Config.INPUT_REPLAY_FILENAME)
+
+    # launch network input server
+    if Config.SERVER_ENABLED:
+        server = NARSServer.NARSServer()
+        server.start()  # raises if the server cannot listen, e.g. the port is in use
+        NARS_object.server = server
+
     if start:
         # Finally, run NARS in the shell
         Global.Global.set_paused(False)